@@ -1,11 +1,58 @@
 import streamlit as st
-import requests
+import hashlib
 import json
 import time
-import os
-from typing import List, Dict, Any, Tuple, Optional
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import List, Dict, Any, Optional
 from datetime import datetime
 
+from design_api import (
+    API_ENDPOINT,
+    build_request_body,
+    extract_request_id,
+    request_body_hash
+)
+from design_files import fetch_command, file_picker_command
+from floor_plan import FLOOR_PLAN_SIZE, FLOOR_PLAN_THUMBNAIL_SIZE, source_design_for
+from design_session import FORM, RESULT, SUBMITTED, SUBMITTING, DesignSession
+from job_registry import OUTSTANDING_STATUSES
+from feasibility import FEASIBILITY_CHECK
+from request_schema import fit_warning, validate_job
+from submission_queue import ACCEPTED, COMPLETED, DEFERRED, FAILED, FINISHED_STATUSES, RETRYING
+from state_backend import REPLICA_ID, STATE_BACKEND
+from metrics import DISPLAY_SECONDS, REGISTRY, SCRIPT_RUNS, STATUS_REFRESHES, Histogram, log_event
+from result_tree import (
+    VIEWER_PAGE_SIZE,
+    child_count,
+    describe_value,
+    format_path,
+    is_small,
+    page_children,
+    resolve_path,
+    summarize_design
+)
+# Cached resources live in their own module so they are set up once per process, not once per rerun
+from app_resources import (
+    DESIGN_FILE_PUBLIC_URL,
+    get_bearer_token,
+    get_callback_server,
+    get_design_file_cache,
+    get_design_file_server,
+    get_floor_plan_cache,
+    get_http_client,
+    get_job_registry,
+    get_metrics_server,
+    get_polling_policy,
+    get_recovery_report,
+    get_result_store,
+    get_status_cache,
+    get_status_poller,
+    get_submission_cache,
+    get_submission_queue,
+    layout_card_html,
+    page_styles
+)
+
 # Page configuration
 st.set_page_config(
     page_title="AI Auto Design",
@@ -14,490 +61,731 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS for modern UI
-st.markdown("""
-    <style>
-    .main-header {
-        font-size: 3rem;
-        font-weight: 700;
-        background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        text-align: center;
-        margin-bottom: 2rem;
-    }
-    .section-header {
-        font-size: 1.5rem;
-        font-weight: 600;
-        background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        background-clip: text;
-        margin-top: 2rem;
-        margin-bottom: 1rem;
-        padding-bottom: 0.5rem;
-        border-bottom: 2px solid #667eea;
-    }
-    .stButton>button {
-        width: 100%;
-        background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
-        color: white;
-        font-weight: 600;
-        font-size: 1.1rem;
-        padding: 0.75rem 2rem;
-        border-radius: 10px;
-        border: none;
-        transition: all 0.3s ease;
-    }
-    .stButton>button:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 10px 20px rgba(102, 126, 234, 0.3);
-    }
-    .stButton>button:disabled,
-    .stButton>button[disabled],
-    button[disabled] {
-        opacity: 0.6 !important;
-        cursor: not-allowed !important;
-        background: linear-gradient(90deg, #9ca3af 0%, #6b7280 100%) !important;
-        transform: none !important;
-        box-shadow: none !important;
-        pointer-events: none !important;
-    }
-    .stButton>button:disabled:hover,
-    .stButton>button[disabled]:hover,
-    button[disabled]:hover {
-        transform: none !important;
-        box-shadow: none !important;
-        cursor: not-allowed !important;
-        opacity: 0.6 !important;
-    }
-    /* Target the button container when disabled */
-    .stButton:has(button[disabled]) {
-        cursor: not-allowed !important;
-    }
-    .stButton:has(button[disabled]) > button {
-        cursor: not-allowed !important;
-    }
-    .success-message {
-        padding: 1rem;
-        border-radius: 10px;
-        background-color: #d4edda;
-        border: 1px solid #c3e6cb;
-        color: #155724;
-        margin-top: 1rem;
-    }
-    .error-message {
-        padding: 1rem;
-        border-radius: 10px;
-        background-color: #f8d7da;
-        border: 1px solid #f5c6cb;
-        color: #721c24;
-        margin-top: 1rem;
-    }
-    /* Multiselect ellipsis styling for selected values */
-    div[data-baseweb="select"] {
-        max-width: 100%;
-    }
-    div[data-baseweb="select"] > div {
-        max-width: 100%;
-        overflow: hidden;
-    }
-    div[data-baseweb="select"] div[role="combobox"] {
-        max-width: 100%;
-        overflow: hidden;
-    }
-    div[data-baseweb="select"] div[role="combobox"] > div {
-        max-width: 100%;
-        overflow: hidden;
-    }
-    /* Selected tags container */
-    div[data-baseweb="select"] div[role="combobox"] > div > div {
-        max-width: 100%;
-        overflow: hidden;
-        display: flex;
-        flex-wrap: wrap;
-    }
-    /* Individual selected tag */
-    div[data-baseweb="select"] span[data-baseweb="tag"] {
-        max-width: 150px;
-        overflow: hidden;
-        text-overflow: ellipsis;
-        white-space: nowrap;
-    }
-    /* Selected text when collapsed */
-    div[data-baseweb="select"] div[role="combobox"] > div > div:first-child {
-        max-width: 100%;
-        overflow: hidden;
-        text-overflow: ellipsis;
-        white-space: nowrap;
-    }
-    /* Loading animation */
-    @keyframes spin {
-        0% { transform: rotate(0deg); }
-        100% { transform: rotate(360deg); }
-    }
-    .spinner {
-        border: 4px solid #f3f3f3;
-        border-top: 4px solid #667eea;
-        border-radius: 50%;
-        width: 60px;
-        height: 60px;
-        animation: spin 1s linear infinite;
-        margin: 20px auto;
-    }
-    .progress-container {
-        text-align: center;
-        padding: 3rem 2rem;
-    }
-    .progress-text {
-        font-size: 1.5rem;
-        font-weight: 600;
-        color: #667eea;
-        margin-top: 1rem;
-    }
-    .progress-subtext {
-        font-size: 1rem;
-        color: #718096;
-        margin-top: 0.5rem;
-    }
-    /* Layout type selection buttons */
-    .layout-button-container {
-        display: flex;
-        gap: 1rem;
-        justify-content: center;
-        margin: 1rem 0;
-    }
-    .layout-button {
-        flex: 1;
-        padding: 2rem 1rem;
-        background: white;
-        border: 2px solid #e2e8f0;
-        border-radius: 10px;
-        cursor: pointer;
-        text-align: center;
-        transition: all 0.3s ease;
-        font-size: 3rem;
-        color: #2d3748;
-    }
-    .layout-button:hover {
-        border-color: #667eea;
-        transform: translateY(-2px);
-        box-shadow: 0 4px 12px rgba(102, 126, 234, 0.2);
-    }
-    .layout-button.selected {
-        border-color: #667eea;
-        background: linear-gradient(135deg, #667eea15 0%, #764ba215 100%);
-        box-shadow: 0 4px 12px rgba(102, 126, 234, 0.3);
-    }
-    .layout-button-label {
-        font-size: 1rem;
-        font-weight: 600;
-        color: #2d3748;
-        margin-top: 0.5rem;
-    }
-    .layout-button.selected .layout-button-label {
-        color: #667eea;
-    }
-    /* Layout button - completely hide the Streamlit button and its container */
-    div[data-testid="column"]:has(button[key="layout_l"]) {
-        position: relative;
-    }
-    /* Hide the button wrapper/container */
-    div:has(button[key="layout_l"]) {
-        background: transparent !important;
-        border: none !important;
-        padding: 0 !important;
-        margin: 0 !important;
-    }
-    button[key="layout_l"] {
-        position: absolute !important;
-        top: 0 !important;
-        left: 0 !important;
-        width: 100% !important;
-        height: 100% !important;
-        background: transparent !important;
-        border: none !important;
-        padding: 0 !important;
-        margin: 0 !important;
-        opacity: 0 !important;
-        z-index: 10 !important;
-        cursor: pointer !important;
-        min-height: 120px !important;
-        box-shadow: none !important;
-    }
-    /* Ensure button container doesn't show any gradient or background */
-    .stButton:has(button[key="layout_l"]),
-    div:has(button[key="layout_l"]),
-    div:has(button[key="layout_l"]) > div,
-    div:has(button[key="layout_l"]) > div > div,
-    .layout-card-wrapper,
-    .layout-card-wrapper > * {
-        background: transparent !important;
-        background-image: none !important;
-        border: none !important;
-        padding: 0 !important;
-        margin: 0 !important;
-        box-shadow: none !important;
-    }
-    /* Specifically target the column containing the layout button */
-    div[data-testid="column"]:has(button[key="layout_l"]) {
-        overflow: hidden !important;
-    }
-    div[data-testid="column"]:has(button[key="layout_l"]) > div {
-        overflow: hidden !important;
-        background: transparent !important;
-        background-image: none !important;
-    }
-    /* Hide any gradient specifically from button and all its parents */
-    button[key="layout_l"],
-    button[key="layout_l"]::before,
-    button[key="layout_l"]::after,
-    .stButton:has(button[key="layout_l"])::before,
-    .stButton:has(button[key="layout_l"])::after {
-        background: transparent !important;
-        background-image: none !important;
-    }
-    button[key="layout_l"]:hover,
-    button[key="layout_l"]:focus,
-    button[key="layout_l"]:active {
-        background: transparent !important;
-        border: none !important;
-        box-shadow: none !important;
-        opacity: 0 !important;
-    }
-    /* Hide any gradient or background from button parent */
-    .stButton:has(button[key="layout_l"]) {
-        background: transparent !important;
-        border: none !important;
-        padding: 0 !important;
-        margin: 0 !important;
-    }
-    </style>
-""", unsafe_allow_html=True)
+# Custom CSS for modern UI (read and minified once per process)
+st.markdown(page_styles(), unsafe_allow_html=True)
 
-# API endpoint
-API_ENDPOINT = "https://ai-auto-design-api-service.azurewebsites.net/api/v1/ai-auto-design"
-API_BASE_URL = "https://ai-auto-design-api-service.azurewebsites.net"
+STATUS_REFRESH_INTERVAL = 2  # How often the progress view re-reads the poller (seconds)
+SUBMIT_REFRESH_INTERVAL = 1  # How often a pending submission re-reads the submission queue (seconds)
+JOB_REFRESH_INTERVAL = 5  # How often the jobs page re-reads the job registry (seconds)
+INLINE_COMMAND_MAX_BYTES = 256 * 1024  # Larger designs are only offered as a file
+FLOOR_PLAN_WAIT = 10  # Seconds the result page waits for a floor plan that is still rendering
 
 # Get bearer token from Streamlit secrets or environment variable
 # For local development, create .streamlit/secrets.toml with: BEARER_TOKEN = "your_token"
 # For Streamlit Cloud, add it in Settings > Secrets
-try:
-    BEARER_TOKEN = st.secrets["BEARER_TOKEN"]
-except (KeyError, AttributeError):
-    BEARER_TOKEN = os.getenv("BEARER_TOKEN", "")
+BEARER_TOKEN = get_bearer_token()
     
 if not BEARER_TOKEN:
     st.error("⚠️ BEARER_TOKEN not found! Please set it in Streamlit secrets or as an environment variable.")
     st.stop()
 
-def build_request_body(
-    appliances: List[str],
-    cabinet_types: List[str],
-    worktop_material: str,
-    plumbing_fixtures: List[str],
-    layout_type: str = "L-Shaped",
-    width: int = 4000,
-    depth: int = 4000
-) -> Dict[str, Any]:
-    """Build the request body with user selections."""
+@st.fragment(run_every=STATUS_REFRESH_INTERVAL)
+def render_poll_status(request_key: str, location_path: str) -> None:
+    """Show the latest polled status. Re-runs on its own without blocking the script."""
+    poller = get_status_poller()
+    STATUS_REFRESHES.inc()
+    if st.session_state.polling_active:
+        # Re-register on every run so the request stays tracked while this view is open
+        poller.track(request_key, location_path)
+    status = poller.get(request_key)
+    if status is not None and status["deferred"]:
+        # Held back on our side; polling resumes by itself
+        st.info(f"⏳ Status check queued: {status['deferred']}.")
+    elif status is not None and status["last_error"] and not status["done"]:
+        st.warning(f"⚠️ Status check failed ({status['last_error']}). Retrying...")
+    if status is None or (status["result"] is None and status["error"] is None):
+        if status is not None and status["callback"] and not (status["deferred"] or status["last_error"]):
+            # The API pushes the result when it's ready; polling is only a slow fallback
+            st.info("🔄 Generating your layout. It will appear here as soon as it's ready.")
+        elif status is None or not (status["deferred"] or status["last_error"]):
+            st.info("🔄 Checking status...")
+        return
     
-    # Base request body structure
-    request_body = {
-        "sourceDesign": {
-            "info": {
-                "name": "Sample Design v1.2",
-                "formatVersion": "1.2.0",
-                "source": {
-                    "applicationId": "TestHub",
-                    "applicationVersion": "1.5.17"
-                },
-                "coordinateConventions": {
-                    "baseMeasurementUnit": "mm",
-                    "axisOrientation": "rightHanded",
-                    "axisElevation": "zAxisUp"
-                }
-            },
-            "spaces": [
-                {
-                    "id": "1532d48e-73b8-4b79-8eea-6159db89350d",
-                    "name": "Kitchen Space",
-                    "functions": ["kitchen"],
-                    "walls": {
-                        "perimeterWalls": [
-                            {
-                                "id": "south_wall",
-                                "type": "solidWall",
-                                "name": "South Wall",
-                                "startPosition": [0, 0],
-                                "thickness": 150,
-                                "outdoorPerimeter": True,
-                                "startHeight": 3200,
-                                "endHeight": 3200
-                            },
-                            {
-                                "id": "east_wall",
-                                "type": "solidWall",
-                                "name": "East Wall",
-                                "startPosition": [width, 0],
-                                "thickness": 150,
-                                "outdoorPerimeter": False,
-                                "startHeight": 3200,
-                                "endHeight": 3200
-                            },
-                            {
-                                "id": "north_wall",
-                                "type": "solidWall",
-                                "name": "North Wall",
-                                "startPosition": [width, depth],
-                                "thickness": 150,
-                                "outdoorPerimeter": False,
-                                "startHeight": 3200,
-                                "endHeight": 3200
-                            },
-                            {
-                                "id": "west_wall",
-                                "type": "solidWall",
-                                "name": "West Wall",
-                                "startPosition": [0, depth],
-                                "thickness": 150,
-                                "outdoorPerimeter": False,
-                                "startHeight": 3200,
-                                "endHeight": 3200
-                            }
-                        ]
-                    },
-                    "floor": {"id": "0f51b8fb-e147-4a80-91ba-0047d881c7cf"},
-                    "ceiling": {"id": "c58c9ce1-cb93-48da-9d1d-aae3efb0ec12"}
-                }
-            ]
-        },
-        "autoDesignInputs": {
-            "roomConfig": {
-                "functionLayoutType": layout_type,
-                "functionStyle": "modern"
-            },
-            "requiredItemTypes": []
-        }
-    }
+    if status["last_poll_time"]:
+        st.session_state.last_poll_time = status["last_poll_time"]
+    
+    if status["error"] is not None:
+        st.error(f"❌ Error polling status: {status['error']}")
+        st.session_state.polling_active = False
+        return
+    
+    result = status["result"]
+    code_major = result.get("codeMajor", "unknown")
+    if code_major != "processing":
+        # Status changed, stop polling and show result
+        st.session_state.polling_active = False
+        # The floor plan renders while the page switches to the result. It is optional, so
+        # nothing that goes wrong with it may keep the result from showing
+        try:
+            submit_floor_plan(request_key, result)
+        except ValueError:
+            # Not usable as a cache key; the result page reports it
+            pass
+        except Exception as e:
+            log_event("floor_plan_failed", request_key, error=str(e))
+        get_design_session().show_result(result, request_key)
+        if status["completed_at"]:
+            display_seconds = time.time() - status["completed_at"]
+            DISPLAY_SECONDS.observe(display_seconds)
+            log_event("displayed", request_key, code_major=code_major, display_seconds=round(display_seconds, 3))
+        # Clear query params to show result on main page
+        st.query_params.clear()
+        st.rerun()
+    else:
+        # Still processing, show status with the learned time estimate
+        remaining = get_polling_policy().estimated_remaining(time.time() - status["started_at"])
+        if remaining > 0:
+            st.info(f"🔄 Status: {code_major}. About {max(1, round(remaining / 60))} minute(s) remaining to generate your layout. ")
+        else:
+            st.info(f"🔄 Status: {code_major}. Your layout is taking a little longer than usual, almost there. ")
+
+def submit_floor_plan(
+    key: str,
+    response: Dict[str, Any],
+    job: Optional[Dict[str, Any]] = None,
+    fmt: str = "svg",
+    size: int = FLOOR_PLAN_SIZE
+) -> Optional[Future]:
+    """Start rendering the floor plan of a successful response. None if it has no design.
+
+    The walls come from the selections the request was submitted with: job, or
+    the job registry's record of the request.
+    """
+    if response.get("codeMajor") != "success" or "result" not in response:
+        return None
+    if job is None:
+        registered = get_job_registry().get(key)
+        job = registered["parameters"] if registered is not None else None
+    design_json = getattr(response, "raw_result", None) or json.dumps(response["result"])
+    return get_floor_plan_cache().submit(key, design_json, fmt, size, source_design_for(job) if job else None)
+
+def render_floor_plan_gallery(rows: List[Dict[str, Any]]) -> None:
+    """Thumbnails of every successful batch row. Missing ones render in the background and show up on a later refresh."""
+    from batch import describe_job
+    
+    images, captions, rendering = [], [], 0
+    for row in rows:
+        if row["status"] != "success" or not row["request_id"] or row["result"] is None:
+            continue
+        try:
+            future = submit_floor_plan(row["request_id"], row["result"], row["job"], "png", FLOOR_PLAN_THUMBNAIL_SIZE)
+        except Exception as e:
+            # Thumbnails are optional; leave this one out rather than the whole dashboard
+            log_event("floor_plan_failed", row["request_id"], error=str(e))
+            continue
+        if future is None:
+            continue
+        if not future.done():
+            rendering += 1
+        elif future.exception() is None:
+            images.append(future.result())
+            captions.append(f"#{row['index'] + 1} · {describe_job(row['job'])}")
+    if rendering:
+        st.caption(f"Rendering {rendering} more floor plan(s)...")
+    if images:
+        st.image(images, caption=captions, width=FLOOR_PLAN_THUMBNAIL_SIZE)
+    elif not rendering:
+        st.info("Floor plans appear here as designs complete.")
+
+@st.fragment(run_every=STATUS_REFRESH_INTERVAL)
+def render_batch_dashboard(batch_run: "BatchRun") -> None:
+    """Per-row status table and throughput for a batch run, refreshed from the shared poller."""
+    from batch import describe_job
     
-    # Build preferences for appliances
-    appliance_preferences = []
-    for appliance in appliances:
-        appliance_preferences.append({"baseItemType": f"appliance.{appliance}"})
+    batch_run.refresh(get_status_poller())
+    summary = batch_run.summary()
     
-    if appliance_preferences:
-        request_body["autoDesignInputs"]["requiredItemTypes"].append({
-            "catalogVersionIDs": [6958, 8347],
-            "preferences": appliance_preferences
-        })
+    metric_cols = st.columns(5)
+    metric_cols[0].metric("Designs", summary["total"])
+    metric_cols[1].metric("Submitted", summary["submitted"])
+    metric_cols[2].metric("Completed", summary["completed"])
+    metric_cols[3].metric("Failed", summary["failed"])
+    metric_cols[4].metric("Throughput", f"{summary['completions_per_minute']:.1f}/min")
     
-    # Build preferences for plumbing fixtures
-    plumbing_preferences = []
-    for fixture in plumbing_fixtures:
-        plumbing_preferences.append({"baseItemType": f"plumbingFixture.{fixture}"})
+    st.dataframe(
+        [
+            {
+                "#": row["index"] + 1,
+                "Design": describe_job(row["job"]),
+                "Status": row["status"],
+                "Request ID": row["request_id"] or "",
+                "Reused": row["reused"],
+                "Submit (s)": round(row["submit_seconds"], 2) if row["submit_seconds"] is not None else None,
+                "Error": row["error"] or ""
+            }
+            for row in batch_run.snapshot()
+        ],
+        use_container_width=True,
+        hide_index=True
+    )
+    
+    if st.toggle("🗺️ Show floor plans", key="batch_floor_plans"):
+        render_floor_plan_gallery(batch_run.snapshot())
+
+@st.fragment(run_every=JOB_REFRESH_INTERVAL)
+def render_job_dashboard() -> None:
+    """Every registered request with filters, brought up to date in one pass over the shared poller."""
+    from batch import describe_job
+    
+    registry = get_job_registry()
+    registry.refresh(get_status_poller())
+    counts = registry.stats()
     
-    if plumbing_preferences:
-        request_body["autoDesignInputs"]["requiredItemTypes"].append({
-            "catalogVersionIDs": [6958],
-            "preferences": plumbing_preferences
-        })
+    metric_cols = st.columns(4)
+    metric_cols[0].metric("Jobs", sum(counts.values()))
+    metric_cols[1].metric("Outstanding", sum(counts.get(status, 0) for status in OUTSTANDING_STATUSES))
+    metric_cols[2].metric("Succeeded", counts.get("success", 0))
+    metric_cols[3].metric(
+        "Failed",
+        sum(count for status, count in counts.items() if status not in OUTSTANDING_STATUSES + ("success",))
+    )
     
-    # Build preferences for cabinets
-    cabinet_preferences = []
-    for cabinet_type in cabinet_types:
-        cabinet_preferences.append({
-            "baseItemType": "cabinetry.cabinet",
-            "subType": cabinet_type
-        })
+    filter_col1, filter_col2, filter_col3 = st.columns([2, 1, 2])
+    with filter_col1:
+        statuses = st.multiselect("Status", options=sorted(counts), key="jobs_status_filter")
+    with filter_col2:
+        source = st.selectbox("Source", options=["All", "app", "batch", "sweep"], key="jobs_source_filter")
+    with filter_col3:
+        search = st.text_input("Search", placeholder="Request ID or parameter", key="jobs_search")
     
-    if cabinet_preferences:
-        request_body["autoDesignInputs"]["requiredItemTypes"].append({
-            "catalogVersionIDs": [8204],
-            "preferences": cabinet_preferences
-        })
+    jobs = get_job_registry().list_jobs(statuses, None if source == "All" else source, search.strip() or None)
+    if not jobs:
+        st.info("No jobs match these filters.")
+        return
     
-    # Build preferences for worktop
-    if worktop_material:
-        request_body["autoDesignInputs"]["requiredItemTypes"].append({
-            "catalogVersionIDs": [8204],
-            "preferences": [
-                {"baseItemType": "worktop.slab", "material": worktop_material.lower()}
-            ]
-        })
+    st.dataframe(
+        [
+            {
+                "Submitted": datetime.fromtimestamp(job["submitted_at"]).strftime("%Y-%m-%d %H:%M:%S"),
+                "Design": describe_job(job["parameters"]),
+                "Status": job["status"],
+                "Source": job["source"],
+                "Request ID": job["request_id"],
+                "Open": f"?progress=true&request_id={job['request_id']}",
+                "Error": job["error"] or ""
+            }
+            for job in jobs
+        ],
+        column_config={"Open": st.column_config.LinkColumn("Open", display_text="View")},
+        use_container_width=True,
+        hide_index=True
+    )
+    
+    with st.expander("Status history"):
+        selected = st.selectbox("Request ID", options=[job["request_id"] for job in jobs], key="jobs_history_request")
+        st.dataframe(
+            [
+                {"Status": entry["status"], "At": datetime.fromtimestamp(entry["at"]).strftime("%Y-%m-%d %H:%M:%S")}
+                for entry in registry.history(selected)
+            ],
+            use_container_width=True,
+            hide_index=True
+        )
+
+def render_result_summary(result_object: Any) -> None:
+    """Headline counts for a design, computed once per result without serialising it."""
+    cached = st.session_state.get("result_summary")
+    if cached is None or cached[0] is not result_object:
+        cached = (result_object, summarize_design(result_object))
+        st.session_state.result_summary = cached
+    summary = cached[1]
     
-    return request_body
+    summary_cols = st.columns(3)
+    summary_cols[0].metric("Spaces", summary["spaces"])
+    summary_cols[1].metric("Walls", summary["walls"])
+    summary_cols[2].metric("Items", summary["items"])
+    if summary["item_types"]:
+        st.dataframe(
+            [{"Item type": item_type, "Count": count} for item_type, count in summary["item_types"].items()],
+            use_container_width=True,
+            hide_index=True
+        )
 
-def send_request(request_body: Dict[str, Any]) -> Tuple[bool, Any, Optional[str]]:
-    """Send POST request to the API. Returns (success, result, location_header)."""
+def render_floor_plan_preview(key: str, response: Dict[str, Any]) -> None:
+    """Top-down SVG of the design, rendered once per request and then served from the cache."""
+    st.markdown("#### 🗺️ Floor Plan")
     try:
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {BEARER_TOKEN}"
+        future = submit_floor_plan(key, response)
+        image = future.result(FLOOR_PLAN_WAIT) if future is not None else None
+    except FutureTimeoutError:
+        st.caption("The floor plan is still rendering. It will show up the next time this page loads.")
+        return
+    except ValueError as e:
+        # Nothing to draw, or a key the cache can't store
+        st.caption(str(e))
+        return
+    except Exception as e:
+        log_event("floor_plan_failed", key, error=str(e))
+        st.caption(f"Floor plan unavailable: {e}")
+        return
+    if image is not None:
+        st.image(image.decode("utf-8"), use_container_width=True)
+
+def set_viewer_position(path: List[Any], page: int = 0) -> None:
+    """Button callback for the result viewer."""
+    st.session_state.viewer_path = path
+    st.session_state.viewer_page = page
+
+@st.fragment
+def render_result_viewer(result_object: Any) -> None:
+    """Browse a result one node and one page at a time instead of rendering it all with st.json."""
+    if "viewer_path" not in st.session_state:
+        set_viewer_position([])
+    
+    try:
+        node = resolve_path(result_object, st.session_state.viewer_path)
+    except (KeyError, IndexError, TypeError):
+        # The result changed under a stale path
+        set_viewer_position([])
+        node = result_object
+    path = st.session_state.viewer_path
+    
+    nav_col1, nav_col2 = st.columns([4, 1])
+    with nav_col1:
+        st.code(format_path(path), language=None)
+    with nav_col2:
+        st.button(
+            "⬆️ Up",
+            key="viewer_up",
+            disabled=not path,
+            use_container_width=True,
+            on_click=set_viewer_position,
+            args=(path[:-1],)
+        )
+    
+    if is_small(node):
+        # Small enough to show in full
+        st.json(node)
+        return
+    
+    count = child_count(node)
+    page_count = max(1, -(-count // VIEWER_PAGE_SIZE))
+    page = min(st.session_state.viewer_page, page_count - 1)
+    for key, child in page_children(node, page):
+        child_col1, child_col2 = st.columns([4, 1])
+        with child_col1:
+            st.markdown(f"`{key}` — {describe_value(child)}")
+        with child_col2:
+            if isinstance(child, (dict, list)):
+                st.button(
+                    "Open",
+                    key=f"viewer_open_{key}",
+                    use_container_width=True,
+                    on_click=set_viewer_position,
+                    args=(path + [key],)
+                )
+    
+    if page_count > 1:
+        page_col1, page_col2, page_col3 = st.columns([1, 2, 1])
+        with page_col1:
+            st.button(
+                "◀ Previous",
+                key="viewer_prev",
+                disabled=page == 0,
+                use_container_width=True,
+                on_click=set_viewer_position,
+                args=(path, page - 1)
+            )
+        with page_col2:
+            st.caption(f"Page {page + 1} of {page_count} ({count} entries)")
+        with page_col3:
+            st.button(
+                "Next ▶",
+                key="viewer_next",
+                disabled=page >= page_count - 1,
+                use_container_width=True,
+                on_click=set_viewer_position,
+                args=(path, page + 1)
+            )
+
+def get_design_session() -> DesignSession:
+    """This session's main page state machine."""
+    if "design_session" not in st.session_state:
+        st.session_state.design_session = DesignSession()
+    return st.session_state.design_session
+
+def select_layout(layout_type: str) -> None:
+    """Button callback for the layout cards."""
+    st.session_state.selected_layout_type = layout_type
+
+@st.fragment
+def render_design_form() -> None:
+    """Selections and the Build button. Changing a selection reruns only this fragment."""
+    session = get_design_session()
+    
+    # Layout Type Selection - Clean and simple design
+    st.markdown('<div class="section-header">📐 Layout Type</div>', unsafe_allow_html=True)
+    
+    # Initialize layout type in session state
+    if "selected_layout_type" not in st.session_state:
+        st.session_state.selected_layout_type = "L-Shaped"
+
+    # Simple visual cards with clickable buttons
+    layout_col1, layout_col2, layout_col3 = st.columns([1, 1, 1])
+
+    with layout_col1:
+        is_selected = st.session_state.selected_layout_type == "L-Shaped"
+        st.markdown(layout_card_html("L", "L-Shaped", is_selected), unsafe_allow_html=True)
+        st.button(
+            "✓ Select",
+            key="layout_l",
+            use_container_width=True,
+            type="primary" if is_selected else "secondary",
+            on_click=select_layout,
+            args=("L-Shaped",)
+        )
+
+    with layout_col2:
+        st.markdown(layout_card_html("U", "U-Shaped", enabled=False), unsafe_allow_html=True)
+        st.button("Select", key="layout_u", use_container_width=True, disabled=True)
+
+    with layout_col3:
+        st.markdown(layout_card_html("I", "I-Shaped", enabled=False), unsafe_allow_html=True)
+        st.button("Select", key="layout_i", use_container_width=True, disabled=True)
+
+    st.markdown("---")
+
+    # Room Dimensions Section
+    st.markdown('<div class="section-header">📏 Room Dimensions</div>', unsafe_allow_html=True)
+    dim_col1, dim_col2 = st.columns([1, 1])
+    
+    with dim_col1:
+        width = st.number_input(
+            "Width (mm):",
+            min_value=3500,
+            max_value=6000,
+            value=4000,
+            step=100,
+            help="Width of the room (3500-6000 mm)"
+        )
+    
+    with dim_col2:
+        depth = st.number_input(
+            "Depth (mm):",
+            min_value=3500,
+            max_value=6000,
+            value=4000,
+            step=100,
+            help="Depth of the room (3500-6000 mm)"
+        )
+
+    st.markdown("---")
+
+    # Main content area
+    col1, col2 = st.columns([1, 1])
+
+    with col1:
+        st.markdown('<div class="section-header">🔌 Appliances</div>', unsafe_allow_html=True)
+        st.markdown("Select the appliances you want in your kitchen:")
+        
+        appliance_options = {
+            "Cooktop": "cooktop",
+            "Refrigerator": "refrigerator",
+            "Oven": "oven",
+            "Range": "range",
+            "Dishwasher": "dishwasher"
         }
-        response = requests.post(
-            API_ENDPOINT,
-            json=request_body,
-            headers=headers,
-            timeout=30
+        
+        selected_appliance_labels = st.multiselect(
+            "Choose appliances:",
+            options=list(appliance_options.keys()),
+            default=["Cooktop", "Refrigerator", "Dishwasher"],
+            label_visibility="collapsed"
         )
         
-        # Handle 202 Accepted status
-        if response.status_code == 202:
-            location = response.headers.get("location", "")
-            result = response.json() if response.content else {}
-            return True, result, location
+        selected_appliances = [appliance_options[label] for label in selected_appliance_labels]
+
+    with col2:
+        st.markdown('<div class="section-header">🚰 Plumbing Fixtures</div>', unsafe_allow_html=True)
+        st.markdown("Select plumbing fixtures:")
+        
+        plumbing_options = {
+            "Sink": "sink"
+        }
+        
+        selected_plumbing_labels = st.multiselect(
+            "Choose plumbing fixtures:",
+            options=list(plumbing_options.keys()),
+            default=["Sink"],
+            label_visibility="collapsed"
+        )
         
-        response.raise_for_status()
-        result = response.json() if response.content else {"message": "Success"}
-        return True, result, None
-    except requests.exceptions.RequestException as e:
-        return False, str(e), None
+        selected_plumbing_fixtures = [plumbing_options[label] for label in selected_plumbing_labels]
 
-def poll_status(location_path: str) -> Tuple[bool, Dict[str, Any]]:
-    """Poll the status endpoint using the location path. Returns (success, result)."""
-    try:
-        # Handle both relative paths (starting with /) and absolute URLs
-        if location_path.startswith("http://") or location_path.startswith("https://"):
-            url = location_path
-        else:
-            # Relative path - append to base URL
-            url = f"{API_BASE_URL}{location_path}"
+    # Cabinets and Worktop section
+    col3, col4 = st.columns([1, 1])
+
+    with col3:
+        st.markdown('<div class="section-header">🗄️ Cabinets</div>', unsafe_allow_html=True)
+        st.markdown("Select cabinet types:")
         
-        headers = {
-            "Authorization": f"Bearer {BEARER_TOKEN}"
+        cabinet_options = {
+            "Wall Cabinet": "roof",
+            "Base Cabinet": "base",
+            "Tall Cabinet": "tall"
         }
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        result = response.json() if response.content else {}
-        return True, result
-    except requests.exceptions.RequestException as e:
-        return False, {"error": str(e)}
+        
+        selected_cabinet_labels = st.multiselect(
+            "Choose cabinet types:",
+            options=list(cabinet_options.keys()),
+            default=["Wall Cabinet", "Base Cabinet", "Tall Cabinet"],
+            label_visibility="collapsed"
+        )
+        
+        selected_cabinets = [cabinet_options[label] for label in selected_cabinet_labels]
+
+    with col4:
+        # Worktop selection
+        st.markdown('<div class="section-header">🪨 Worktop Material</div>', unsafe_allow_html=True)
+        st.markdown("Choose your worktop material:")
+        worktop_material = st.selectbox(
+            "Choose your worktop material:",
+            ["Granite"],
+            index=0,
+            label_visibility="collapsed"
+        )
+
+    # Build button - hide during request, show otherwise
+    st.markdown("---")
+    reuse_previous = st.checkbox(
+        "♻️ Reuse an identical previous design when available",
+        value=True,
+        help="If a design with exactly the same selections was generated recently, show it instead of generating it again"
+    )
+    if session.phase == SUBMITTING:
+        # Show a message instead of the button when request is in progress
+        st.info("🔄 Preparing your personalized layout...")
+        return
+    
+    if st.button("🚀 Build Design", type="primary", use_container_width=True, key="build_design_button"):
+        if not selected_appliances:
+            st.error("⚠️ Please select at least one appliance.")
+        elif not selected_plumbing_fixtures:
+            st.error("⚠️ Please select at least one plumbing fixture.")
+        elif not selected_cabinets:
+            st.error("⚠️ Please select at least one cabinet type.")
+        else:
+            job = {
+                "appliances": selected_appliances,
+                "cabinets": selected_cabinets,
+                "worktop": worktop_material,
+                "plumbing": selected_plumbing_fixtures,
+                "layout": st.session_state.selected_layout_type,
+                "width": width,
+                "depth": depth
+            }
+            # Catch anything the API would reject before it costs a round trip
+            errors = validate_job(job, check_fit=False)
+            # The fit check is only an estimate and the API has the final say, so here it
+            # warns once and a second click on Build with the same selections goes ahead
+            warning = fit_warning(job) if not errors and FEASIBILITY_CHECK else ""
+            if errors:
+                st.error("⚠️ These selections can't be generated:\n" + "\n".join(f"- {error}" for error in errors))
+            elif warning and st.session_state.get("fit_warning_job") != job:
+                st.session_state.fit_warning_job = job
+                st.warning(f"⚠️ {warning}. The API may still find a layout: press Build Design again to try anyway.")
+            else:
+                st.session_state.pop("fit_warning_job", None)
+                # Move to submitting and rerun the whole page so the old Request ID disappears
+                session.submit(dict(job, reuse=reuse_previous))
+                st.rerun()
+
+@st.fragment(run_every=SUBMIT_REFRESH_INTERVAL)
+def render_submission_progress(submission_id: str) -> None:
+    """Follow a queued submission and move the session on once the API has answered."""
+    session = get_design_session()
+    job = get_submission_queue().get(submission_id)
+    if job is None:
+        session.failed("The submission was lost. Please try again.")
+        st.query_params.pop("submission", None)
+        st.rerun()
+    if job["status"] in FINISHED_STATUSES:
+        st.query_params.pop("submission", None)
+    
+    if job["status"] == ACCEPTED:
+        # 202 Accepted: the design is generated in the background
+        st.session_state.location_path = job["location"]
+        session.accepted(job["request_id"], job["location"])
+        st.rerun()
+    elif job["status"] == COMPLETED:
+        # Regular success response
+        session.completed_inline(job["result"])
+        st.rerun()
+    elif job["status"] == FAILED:
+        session.failed(job["error"])
+        st.rerun()
+    elif job["status"] == DEFERRED:
+        send_in = max(0, round(job["next_attempt_at"] - time.time()))
+        st.info(f"⏳ Queued: {job['error']}. Sending in {send_in}s...")
+    elif job["status"] == RETRYING:
+        retry_in = max(0, round(job["next_attempt_at"] - time.time()))
+        st.warning(
+            f"⚠️ Attempt {job['attempts']} of {job['max_attempts']} failed ({job['error']}). "
+            f"Retrying in {retry_in}s..."
+        )
+    else:
+        st.info("🔄 Building your design... This may take a moment.")
+
+def render_submission_notice(notice: Dict[str, Any]) -> None:
+    """Outcome of the last submission, shown under the form until the next one."""
+    if notice["type"] == "error":
+        st.error(f"❌ Error: {notice.get('error', 'Unknown error')}")
+        return
+    if "result" in notice:
+        st.success("✅ Design built successfully!")
+        st.markdown("### Response:")
+        st.json(notice["result"])
+        return
+    
+    request_id = notice.get("request_id")
+    if not request_id:
+        st.success("✅ Request submitted successfully!")
+        return
+    progress_url = f"?progress=true&request_id={request_id}"
+    if notice.get("attached"):
+        st.success(f"♻️ An identical design is already being generated. Following it instead: **Request ID:** `{request_id}`")
+    else:
+        st.success(f"✅ Request submitted successfully! **Request ID:** `{request_id}`")
+    
+    # Important info section for stakeholders
+    st.info(f"""
+    📋 **Your Request ID:** `{request_id}`
+    
+    This request is listed on the [Jobs](?jobs=true) page, so you can come back to it even after closing this tab.
+    You can also open it directly:
+    
+    1. Open this application (use the same URL you're using now)
+    2. Add `?progress=true&request_id={request_id}` to the end of the URL
+    3. The application will give you a command to visualize your design in SFx Tool
+    
+    **Example:** If your current URL is `https://cyncly-ui-vxunrzzf8qbqb2ltgmsio4.streamlit.app`, you would use:
+    `https://cyncly-ui-vxunrzzf8qbqb2ltgmsio4.streamlit.app?progress=true&request_id={request_id}`
+    """)
+    
+    st.markdown(f"""
+    <div id="progress_button_{request_id}" style="margin-top: 1rem; padding: 1.5rem; background-color: #1e3a5f; border-radius: 10px; border: 1px solid #667eea;">
+        <p style="color: #a0aec0; margin-bottom: 1rem; font-size: 1rem;">Click below to open the progress page in a new tab:</p>
+        <a href="{progress_url}" target="_blank" style="
+            display: inline-block;
+            padding: 0.75rem 2rem;
+            background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
+            color: white;
+            text-decoration: none;
+            border-radius: 10px;
+            font-weight: 600;
+            cursor: pointer;
+        ">🚀 Open Progress Page</a>
+    </div>
+    """, unsafe_allow_html=True)
+
+@st.fragment
+def render_result_view() -> None:
+    """Final response of a design. Downloads and viewer navigation rerun only this fragment."""
+    session = get_design_session()
+    full_response = session.result
+    code_major = full_response.get("codeMajor", "unknown")
+    
+    # If codeMajor is "success", show the result object
+    if code_major == "success":
+        st.success(f"✅ Kitchen Design Generated Successfully!")
+        if session.reused_request_id:
+            st.info(f"♻️ This design was generated earlier for identical selections (Request ID: `{session.reused_request_id}`), so no new generation was needed.")
+        result_object = full_response.get("result", {})
+        
+        # Instructions section for viewing results in SFx Tool
+        st.info("""
+        📖 **How to View Your Design in SFx Tool**
+        
+        Follow these steps to view your generated design:
+        
+        **Step 1:** Open the SFx Tool
+        - Click here: [**SFx Tool**](https://planner.cyncly-idealspaces.com/us/design/Draft?partnership=isdemositena)
+        
+        **Step 2:** Open the Browser Console
+        You can open the console using one of these methods:
+        
+        **For Windows:**
+        - Press `F12` key, OR
+        - Press `Ctrl + Shift + J` (Chrome/Edge), OR
+        - Press `Ctrl + Shift + K` (Firefox), OR
+        - Right-click anywhere on the page → Select **"Inspect"** → Click the **"Console"** tab
+        
+        **For Mac:**
+        - Press `Cmd + Option + J` (Chrome/Edge), OR
+        - Press `Cmd + Option + K` (Firefox), OR
+        - Right-click anywhere on the page → Select **"Inspect"** → Click the **"Console"** tab
+        
+        **Step 3:** Load the design file with the command below
+        """)
+        
+        # The design is written once as a gzip file instead of being inlined into the page
+        design_json = getattr(full_response, "raw_result", None) or json.dumps(result_object)
+        result_request_id = session.reused_request_id or session.request_id
+        design_key = result_request_id or hashlib.sha256(design_json.encode("utf-8")).hexdigest()[:32]
+        design_file_path = get_design_file_cache().put(design_key, design_json)
+        
+        if get_design_file_server() is not None and DESIGN_FILE_PUBLIC_URL:
+            # Hosted: a short command fetches the file straight into the SFx Tool
+            st.code(fetch_command(f"{DESIGN_FILE_PUBLIC_URL}/designs/{design_key}.json"), language="javascript")
+            st.info("""
+            **Step 4:** Execute the command
+            - After pasting the command in the console, press `Enter`
+            - Your design will be downloaded and displayed in the SFx Tool
+            """)
+        else:
+            with open(design_file_path, "rb") as f:
+                st.download_button(
+                    "⬇️ Download Design File",
+                    data=f.read(),
+                    file_name=f"design-{design_key}.json.gz",
+                    mime="application/gzip",
+                    use_container_width=True,
+                    key="download_design_file"
+                )
+            st.code(file_picker_command(), language="javascript")
+            st.info("""
+            **Step 4:** Execute the command
+            - Download the design file with the button above
+            - Paste the command in the console and press `Enter`
+            - Pick the downloaded `.json.gz` file in the dialog that opens
+            - Your design will be loaded and displayed in the SFx Tool
+            """)
+        
+        # Small designs can still be pasted directly
+        if len(design_json) <= INLINE_COMMAND_MAX_BYTES:
+            with st.expander("📋 Inline command (paste without a file)"):
+                st.code(f'commands.environment.loadCDFModel(JSON.stringify({design_json}))', language="javascript")
+        
+        st.markdown("---")
+        
+        render_result_summary(result_object)
+        render_floor_plan_preview(design_key, full_response)
+        
+        with st.expander("📋 View Result", expanded=False):
+            render_result_viewer(result_object)
+    else:
+        # For other statuses, show the full response
+        st.markdown("### Final Response:")
+        st.json(full_response)
+    
+    # Add "Start New Design" button after showing result
+    st.markdown("---")
+    if st.button("🔄 Start New Design", type="primary", use_container_width=True, key="start_new_design"):
+        # Back to an empty form; the whole page reruns, not just this fragment
+        session.reset()
+        st.session_state.viewer_path = []
+        st.session_state.viewer_page = 0
+        st.query_params.clear()
+        st.rerun()
 
 # Initialize session state
 if "polling_active" not in st.session_state:
     st.session_state.polling_active = False
 if "location_path" not in st.session_state:
     st.session_state.location_path = None
-if "request_id" not in st.session_state:
-    st.session_state.request_id = None
 if "last_poll_time" not in st.session_state:
     st.session_state.last_poll_time = None
-if "poll_interval" not in st.session_state:
-    st.session_state.poll_interval = 10  # 10 seconds
-if "request_in_progress" not in st.session_state:
-    st.session_state.request_in_progress = False
-if "pending_request" not in st.session_state:
-    st.session_state.pending_request = None
-if "last_request_result" not in st.session_state:
-    st.session_state.last_request_result = None
-if "showing_result" not in st.session_state:
-    st.session_state.showing_result = False
-
-# Clear previous request result if a new request is in progress or pending
-# This prevents old buttons from showing when a new request starts
-if st.session_state.request_in_progress or st.session_state.pending_request:
-    st.session_state.last_request_result = None
+session = get_design_session()
 
 # Check query parameters to see if we're in progress view
 query_params = st.query_params
@@ -512,6 +800,22 @@ if "progress" in query_params:
     else:
         is_progress_view = progress_value == "true"
 
+# Check if batch parameter exists
+is_batch_view = query_params.get("batch") == "true"
+is_metrics_view = query_params.get("metrics") == "true"
+is_jobs_view = query_params.get("jobs") == "true"
+
+get_metrics_server()
+get_callback_server()
+get_recovery_report()
+SCRIPT_RUNS.inc(
+    view="batch" if is_batch_view
+    else "metrics" if is_metrics_view
+    else "jobs" if is_jobs_view
+    else "progress" if is_progress_view
+    else "main"
+)
+
 # Get request_id from URL
 if "request_id" in query_params:
     request_id_value = query_params.get("request_id")
@@ -527,8 +831,174 @@ if is_progress_view and request_id_from_url:
         st.session_state.location_path = f"/api/v1/ai-auto-design-result?request_id={request_id_from_url}"
     if not st.session_state.polling_active:
         st.session_state.polling_active = True
-    if st.session_state.last_poll_time is None:
-        st.session_state.last_poll_time = 0  # Reset to trigger immediate poll
+
+# A submission this session doesn't know about (after a reload, or a restart of the app) is followed again
+submission_from_url = query_params.get("submission")
+if submission_from_url and session.phase == FORM:
+    resumed_job = get_submission_queue().get(submission_from_url)
+    if resumed_job is not None and resumed_job.get("parameters"):
+        session.submit(dict(resumed_job["parameters"], reuse=False))
+        session.queued(submission_from_url)
+    else:
+        st.query_params.pop("submission", None)
+
+# Batch page - submit many designs from a CSV/JSONL file and track them together
+if is_batch_view:
+    # Only needed on this page, so imported on first use
+    from batch import BATCH_CONCURRENCY, BatchRun, load_jobs
+    from sweep import SWEEP_SUBMIT_RATE, expand_range, generate_sweep, item_subsets, start_sweep
+    
+    st.markdown('<h1 class="main-header">🏠 AI Auto Design</h1>', unsafe_allow_html=True)
+    st.markdown("---")
+    st.markdown('<div class="section-header">📦 Batch Designs</div>', unsafe_allow_html=True)
+    st.markdown(
+        "Upload a CSV or JSONL file with one design per row. Columns: `appliances`, `plumbing`, "
+        "`cabinets` (separate multiple values with `;`), `worktop`, `layout`, `width`, `depth`."
+    )
+    
+    if "batch_run" not in st.session_state:
+        st.session_state.batch_run = None
+    
+    file_tab, sweep_tab = st.tabs(["📄 Upload File", "🧮 Parameter Sweep"])
+    
+    with file_tab:
+        batch_file = st.file_uploader("Batch file", type=["csv", "jsonl"], label_visibility="collapsed")
+        concurrency = st.slider("Concurrent submissions", min_value=1, max_value=16, value=BATCH_CONCURRENCY)
+        
+        if st.button("🚀 Submit Batch", type="primary", use_container_width=True, key="submit_batch", disabled=batch_file is None):
+            file_format = "jsonl" if batch_file.name.lower().endswith(".jsonl") else "csv"
+            try:
+                jobs = load_jobs(batch_file.getvalue().decode("utf-8"), file_format)
+            except (ValueError, KeyError) as e:
+                st.error(f"❌ Could not read batch file: {e}")
+                jobs = []
+            invalid_jobs = [(index, errors) for index, errors in enumerate(map(validate_job, jobs)) if errors]
+            if invalid_jobs:
+                st.warning(
+                    f"⚠️ {len(invalid_jobs)} of {len(jobs)} rows can't be generated and won't be submitted:\n"
+                    + "\n".join(f"- Row {index + 1}: {'; '.join(errors)}" for index, errors in invalid_jobs[:10])
+                )
+            if jobs:
+                batch_run = BatchRun(
+                    jobs,
+                    get_http_client(),
+                    concurrency,
+                    get_polling_policy(),
+                    submission_cache=get_submission_cache(),
+                    job_registry=get_job_registry()
+                )
+                batch_run.start()
+                st.session_state.batch_run = batch_run
+    
+    with sweep_tab:
+        sweep_col1, sweep_col2 = st.columns([1, 1])
+        with sweep_col1:
+            sweep_widths = st.slider("Width range (mm)", min_value=3500, max_value=6000, value=(4000, 5000), step=100)
+            sweep_depths = st.slider("Depth range (mm)", min_value=3500, max_value=6000, value=(4000, 4000), step=100)
+            sweep_step = st.number_input("Dimension step (mm)", min_value=100, max_value=2500, value=500, step=100)
+        with sweep_col2:
+            sweep_appliances = st.multiselect(
+                "Candidate appliances",
+                options=["cooktop", "refrigerator", "oven", "range", "dishwasher"],
+                default=["cooktop", "refrigerator", "dishwasher"]
+            )
+            sweep_min_appliances = st.number_input("Minimum appliances per design", min_value=1, max_value=5, value=2)
+            sweep_cabinets = st.multiselect(
+                "Candidate cabinets",
+                options=["roof", "base", "tall"],
+                default=["roof", "base", "tall"]
+            )
+            sweep_min_cabinets = st.number_input("Minimum cabinets per design", min_value=1, max_value=3, value=3)
+        
+        sweep = generate_sweep(
+            expand_range(sweep_widths[0], sweep_widths[1], sweep_step),
+            expand_range(sweep_depths[0], sweep_depths[1], sweep_step),
+            item_subsets(sweep_appliances, sweep_min_appliances),
+            item_subsets(sweep_cabinets, sweep_min_cabinets)
+        )
+        st.caption(f"{len(sweep['jobs'])} designs ({sweep['duplicates']} duplicates and {sweep['infeasible']} that don't fit removed)")
+        
+        rate_col1, rate_col2 = st.columns([1, 1])
+        with rate_col1:
+            sweep_concurrency = st.slider("Concurrent submissions", min_value=1, max_value=16, value=BATCH_CONCURRENCY, key="sweep_concurrency")
+        with rate_col2:
+            sweep_rate = st.slider("Submissions per second", min_value=0.1, max_value=10.0, value=SWEEP_SUBMIT_RATE, step=0.1)
+        
+        if st.button("🚀 Run Sweep", type="primary", use_container_width=True, key="run_sweep", disabled=not sweep["jobs"]):
+            try:
+                st.session_state.batch_run = start_sweep(
+                    sweep["jobs"],
+                    get_http_client(),
+                    sweep_concurrency,
+                    sweep_rate,
+                    get_polling_policy(),
+                    get_submission_cache(),
+                    get_job_registry()
+                )
+            except ValueError as e:
+                st.error(f"❌ {e}")
+    
+    if st.session_state.batch_run is not None:
+        render_batch_dashboard(st.session_state.batch_run)
+    
+    st.markdown("---")
+    if st.button("← Back to Main Page", key="batch_back_to_main"):
+        st.query_params.clear()
+        st.rerun()
+    
+    st.stop()
+
+# Metrics page - latency and throughput of the submit/poll lifecycle in this process
+if is_metrics_view:
+    st.markdown('<h1 class="main-header">🏠 AI Auto Design</h1>', unsafe_allow_html=True)
+    st.markdown("---")
+    st.markdown('<div class="section-header">📈 Metrics</div>', unsafe_allow_html=True)
+    
+    metric_rows = []
+    for metric in REGISTRY.metrics():
+        if not isinstance(metric, Histogram):
+            continue
+        for label_values, sample in sorted(metric.samples().items()):
+            labels = dict(zip(metric.label_names, label_values))
+            p50 = metric.quantile(0.5, **labels)
+            p95 = metric.quantile(0.95, **labels)
+            metric_rows.append({
+                "Metric": metric.name,
+                "Labels": ", ".join(f"{name}={value}" for name, value in labels.items()),
+                "Count": sample["count"],
+                "Mean": round(sample["sum"] / sample["count"], 3) if sample["count"] else None,
+                "p50": round(p50, 3) if p50 is not None else None,
+                "p95": round(p95, 3) if p95 is not None else None
+            })
+    if metric_rows:
+        st.dataframe(metric_rows, use_container_width=True, hide_index=True)
+    else:
+        st.info("No requests recorded yet.")
+    
+    with st.expander("Prometheus text"):
+        st.code(REGISTRY.render_prometheus(), language=None)
+    
+    st.markdown("---")
+    if st.button("← Back to Main Page", key="metrics_back_to_main"):
+        st.query_params.clear()
+        st.rerun()
+    
+    st.stop()
+
+# Jobs page - every request submitted from this deployment, including ones from closed tabs
+if is_jobs_view:
+    st.markdown('<h1 class="main-header">🏠 AI Auto Design</h1>', unsafe_allow_html=True)
+    st.markdown("---")
+    st.markdown('<div class="section-header">📋 Jobs</div>', unsafe_allow_html=True)
+    
+    render_job_dashboard()
+    
+    st.markdown("---")
+    if st.button("← Back to Main Page", key="jobs_back_to_main"):
+        st.query_params.clear()
+        st.rerun()
+    
+    st.stop()
 
 # Check if we should show progress page (separate view)
 # Show progress view if progress=true in URL, even if location_path needs to be set
@@ -552,64 +1022,21 @@ if is_progress_view:
             </div>
         """, unsafe_allow_html=True)
         
-        # Simple polling - check if we should poll now
-        current_time = time.time()
-        should_poll = False
-        
-        # Initialize last_poll_time if needed
-        if st.session_state.last_poll_time is None:
-            st.session_state.last_poll_time = 0
-        
-        # Check if it's time to poll (first time or after interval)
-        if st.session_state.last_poll_time == 0:
-            should_poll = True
-        else:
-            time_since_last_poll = current_time - st.session_state.last_poll_time
-            if time_since_last_poll >= st.session_state.poll_interval:
-                should_poll = True
+        # Polling happens on the shared background poller; this view only reads it
+        request_key = (
+            request_id_from_url
+            or extract_request_id(st.session_state.location_path)
+            or st.session_state.location_path
+        )
+        # Completed designs are answered straight from the local result store
+        stored_result = get_result_store().get(request_key)
+        if stored_result is not None:
+            st.session_state.polling_active = False
+            session.show_result(stored_result, request_key)
+            st.query_params.clear()
+            st.rerun()
         
-        if should_poll:
-            with st.spinner("🔄 Checking status..."):
-                success, result = poll_status(st.session_state.location_path)
-                st.session_state.last_poll_time = current_time
-                
-                if success:
-                    # Check if codeMajor is still processing
-                    code_major = result.get("codeMajor", "unknown")
-                    
-                    if code_major != "processing":
-                        # Status changed, stop polling and show result
-                        st.session_state.polling_active = False
-                        st.session_state.status_result = result
-                        st.session_state.status = code_major
-                        # Clear query params to show result on main page
-                        st.query_params.clear()
-                        st.rerun()
-                    else:
-                        # Still processing, show status
-                        st.info(f"🔄 Status: {code_major}. It'll take about 3 minutes to generate your layout. ")
-                else:
-                    st.error(f"❌ Error polling status: {result.get('error', 'Unknown error')}")
-                    # Stop polling on error
-                    st.session_state.polling_active = False
-        
-        # If still polling, wait and rerun after interval
-        if st.session_state.polling_active:
-            # Calculate time remaining
-            if st.session_state.last_poll_time and st.session_state.last_poll_time > 0:
-                time_elapsed = time.time() - st.session_state.last_poll_time
-                time_remaining = max(0, st.session_state.poll_interval - time_elapsed)
-            else:
-                time_remaining = st.session_state.poll_interval
-            
-            if time_remaining > 0:
-
-                # Wait for the full remaining time before next poll
-                time.sleep(time_remaining)
-                st.rerun()
-            else:
-                # Time to poll again immediately
-                st.rerun()
+        render_poll_status(request_key, st.session_state.location_path)
         
         # Add a button to go back to main page
         st.markdown("---")
@@ -622,488 +1049,116 @@ if is_progress_view:
         # Stop here - don't show main form when in progress view
         st.stop()
 
-# Main page - only shown when not polling
-else:
-    # Check if we just finished polling and show result
-    if "status_result" in st.session_state and "status" in st.session_state:
-        code_major = st.session_state.status
-        full_response = st.session_state.status_result
-        
-        # Only show if codeMajor is not "processing" (polling has stopped)
-        if code_major != "processing":
-            # Set flag to indicate we're showing a result
-            st.session_state.showing_result = True
-            
-            # If codeMajor is "success", show the result object
-            if code_major == "success":
-                st.success(f"✅ Kitchen Design Generated Successfully!")
-                result_object = full_response.get("result", {})
-                
-                # Instructions section for viewing results in SFx Tool
-                st.info("""
-                📖 **How to View Your Design in SFx Tool**
-                
-                Follow these steps to view your generated design:
-                
-                **Step 1:** Open the SFx Tool
-                - Click here: [**SFx Tool**](https://planner.cyncly-idealspaces.com/us/design/Draft?partnership=isdemositena)
-                
-                **Step 2:** Open the Browser Console
-                You can open the console using one of these methods:
-                
-                **For Windows:**
-                - Press `F12` key, OR
-                - Press `Ctrl + Shift + J` (Chrome/Edge), OR
-                - Press `Ctrl + Shift + K` (Firefox), OR
-                - Right-click anywhere on the page → Select **"Inspect"** → Click the **"Console"** tab
-                
-                **For Mac:**
-                - Press `Cmd + Option + J` (Chrome/Edge), OR
-                - Press `Cmd + Option + K` (Firefox), OR
-                - Right-click anywhere on the page → Select **"Inspect"** → Click the **"Console"** tab
-                
-                **Step 3:** Copy the command below and paste it in the console
-                """)
-                
-                # Generate the command with the result object
-                # Format the result object as a JavaScript object literal (JSON is valid JavaScript)
-                result_object_js = json.dumps(result_object)
-                command = f'commands.environment.loadCDFModel(JSON.stringify({result_object_js}))'
-                
-                st.code(command, language="javascript")
-                
-                st.info("""
-                **Step 4:** Execute the command
-                - After pasting the command in the console, press `Enter`
-                - Your design will be loaded and displayed in the SFx Tool
-                
-                **Note:** Make sure you've copied the entire command including the `commands.environment.loadCDFModel(JSON.stringify(...))` part with the result object.
-                """)
-                
-                st.markdown("---")
-                
-                with st.expander("📋 View Result", expanded=True):
-                    st.json(result_object)
-            else:
-                # For other statuses, show the full response
-                st.markdown("### Final Response:")
-                st.json(full_response)
-            
-            # Add "Start New Design" button after showing result
-            st.markdown("---")
-            if st.button("🔄 Start New Design", type="primary", use_container_width=True, key="start_new_design"):
-                # Clear result state and set showing_result to False, then rerun - form will appear
-                st.session_state.showing_result = False
-                if "status_result" in st.session_state:
-                    del st.session_state.status_result
-                if "status" in st.session_state:
-                    del st.session_state.status
-                st.query_params.clear()
-                st.rerun()
-    
-    # Main UI - only show if not displaying a result
-    if not st.session_state.showing_result:
-        st.markdown('<h1 class="main-header">🏠 AI Auto Design</h1>', unsafe_allow_html=True)
-        st.markdown("---")
+# Main page - one view per phase of the design session
+elif session.phase == RESULT:
+    render_result_view()
 
-        # Sidebar for additional info
-        with st.sidebar:
-            st.header("ℹ️ About")
-            st.markdown("""
-            This application allows you to design your kitchen space by selecting:
-            - **Appliances**: Choose from various kitchen appliances
-            - **Plumbing Fixtures**: Select plumbing fixtures like sinks
-            - **Cabinets**: Select cabinet types (wall/base/tall)
-            - **Worktops**: Pick your preferred worktop material
-            
-            Click **Build** to generate your design!
-            """)
-            st.markdown("---")
-            st.markdown("**API Endpoint:**")
-            st.code(API_ENDPOINT, language=None)
+else:
+    st.markdown('<h1 class="main-header">🏠 AI Auto Design</h1>', unsafe_allow_html=True)
+    st.markdown("---")
 
-        # Layout Type Selection - Clean and simple design
-        st.markdown('<div class="section-header">📐 Layout Type</div>', unsafe_allow_html=True)
+    # Sidebar for additional info
+    with st.sidebar:
+        st.header("ℹ️ About")
+        st.markdown("""
+        This application allows you to design your kitchen space by selecting:
+        - **Appliances**: Choose from various kitchen appliances
+        - **Plumbing Fixtures**: Select plumbing fixtures like sinks
+        - **Cabinets**: Select cabinet types (wall/base/tall)
+        - **Worktops**: Pick your preferred worktop material
         
-        # Initialize layout type in session state
-        if "selected_layout_type" not in st.session_state:
-            st.session_state.selected_layout_type = "L-Shaped"
-
-        # Simple visual cards with clickable buttons
-        layout_col1, layout_col2, layout_col3 = st.columns([1, 1, 1])
-
-        with layout_col1:
-            is_selected = st.session_state.selected_layout_type == "L-Shaped"
-            border_color = "#667eea" if is_selected else "#e2e8f0"
-            bg_color = "rgba(102, 126, 234, 0.1)" if is_selected else "white"
-            text_color = "#667eea" if is_selected else "#2d3748"
-            border_width = "3px" if is_selected else "2px"
-            
-            st.markdown(f"""
-            <div style="padding: 2rem 1rem; text-align: center; border: {border_width} solid {border_color}; border-radius: 10px; background: {bg_color}; margin-bottom: 0.5rem; height: 150px; display: flex; flex-direction: column; justify-content: center; align-items: center; box-sizing: border-box;">
-                <div style="font-size: 3rem; margin-bottom: 0.5rem; font-weight: bold; color: {text_color};">L</div>
-                <div style="font-size: 1rem; font-weight: 600; color: {text_color};">L-Shaped</div>
-                <div style="font-size: 0.75rem; color: transparent; margin-top: 0.5rem; height: 1.2em;">Placeholder</div>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            if st.button("✓ Select", key="layout_l", use_container_width=True, type="primary" if is_selected else "secondary"):
-                st.session_state.selected_layout_type = "L-Shaped"
-                st.rerun()
-
-        with layout_col2:
-            st.markdown("""
-            <div style="padding: 2rem 1rem; text-align: center; border: 2px solid #e2e8f0; border-radius: 10px; background: #f7fafc; margin-bottom: 0.5rem; opacity: 0.6; height: 150px; display: flex; flex-direction: column; justify-content: center; align-items: center; box-sizing: border-box;">
-                <div style="font-size: 3rem; margin-bottom: 0.5rem; font-weight: bold; color: #a0aec0;">U</div>
-                <div style="font-size: 1rem; font-weight: 600; color: #a0aec0;">U-Shaped</div>
-                <div style="font-size: 0.75rem; color: #a0aec0; margin-top: 0.5rem;">Coming Soon</div>
-            </div>
-            """, unsafe_allow_html=True)
-            st.button("Select", key="layout_u", use_container_width=True, disabled=True)
-
-        with layout_col3:
-            st.markdown("""
-            <div style="padding: 2rem 1rem; text-align: center; border: 2px solid #e2e8f0; border-radius: 10px; background: #f7fafc; margin-bottom: 0.5rem; opacity: 0.6; height: 150px; display: flex; flex-direction: column; justify-content: center; align-items: center; box-sizing: border-box;">
-                <div style="font-size: 3rem; margin-bottom: 0.5rem; font-weight: bold; color: #a0aec0;">I</div>
-                <div style="font-size: 1rem; font-weight: 600; color: #a0aec0;">I-Shaped</div>
-                <div style="font-size: 0.75rem; color: #a0aec0; margin-top: 0.5rem;">Coming Soon</div>
-            </div>
-            """, unsafe_allow_html=True)
-            st.button("Select", key="layout_i", use_container_width=True, disabled=True)
-
+        Click **Build** to generate your design!
+        """)
         st.markdown("---")
-
-        # Room Dimensions Section
-        st.markdown('<div class="section-header">📏 Room Dimensions</div>', unsafe_allow_html=True)
-        dim_col1, dim_col2 = st.columns([1, 1])
+        st.markdown("**API Endpoint:**")
+        st.code(API_ENDPOINT, language=None)
+        st.markdown("[📋 Jobs](?jobs=true) · [📦 Batch mode](?batch=true) · [📈 Metrics](?metrics=true)")
         
-        with dim_col1:
-            width = st.number_input(
-                "Width (mm):",
-                min_value=3500,
-                max_value=6000,
-                value=4000,
-                step=100,
-                help="Width of the room (3500-6000 mm)"
-            )
+        # Connection pool statistics for the shared HTTP client
+        pool_stats = get_http_client().pool_stats()
+        st.markdown("**Connection Pool:**")
+        st.caption(
+            f"Hits: {pool_stats['hits']} · Misses: {pool_stats['misses']} · "
+            f"Requests: {pool_stats['requests']}"
+        )
         
-        with dim_col2:
-            depth = st.number_input(
-                "Depth (mm):",
-                min_value=3500,
-                max_value=6000,
-                value=4000,
-                step=100,
-                help="Depth of the room (3500-6000 mm)"
-            )
-
-        st.markdown("---")
-
-        # Main content area
-        col1, col2 = st.columns([1, 1])
-
-        with col1:
-            st.markdown('<div class="section-header">🔌 Appliances</div>', unsafe_allow_html=True)
-            st.markdown("Select the appliances you want in your kitchen:")
-            
-            appliance_options = {
-                "Cooktop": "cooktop",
-                "Refrigerator": "refrigerator",
-                "Oven": "oven",
-                "Range": "range",
-                "Dishwasher": "dishwasher"
-            }
-            
-            selected_appliance_labels = st.multiselect(
-                "Choose appliances:",
-                options=list(appliance_options.keys()),
-                default=["Cooktop", "Refrigerator", "Dishwasher"],
-                label_visibility="collapsed"
-            )
-            
-            selected_appliances = [appliance_options[label] for label in selected_appliance_labels]
-
-        with col2:
-            st.markdown('<div class="section-header">🚰 Plumbing Fixtures</div>', unsafe_allow_html=True)
-            st.markdown("Select plumbing fixtures:")
-            
-            plumbing_options = {
-                "Sink": "sink"
-            }
-            
-            selected_plumbing_labels = st.multiselect(
-                "Choose plumbing fixtures:",
-                options=list(plumbing_options.keys()),
-                default=["Sink"],
-                label_visibility="collapsed"
-            )
-            
-            selected_plumbing_fixtures = [plumbing_options[label] for label in selected_plumbing_labels]
-
-        # Cabinets and Worktop section
-        col3, col4 = st.columns([1, 1])
-
-        with col3:
-            st.markdown('<div class="section-header">🗄️ Cabinets</div>', unsafe_allow_html=True)
-            st.markdown("Select cabinet types:")
-            
-            cabinet_options = {
-                "Wall Cabinet": "roof",
-                "Base Cabinet": "base",
-                "Tall Cabinet": "tall"
-            }
-            
-            selected_cabinet_labels = st.multiselect(
-                "Choose cabinet types:",
-                options=list(cabinet_options.keys()),
-                default=["Wall Cabinet", "Base Cabinet", "Tall Cabinet"],
-                label_visibility="collapsed"
-            )
-            
-            selected_cabinets = [cabinet_options[label] for label in selected_cabinet_labels]
-
-        with col4:
-            # Worktop selection
-            st.markdown('<div class="section-header">🪨 Worktop Material</div>', unsafe_allow_html=True)
-            st.markdown("Choose your worktop material:")
-            worktop_material = st.selectbox(
-                "Choose your worktop material:",
-                ["Granite"],
-                index=0,
-                label_visibility="collapsed"
-            )
-
-        # Build button - hide during request, show otherwise
-        st.markdown("---")
-        if not st.session_state.request_in_progress:
-            build_button = st.button(
-                "🚀 Build Design", 
-                type="primary", 
-                use_container_width=True,
-                key="build_design_button"
-            )
-            # Clear previous request result immediately if button was clicked
-            # This prevents old buttons from showing before rerun
-            if build_button and st.session_state.last_request_result:
-                st.session_state.last_request_result = None
-        else:
-            # Show a message instead of the button when request is in progress
-            st.info("🔄 Preparing your personalized layout...")
-            build_button = False
-
-        # Redisplay last request result if available (after rerun)
-        # CRITICAL: Only show if NO request is in progress and NO pending request exists
-        # This prevents old buttons from showing when a new request starts
+        # Shared circuit breaker in front of the API
+        breaker_stats = get_http_client().breaker.stats()
+        st.markdown("**API Circuit:**")
+        st.caption(
+            f"State: {breaker_stats['state']} · Opened: {breaker_stats['opened']}"
+            + (f" · Retry in {breaker_stats['retry_in']:.0f}s" if breaker_stats["retry_in"] else "")
+        )
         
-        # If a request is in progress, explicitly remove any previous button HTML using JavaScript
-        if st.session_state.request_in_progress or st.session_state.pending_request:
-            # Use JavaScript to explicitly remove any previous progress button divs
-            st.markdown("""
-            <script>
-            (function() {
-                function removeProgressButtons() {
-                    // Remove any progress button containers by ID
-                    const buttons = document.querySelectorAll('[id^="progress_button_"]');
-                    buttons.forEach(btn => {
-                        if (btn && btn.parentNode) {
-                            btn.parentNode.removeChild(btn);
-                        }
-                    });
-                    // Also remove by content matching (fallback)
-                    const allDivs = document.querySelectorAll('div');
-                    allDivs.forEach(div => {
-                        if (div.innerHTML && div.innerHTML.includes('Open Progress Page') && 
-                            div.innerHTML.includes('Click below to open the progress page')) {
-                            const bgColor = window.getComputedStyle(div).backgroundColor;
-                            if (bgColor === 'rgb(30, 58, 95)' || bgColor === '#1e3a5f' || 
-                                div.style.backgroundColor === 'rgb(30, 58, 95)' || 
-                                div.style.backgroundColor === '#1e3a5f') {
-                                if (div.parentNode) {
-                                    div.parentNode.removeChild(div);
-                                }
-                            }
-                        }
-                    });
-                }
-                // Run immediately
-                removeProgressButtons();
-                // Also run after a short delay to catch any late-rendered elements
-                setTimeout(removeProgressButtons, 100);
-                setTimeout(removeProgressButtons, 500);
-            })();
-            </script>
-            """, unsafe_allow_html=True)
-        elif st.session_state.last_request_result is not None:
-            result_data = st.session_state.last_request_result
-            if result_data["type"] == "success":
-                if "request_id" in result_data and result_data["request_id"]:
-                    request_id = result_data["request_id"]
-                    progress_url = f"?progress=true&request_id={request_id}" if request_id else "?progress=true"
-                    
-                    st.success(f"✅ Request submitted successfully! **Request ID:** `{request_id}`")
-                    
-                    st.info(f"""
-                    📋 **Important: Please save your Request ID**
-                    
-                    **Your Request ID:** `{request_id}`
-                    
-                    Please **keep this Request ID** with you. In the future, if you want to view your generated design, you can:
-                    
-                    1. Open this application (use the same URL you're using now)
-                    2. Add `?progress=true&request_id={request_id}` to the end of the URL
-                    3. The application will give you a command to visualize your design in SFx Tool
-                    
-                    **Example:** If your current URL is `https://cyncly-ui-vxunrzzf8qbqb2ltgmsio4.streamlit.app`, you would use:
-                    `https://cyncly-ui-vxunrzzf8qbqb2ltgmsio4.streamlit.app?progress=true&request_id={request_id}`
-                    """)
-                    
-                    # Only show button if absolutely no request is in progress
-                    # Final check to ensure we're not processing anything
-                    # Use a unique ID based on request_id so Streamlit can track it
-                    button_id = f"progress_button_{request_id}"
-                    if (not st.session_state.request_in_progress and 
-                        not st.session_state.pending_request and 
-                        st.session_state.last_request_result is not None):
-                        st.markdown(f"""
-                        <div id="{button_id}" style="margin-top: 1rem; padding: 1.5rem; background-color: #1e3a5f; border-radius: 10px; border: 1px solid #667eea;">
-                            <p style="color: #a0aec0; margin-bottom: 1rem; font-size: 1rem;">Click below to open the progress page in a new tab:</p>
-                            <a href="{progress_url}" target="_blank" style="
-                                display: inline-block;
-                                padding: 0.75rem 2rem;
-                                background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
-                                color: white;
-                                text-decoration: none;
-                                border-radius: 10px;
-                                font-weight: 600;
-                                cursor: pointer;
-                            ">🚀 Open Progress Page</a>
-                        </div>
-                        """, unsafe_allow_html=True)
-                    else:
-                        # Explicitly render empty div to clear any previous button
-                        st.markdown(f'<div id="{button_id}" style="display: none;"></div>', unsafe_allow_html=True)
-                elif "result" in result_data:
-                    st.success("✅ Design built successfully!")
-                    st.markdown("### Response:")
-                    st.json(result_data["result"])
-            elif result_data["type"] == "error":
-                st.error(f"❌ Error: {result_data.get('error', 'Unknown error')}")
-            
-            # Clear the stored result after displaying (optional - comment out if you want it to persist)
-            # st.session_state.last_request_result = None
+        # Shared status cache statistics
+        cache_stats = get_status_cache().stats()
+        st.markdown("**Status Cache:**")
+        st.caption(
+            f"Hits: {cache_stats['hits']} · Misses: {cache_stats['misses']} · "
+            f"Merged: {cache_stats['merged']} · Shared: {cache_stats['shared']} · Entries: {cache_stats['entries']}"
+        )
+        st.caption(f"State: {STATE_BACKEND} · Replica: {REPLICA_ID}")
+        
+        # Persistent result store statistics
+        store_stats = get_result_store().stats()
+        st.markdown("**Result Store:**")
+        st.caption(f"Designs: {store_stats['entries']} · Size: {store_stats['bytes'] / (1024 * 1024):.1f} MB")
+        
+        # What the journal replay at startup picked up
+        recovery = get_recovery_report()
+        st.markdown("**Recovery:**")
+        st.caption(
+            f"Resubmitted: {recovery['resubmitted']} · Reattached: {recovery['reattached']} · "
+            f"Polls resumed: {recovery['polls_resumed']} · Took {recovery['seconds'] * 1000:.0f} ms"
+        )
 
-        # Handle button click - store request data and set flag
-        if build_button:
-            if not selected_appliances:
-                st.error("⚠️ Please select at least one appliance.")
-            elif not selected_plumbing_fixtures:
-                st.error("⚠️ Please select at least one plumbing fixture.")
-            elif not selected_cabinets:
-                st.error("⚠️ Please select at least one cabinet type.")
-            else:
-                # Store request data and set flag, then rerun to hide button immediately
-                st.session_state.request_in_progress = True
-                st.session_state.last_request_result = None  # Clear previous request result to hide old buttons
-                st.session_state.last_request_id = None
-                st.session_state.pending_request = {
-                    "appliances": selected_appliances,
-                    "cabinets": selected_cabinets,
-                    "worktop": worktop_material,
-                    "plumbing": selected_plumbing_fixtures,
-                    "layout": st.session_state.selected_layout_type,
-                    "width": width,
-                    "depth": depth
-                }
-                st.rerun()
+    render_design_form()
+    
+    if session.phase in (FORM, SUBMITTED) and session.notice is not None:
+        render_submission_notice(session.notice)
 
-# Process the pending request (runs after rerun when button is hidden)
-if st.session_state.pending_request:
-    req_data = st.session_state.pending_request
+# Submit the pending selections (runs after the rerun that hid the Build button)
+if session.phase == SUBMITTING:
+    req_data = session.pending
     
-    with st.spinner("🔄 Building your design... This may take a moment."):
-        request_body = build_request_body(
-            req_data["appliances"],
-            req_data["cabinets"],
-            req_data["worktop"],
-            req_data["plumbing"],
-            req_data["layout"],
-            req_data.get("width", 4000),
-            req_data.get("depth", 4000)
-        )
+    request_body = build_request_body(
+        req_data["appliances"],
+        req_data["cabinets"],
+        req_data["worktop"],
+        req_data["plumbing"],
+        req_data["layout"],
+        req_data.get("width", 4000),
+        req_data.get("depth", 4000)
+    )
+    
+    if session.submission_id is None:
+        # Skip the generation if an identical request body was already submitted
+        body_hash = request_body_hash(request_body)
+        reuse_state, reuse_entry, reuse_result = None, None, None
+        if req_data.get("reuse", True):
+            reuse_state, reuse_entry, reuse_result = get_submission_cache().lookup(body_hash)
         
-        # Show request preview (optional, can be collapsed)
-        with st.expander("📋 View Request Body"):
-            st.json(request_body)
+        if reuse_state == "completed":
+            # Show the finished design straight away
+            session.show_result(reuse_result, reused_request_id=reuse_entry["request_id"])
+            st.rerun()
+        if reuse_state == "in_flight":
+            # Attach to the identical request that is still generating
+            st.session_state.location_path = reuse_entry["location"]
+            session.accepted(reuse_entry["request_id"], reuse_entry["location"], attached=True)
+            st.rerun()
         
-        success, result, location = send_request(request_body)
+        # Sent on the background queue; this run returns straight away
+        parameters = {key: value for key, value in req_data.items() if key != "reuse"}
+        session.queued(get_submission_queue().enqueue(request_body, body_hash, parameters))
+        # In the URL, so a reload or a restart of the app finds the submission again
+        st.query_params["submission"] = session.submission_id
     
-    if success:
-        # Check if we got a 202 response with location header
-        if location:
-            # Extract request_id from location
-            request_id = None
-            if "request_id=" in location:
-                request_id = location.split("request_id=")[1].split("&")[0]
-                st.session_state.request_id = request_id
-            
-            # Store location_path in session state
-            st.session_state.location_path = location
-            
-            # Store result for redisplay after rerun
-            st.session_state.last_request_result = {
-                "type": "success",
-                "request_id": request_id,
-                "location": location
-            }
-            
-            # Create progress URL with query parameters
-            progress_url = f"?progress=true&request_id={request_id}" if request_id else "?progress=true"
-            
-            # Success message with requestId
-            if request_id:
-                st.success(f"✅ Request submitted successfully! **Request ID:** `{request_id}`")
-                
-                # Important info section for stakeholders
-                st.info(f"""
-                📋 **Important: Please save your Request ID**
-                
-                **Your Request ID:** `{request_id}`
-                
-                Please **keep this Request ID** with you. In the future, if you want to view your generated design, you can:
-                
-                1. Open this application (use the same URL you're using now)
-                2. Add `?progress=true&request_id={request_id}` to the end of the URL
-                3. The application will give you a command to visualize your design in SFx Tool
-                
-                **Example:** If your current URL is `https://cyncly-ui-3mutwu6qv5tpk55tdjsd3r.streamlit.app/`, you would use:
-                `https://cyncly-ui-3mutwu6qv5tpk55tdjsd3r.streamlit.app/?progress=true&request_id={request_id}`
-                """)
-                
-                # Note: The "Open Progress Page" button is shown in the "Redisplay" section
-                # after rerun, not here, to avoid duplicate buttons
-            else:
-                st.success("✅ Request submitted successfully!")
-            
-        else:
-            # Regular success response
-            st.session_state.last_request_result = {
-                "type": "success",
-                "result": result
-            }
-            st.success("✅ Design built successfully!")
-            st.markdown("### Response:")
-            st.json(result)
-    else:
-        st.session_state.last_request_result = {
-            "type": "error",
-            "error": result
-        }
-        st.error(f"❌ Error: {result}")
+    # Show request preview (optional, can be collapsed)
+    with st.expander("📋 View Request Body"):
+        st.json(request_body)
     
-    # Clear pending request and re-enable button after request completes (success or error)
-    st.session_state.pending_request = None
-    st.session_state.request_in_progress = False
-    st.rerun()
+    render_submission_progress(session.submission_id)
 
 # Footer
 st.markdown("---")
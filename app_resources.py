@@ -0,0 +1,183 @@
+"""Process-wide resources and static assets for the Streamlit app.
+
+Streamlit re-executes app.py from the top on every rerun. Everything here is
+imported once per process instead: the @st.cache_resource getters are
+decorated once, the stylesheet is read and minified once, and the layout card
+markup is built once per state.
+"""
+import os
+import re
+from functools import lru_cache
+from http.server import ThreadingHTTPServer
+from typing import Dict, Any, Optional
+
+import streamlit as st
+
+from callbacks import (
+    CALLBACK_FALLBACK_INTERVAL,
+    CALLBACK_SERVER_HOST,
+    CALLBACK_SERVER_PORT,
+    callback_url,
+    start_callback_server
+)
+from design_api import API_POLL_BURST, API_POLL_RATE, API_SUBMIT_BURST, API_SUBMIT_RATE, PooledHTTPClient
+from design_files import DesignFileCache, default_public_url, start_design_file_server
+from floor_plan import FloorPlanCache
+from job_registry import JobRegistry
+from metrics import METRICS_SERVER_HOST, METRICS_SERVER_PORT, REGISTRY, start_metrics_server
+from polling import PollingPolicy, StatusCache, StatusPoller
+from rate_limit import CircuitBreaker, TokenBucket
+from result_store import ResultStore
+from state_backend import STATE_LEASE_TTL, StateBackend, create_state_backend
+from submission_cache import SubmissionCache
+from submission_journal import SubmissionJournal
+from submission_queue import SubmissionQueue
+
+STYLESHEET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "style.css")
+
+# Optional local endpoint serving design files to the SFx Tool console
+DESIGN_FILE_SERVER_PORT = int(os.getenv("DESIGN_FILE_SERVER_PORT", "0"))  # 0 disables the endpoint
+DESIGN_FILE_SERVER_HOST = os.getenv("DESIGN_FILE_SERVER_HOST", "127.0.0.1")
+DESIGN_FILE_PUBLIC_URL = (os.getenv("DESIGN_FILE_PUBLIC_URL") or default_public_url(DESIGN_FILE_SERVER_HOST, DESIGN_FILE_SERVER_PORT)).rstrip("/")  # As the user's browser reaches it; "" offers a download instead
+
+def get_bearer_token() -> str:
+    """Bearer token from Streamlit secrets, falling back to the environment."""
+    try:
+        return st.secrets["BEARER_TOKEN"]
+    except (KeyError, AttributeError):
+        return os.getenv("BEARER_TOKEN", "")
+
+@st.cache_resource
+def get_http_client() -> PooledHTTPClient:
+    """Process-wide HTTP client shared by every session, with one request budget and circuit breaker for all of them."""
+    return PooledHTTPClient(
+        get_bearer_token(),
+        submit_limiter=TokenBucket(API_SUBMIT_RATE, API_SUBMIT_BURST) if API_SUBMIT_RATE > 0 else None,
+        poll_limiter=TokenBucket(API_POLL_RATE, API_POLL_BURST) if API_POLL_RATE > 0 else None,
+        breaker=CircuitBreaker(),
+        callback_url=callback_url() if CALLBACK_SERVER_PORT else None
+    )
+
+@st.cache_resource
+def get_result_store() -> ResultStore:
+    """Process-wide persistent result store."""
+    return ResultStore()
+
+@st.cache_resource
+def get_job_registry() -> JobRegistry:
+    """Process-wide registry of submitted requests."""
+    return JobRegistry()
+
+@st.cache_resource
+def get_design_file_cache() -> DesignFileCache:
+    """Process-wide cache of compressed design files."""
+    return DesignFileCache()
+
+@st.cache_resource
+def get_floor_plan_cache() -> FloorPlanCache:
+    """Process-wide cache of rendered floor plans, with its render worker processes."""
+    return FloorPlanCache()
+
+@st.cache_resource
+def get_design_file_server() -> Optional[ThreadingHTTPServer]:
+    """Local endpoint serving design files, if DESIGN_FILE_SERVER_PORT is set."""
+    if not DESIGN_FILE_SERVER_PORT:
+        return None
+    return start_design_file_server(get_design_file_cache(), DESIGN_FILE_SERVER_HOST, DESIGN_FILE_SERVER_PORT)
+
+@st.cache_resource
+def get_metrics_server() -> Optional[ThreadingHTTPServer]:
+    """Local Prometheus endpoint, if METRICS_SERVER_PORT is set."""
+    if not METRICS_SERVER_PORT:
+        return None
+    return start_metrics_server(REGISTRY, METRICS_SERVER_HOST, METRICS_SERVER_PORT)
+
+@st.cache_resource
+def get_submission_cache() -> SubmissionCache:
+    """Process-wide map of request body hashes to the requests that generated them."""
+    return SubmissionCache(get_result_store())
+
+@st.cache_resource
+def get_state_backend() -> StateBackend:
+    """Status responses and poll leases shared with other app replicas (STATE_BACKEND)."""
+    return create_state_backend()
+
+@st.cache_resource
+def get_status_cache() -> StatusCache:
+    """Process-wide status cache shared by every session, and through the state backend by every replica."""
+    return StatusCache(
+        get_http_client(),
+        get_result_store(),
+        state=get_state_backend(),
+        # The lease must outlast the longest gap between this replica's polls
+        lease_ttl=STATE_LEASE_TTL + (CALLBACK_FALLBACK_INTERVAL if CALLBACK_SERVER_PORT else 0)
+    )
+
+@st.cache_resource
+def get_polling_policy() -> PollingPolicy:
+    """Process-wide polling policy, so completion times are learned across sessions."""
+    return PollingPolicy()
+
+@st.cache_resource
+def get_status_poller() -> StatusPoller:
+    """Process-wide background poller shared by every session."""
+    return StatusPoller(
+        get_status_cache(),
+        get_polling_policy(),
+        job_registry=get_job_registry(),
+        fallback_interval=CALLBACK_FALLBACK_INTERVAL if CALLBACK_SERVER_PORT else None
+    )
+
+@st.cache_resource
+def get_callback_server() -> Optional[ThreadingHTTPServer]:
+    """Local receiver for completion callbacks, if CALLBACK_SERVER_PORT is set."""
+    if not CALLBACK_SERVER_PORT:
+        return None
+    return start_callback_server(get_status_poller(), CALLBACK_SERVER_HOST, CALLBACK_SERVER_PORT, http_client=get_http_client())
+
+@st.cache_resource
+def get_submission_queue() -> SubmissionQueue:
+    """Process-wide background submission queue shared by every session, journalled to survive restarts."""
+    return SubmissionQueue(
+        get_http_client(),
+        policy=get_polling_policy(),
+        submission_cache=get_submission_cache(),
+        job_registry=get_job_registry(),
+        journal=SubmissionJournal()
+    )
+
+@st.cache_resource
+def get_recovery_report() -> Dict[str, Any]:
+    """Resume submissions and polls a previous process left unfinished, once per process."""
+    return get_submission_queue().recover(get_status_poller())
+
+@lru_cache(maxsize=1)
+def page_styles() -> str:
+    """The page stylesheet as a single minified <style> block."""
+    with open(STYLESHEET_PATH, encoding="utf-8") as f:
+        css = f.read()
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};:,>])\s*", r"\1", css)
+    return f"<style>{css.strip()}</style>"
+
+@lru_cache(maxsize=16)
+def layout_card_html(letter: str, label: str, selected: bool = False, enabled: bool = True) -> str:
+    """Markup of one layout type card."""
+    if not enabled:
+        border, background, color, opacity = "2px solid #e2e8f0", "#f7fafc", "#a0aec0", " opacity: 0.6;"
+        caption = f'<div style="font-size: 0.75rem; color: {color}; margin-top: 0.5rem;">Coming Soon</div>'
+    else:
+        border = "3px solid #667eea" if selected else "2px solid #e2e8f0"
+        background = "rgba(102, 126, 234, 0.1)" if selected else "white"
+        color = "#667eea" if selected else "#2d3748"
+        opacity = ""
+        caption = '<div style="font-size: 0.75rem; color: transparent; margin-top: 0.5rem; height: 1.2em;">Placeholder</div>'
+    return (
+        f'<div style="padding: 2rem 1rem; text-align: center; border: {border}; border-radius: 10px; '
+        f'background: {background}; margin-bottom: 0.5rem;{opacity} height: 150px; display: flex; '
+        f'flex-direction: column; justify-content: center; align-items: center; box-sizing: border-box;">'
+        f'<div style="font-size: 3rem; margin-bottom: 0.5rem; font-weight: bold; color: {color};">{letter}</div>'
+        f'<div style="font-size: 1rem; font-weight: 600; color: {color};">{label}</div>'
+        f"{caption}</div>"
+    )
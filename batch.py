@@ -0,0 +1,385 @@
+"""Batch design submission from CSV or JSONL files.
+
+Used by the batch view in the Streamlit app, and headless from the command line:
+
+    python batch.py jobs.csv --concurrency 8 --wait --output results.jsonl
+    python batch.py jobs.csv --validate-only
+
+Each row describes one design with the same fields as the main form:
+appliances, cabinets, plumbing (lists), worktop, layout, width and depth.
+In CSV files list values are separated with ";" (e.g. "cooktop;oven").
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Dict, Any, Optional
+
+from design_api import PooledHTTPClient, build_request_body, send_request, extract_request_id, request_body_hash
+from feasibility import FEASIBILITY_CHECK, screen_request_bodies
+from job_registry import JobRegistry
+from polling import PollingPolicy, StatusCache, StatusPoller
+from rate_limit import TokenBucket
+from request_schema import validate_job, validate_request_body
+from result_store import ResultStore
+from submission_cache import SubmissionCache
+
+# Batch settings
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))  # Submissions in flight at once
+BATCH_LIST_SEPARATOR = ";"
+BATCH_REFRESH_INTERVAL = 5  # Seconds between status refreshes in the command line tool
+
+JOB_DEFAULTS = {
+    "appliances": [],
+    "cabinets": [],
+    "plumbing": [],
+    "worktop": "Granite",
+    "layout": "L-Shaped",
+    "width": 4000,
+    "depth": 4000
+}
+LIST_FIELDS = ("appliances", "cabinets", "plumbing")
+
+# Row statuses that still need polling
+OUTSTANDING_STATUSES = ("submitted", "processing")
+
+def parse_job(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalise one CSV/JSONL row into the pending_request format used by the app."""
+    job = dict(JOB_DEFAULTS)
+    for key, value in row.items():
+        key = (key or "").strip().lower()
+        if key not in JOB_DEFAULTS or value is None or value == "":
+            continue
+        if key in LIST_FIELDS:
+            if isinstance(value, str):
+                value = [item.strip() for item in value.split(BATCH_LIST_SEPARATOR)]
+            job[key] = [str(item).strip().lower() for item in value if str(item).strip()]
+        elif key in ("width", "depth"):
+            job[key] = int(float(value))
+        else:
+            job[key] = str(value).strip()
+    return job
+
+def load_jobs(text: str, file_format: str) -> List[Dict[str, Any]]:
+    """Parse batch file contents. file_format is "csv" or "jsonl"."""
+    if file_format == "csv":
+        rows = list(csv.DictReader(io.StringIO(text)))
+    elif file_format == "jsonl":
+        rows = [json.loads(line) for line in text.splitlines() if line.strip()]
+    else:
+        raise ValueError(f"Unsupported batch file format: {file_format}")
+    return [parse_job(row) for row in rows]
+
+def load_jobs_file(path: str) -> List[Dict[str, Any]]:
+    """Load a batch file, picking the format from its extension."""
+    file_format = "jsonl" if path.lower().endswith((".jsonl", ".ndjson", ".json")) else "csv"
+    with open(path, encoding="utf-8") as f:
+        return load_jobs(f.read(), file_format)
+
+class BatchRun:
+    """Submits a list of jobs concurrently and tracks each resulting request."""
+
+    def __init__(
+        self,
+        jobs: List[Dict[str, Any]],
+        client: PooledHTTPClient,
+        concurrency: int = BATCH_CONCURRENCY,
+        policy: Optional[PollingPolicy] = None,
+        rate_limiter: Optional[TokenBucket] = None,
+        submission_cache: Optional[SubmissionCache] = None,
+        job_registry: Optional[JobRegistry] = None,
+        source: str = "batch"
+    ):
+        self.client = client
+        self.concurrency = max(1, concurrency)
+        self.policy = policy
+        self.rate_limiter = rate_limiter
+        self.submission_cache = submission_cache
+        self.job_registry = job_registry
+        self.source = source
+        self.rows = [
+            {
+                "index": index,
+                "job": job,
+                "status": "queued",
+                "request_id": None,
+                "location": None,
+                "error": None,
+                "submit_seconds": None,
+                "completed_at": None,
+                "result": None,
+                "reused": False
+            }
+            for index, job in enumerate(jobs)
+        ]
+        self.started_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def start(self) -> None:
+        """Queue every job for submission and return immediately."""
+        self.started_at = time.time()
+        self._screen()
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="batch-submit")
+        for row in self.rows:
+            if row["status"] == "queued":
+                self._executor.submit(self._submit, row)
+        self._executor.shutdown(wait=False)
+
+    def _screen(self) -> None:
+        """Mark rows the API would reject, or whose items can't fit the room, as invalid.
+
+        Bodies the API would reject never use upstream capacity. The fit check
+        runs over all schema-valid rows in one vectorised pass.
+        """
+        valid_rows = []
+        valid_bodies = []
+        for row in self.rows:
+            job = row["job"]
+            request_body = build_request_body(
+                job["appliances"],
+                job["cabinets"],
+                job["worktop"],
+                job["plumbing"],
+                job["layout"],
+                job["width"],
+                job["depth"]
+            )
+            errors = validate_request_body(request_body)
+            if errors:
+                self._invalid(row, "; ".join(errors))
+            else:
+                valid_rows.append(row)
+                valid_bodies.append(request_body)
+        if FEASIBILITY_CHECK:
+            for row, error in zip(valid_rows, screen_request_bodies(valid_bodies)):
+                if error:
+                    self._invalid(row, error)
+
+    def _invalid(self, row: Dict[str, Any], error: str) -> None:
+        with self._lock:
+            row["status"] = "invalid"
+            row["error"] = error
+            row["completed_at"] = time.time()
+
+    def wait_submitted(self) -> None:
+        """Block until every job has been submitted (or failed to submit)."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def _submit(self, row: Dict[str, Any]) -> None:
+        with self._lock:
+            row["status"] = "submitting"
+        job = row["job"]
+        request_body = build_request_body(
+            job["appliances"],
+            job["cabinets"],
+            job["worktop"],
+            job["plumbing"],
+            job["layout"],
+            job["width"],
+            job["depth"]
+        )
+        
+        # Identical designs that already finished or are generating are not submitted again
+        body_hash = request_body_hash(request_body)
+        if self.submission_cache is not None:
+            state, entry, stored = self.submission_cache.lookup(body_hash)
+            if state is not None:
+                with self._lock:
+                    row["request_id"] = entry["request_id"]
+                    row["location"] = entry["location"]
+                    row["submit_seconds"] = 0.0
+                    row["reused"] = True
+                    if state == "completed":
+                        row["status"] = "success"
+                        row["result"] = stored
+                        row["completed_at"] = time.time()
+                    else:
+                        row["status"] = "submitted"
+                return
+        
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            submit_start = time.time()
+            try:
+                success, result, location = send_request(request_body, self.client)
+            except Exception as e:
+                success, result, location = False, str(e), None
+            if success or not getattr(result, "deferred", False):
+                break
+            # Held back by the client's rate limit or circuit breaker; wait and try again
+            with self._lock:
+                row["status"] = "deferred"
+            time.sleep(result.retry_after)
+
+        with self._lock:
+            row["submit_seconds"] = time.time() - submit_start
+            if not success:
+                row["status"] = "error"
+                row["error"] = result
+            elif location:
+                row["status"] = "submitted"
+                row["location"] = location
+                row["request_id"] = extract_request_id(location)
+            else:
+                # Synchronous success without a status location
+                row["status"] = "success"
+                row["result"] = result
+                row["completed_at"] = time.time()
+        if row["request_id"] and self.policy is not None:
+            self.policy.note_submitted(row["request_id"], submit_start)
+        if row["request_id"] and self.submission_cache is not None:
+            self.submission_cache.add(body_hash, row["request_id"], row["location"])
+        if row["request_id"] and self.job_registry is not None:
+            self.job_registry.record_submission(row["request_id"], row["location"], job, body_hash, self.source, submit_start)
+
+    def refresh(self, poller: StatusPoller) -> None:
+        """Update outstanding rows from the shared poller (one tracked entry per request_id)."""
+        for row in self.snapshot():
+            if row["status"] not in OUTSTANDING_STATUSES:
+                continue
+            request_key = row["request_id"] or row["location"]
+            poller.track(request_key, row["location"])
+            status = poller.get(request_key)
+            if status is None or (status["result"] is None and status["error"] is None):
+                continue
+            with self._lock:
+                target = self.rows[row["index"]]
+                if status["error"] is not None:
+                    target["status"] = "error"
+                    target["error"] = status["error"]
+                    target["completed_at"] = time.time()
+                    continue
+                code_major = status["result"].get("codeMajor", "unknown")
+                target["status"] = code_major
+                if code_major != "processing":
+                    target["result"] = status["result"]
+                    target["completed_at"] = time.time()
+
+    def iter_completed(self, poller: StatusPoller, refresh_interval: float = BATCH_REFRESH_INTERVAL) -> Iterator[Dict[str, Any]]:
+        """Yield each row once, as soon as it reaches a final status."""
+        reported = set()
+        while True:
+            self.refresh(poller)
+            finished = self.is_finished()
+            for row in self.snapshot():
+                if row["index"] in reported:
+                    continue
+                if row["completed_at"] is not None or row["status"] == "error":
+                    reported.add(row["index"])
+                    yield row
+            if finished:
+                return
+            time.sleep(refresh_interval)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(row) for row in self.rows]
+
+    def is_finished(self) -> bool:
+        with self._lock:
+            return all(
+                row["status"] not in OUTSTANDING_STATUSES + ("queued", "submitting", "deferred")
+                for row in self.rows
+            )
+
+    def summary(self) -> Dict[str, Any]:
+        """Counts per status and overall throughput."""
+        rows = self.snapshot()
+        elapsed = time.time() - self.started_at if self.started_at else 0.0
+        submitted = [row for row in rows if row["request_id"] or row["location"]]
+        completed = [row for row in rows if row["status"] == "success"]
+        failed = [
+            row for row in rows
+            if row["status"] == "error" or (row["completed_at"] is not None and row["status"] != "success")
+        ]
+        return {
+            "total": len(rows),
+            "submitted": len(submitted),
+            "completed": len(completed),
+            "failed": len(failed),
+            "elapsed_seconds": elapsed,
+            "submissions_per_second": len(submitted) / elapsed if elapsed > 0 else 0.0,
+            "completions_per_minute": len(completed) * 60 / elapsed if elapsed > 0 else 0.0
+        }
+
+def describe_job(job: Dict[str, Any]) -> str:
+    """Short one-line description of a job's parameters."""
+    items = job["appliances"] + job["plumbing"] + [f"{cabinet} cabinet" for cabinet in job["cabinets"]]
+    return f"{job['layout']} {job['width']}x{job['depth']} mm: {', '.join(items) or 'no items'}"
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Submit a batch of AI Auto Design requests.")
+    parser.add_argument("path", help="CSV or JSONL file with one design per row")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY, help="submissions in flight at once")
+    parser.add_argument("--wait", action="store_true", help="poll until every design has finished")
+    parser.add_argument("--output", help="write one JSON line per job to this file")
+    parser.add_argument("--validate-only", action="store_true", help="check every row against the request schema and exit")
+    args = parser.parse_args(argv)
+
+    jobs = load_jobs_file(args.path)
+    if args.validate_only:
+        invalid = 0
+        for index, job in enumerate(jobs):
+            errors = validate_job(job)
+            if errors:
+                invalid += 1
+                print(f"  #{index} {describe_job(job)}: {'; '.join(errors)}")
+        print(f"{len(jobs) - invalid} of {len(jobs)} rows are valid")
+        return 1 if invalid else 0
+
+    bearer_token = os.getenv("BEARER_TOKEN", "")
+    if not bearer_token:
+        print("BEARER_TOKEN environment variable is not set.", file=sys.stderr)
+        return 2
+
+    client = PooledHTTPClient(bearer_token)
+    policy = PollingPolicy()
+    result_store = ResultStore()
+    job_registry = JobRegistry()
+    run = BatchRun(jobs, client, args.concurrency, policy, submission_cache=SubmissionCache(result_store), job_registry=job_registry)
+    print(f"Submitting {len(jobs)} designs with concurrency {run.concurrency}...")
+    run.start()
+    run.wait_submitted()
+    for row in run.snapshot():
+        outcome = row["request_id"] or row["error"] or row["status"]
+        print(f"  #{row['index']} {describe_job(row['job'])} -> {outcome}")
+
+    if args.wait:
+        poller = StatusPoller(StatusCache(client, result_store), policy, job_registry=job_registry)
+        for row in run.iter_completed(poller):
+            summary = run.summary()
+            print(
+                f"  #{row['index']} {row['status']} "
+                f"({summary['completed']}/{summary['total']} completed, {summary['failed']} failed)"
+            )
+
+    summary = run.summary()
+    print(
+        f"Done in {summary['elapsed_seconds']:.1f}s: {summary['submitted']} submitted, "
+        f"{summary['completed']} completed, {summary['failed']} failed "
+        f"({summary['submissions_per_second']:.2f} submissions/s, "
+        f"{summary['completions_per_minute']:.2f} completions/min)"
+    )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            for row in run.snapshot():
+                f.write(json.dumps({
+                    "index": row["index"],
+                    "job": row["job"],
+                    "status": row["status"],
+                    "request_id": row["request_id"],
+                    "error": row["error"]
+                }) + "\n")
+    return 1 if summary["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""Restart recovery benchmark for the submission journal.
+
+    python bench_recovery.py --queued 20 --in-flight 5 --accepted 30
+
+Leaves a journal and job registry behind as a process that died mid-work
+would: requests that were accepted and still generating, submissions that
+reached the API just before the crash, and submissions still waiting in the
+queue. A fresh queue with the same REPLICA_ID then recovers, against an
+in-process mock API. Reports how long the replay took, how long until every
+recovered request finished, and how many submissions the mock saw after the
+restart (anything above --queued would be a duplicate).
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, Any, List, Optional
+
+from design_api import PooledHTTPClient, build_request_body, extract_request_id, request_body_hash, send_request
+from job_registry import OUTSTANDING_STATUSES, JobRegistry
+from mock_api import MockSettings, start_mock_server
+from polling import PollingPolicy, StatusCache, StatusPoller
+from result_store import ResultStore
+from submission_cache import SubmissionCache
+from submission_journal import SubmissionJournal
+from submission_queue import FINISHED_STATUSES, SUBMITTING, SubmissionQueue
+
+BENCH_REPLICA_ID = "bench-replica"
+
+def bench_job(index: int) -> Dict[str, Any]:
+    """A distinct set of selections per index, so no two jobs share a request body."""
+    return {
+        "appliances": ["cooktop", "refrigerator"],
+        "cabinets": ["base"],
+        "plumbing": ["sink"],
+        "worktop": "Granite",
+        "layout": "L-Shaped",
+        "width": 3500 + index % 25 * 100,
+        "depth": 3500 + index // 25 * 100
+    }
+
+def job_body(job: Dict[str, Any]) -> Dict[str, Any]:
+    return build_request_body(
+        job["appliances"],
+        job["cabinets"],
+        job["worktop"],
+        job["plumbing"],
+        job["layout"],
+        job["width"],
+        job["depth"]
+    )
+
+def leave_crashed_state(
+    directory: str,
+    client: PooledHTTPClient,
+    queued: int,
+    in_flight: int,
+    accepted: int
+) -> None:
+    """Write the journal and registry of a process that died with work outstanding."""
+    journal = SubmissionJournal(os.path.join(directory, "submissions.sqlite3"), owner=BENCH_REPLICA_ID)
+    registry = JobRegistry(os.path.join(directory, "jobs.sqlite3"))
+    for index in range(queued + in_flight + accepted):
+        job = bench_job(index)
+        request_body = job_body(job)
+        body_hash = request_body_hash(request_body)
+        job_id = f"bench-{index:05d}"
+        journal.add(job_id, request_body, body_hash, job, time.time())
+        if index < queued:
+            # Never sent
+            continue
+        success, result, location = send_request(request_body, client)
+        if not success or not location:
+            raise RuntimeError(f"Mock API rejected a submission: {result}")
+        request_id = extract_request_id(location)
+        registry.record_submission(request_id, location, job, body_hash, "app")
+        if index < queued + in_flight:
+            # Reached the API and the registry, but the process died before journalling the answer
+            journal.update(job_id, status=SUBMITTING, attempts=1)
+        else:
+            journal.update(job_id, status="accepted", attempts=1, request_id=request_id, location=location, finished_at=time.time())
+
+def recover(directory: str, client: PooledHTTPClient, job_ids: List[str], timeout: float) -> Dict[str, Any]:
+    """Start a fresh queue on the same files, recover, and wait for every recovered request to finish."""
+    result_store = ResultStore(os.path.join(directory, "results.sqlite3"))
+    registry = JobRegistry(os.path.join(directory, "jobs.sqlite3"))
+    policy = PollingPolicy()
+    poller = StatusPoller(StatusCache(client, result_store), policy, job_registry=registry)
+    queue = SubmissionQueue(
+        client,
+        policy=policy,
+        submission_cache=SubmissionCache(result_store),
+        job_registry=registry,
+        journal=SubmissionJournal(os.path.join(directory, "submissions.sqlite3"), owner=BENCH_REPLICA_ID)
+    )
+
+    started = time.perf_counter()
+    report = queue.recover(poller)
+    resubmitted_at = None
+    while time.perf_counter() - started < timeout:
+        if resubmitted_at is None and all(queue.get(job_id)["status"] in FINISHED_STATUSES for job_id in job_ids):
+            resubmitted_at = time.perf_counter() - started
+        stats = registry.stats()
+        if resubmitted_at is not None and not any(stats.get(status) for status in OUTSTANDING_STATUSES):
+            break
+        # Stands in for the heartbeat's registry pass, which runs every SUBMISSION_JOURNAL_HEARTBEAT seconds
+        registry.refresh(poller)
+        time.sleep(0.2)
+    else:
+        raise RuntimeError(f"Recovered requests didn't finish within {timeout:.0f}s")
+    report["resubmissions_accepted_seconds"] = resubmitted_at
+    report["all_finished_seconds"] = time.perf_counter() - started
+    report["statuses"] = registry.stats()
+    return report
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark recovery of queued submissions and polls after a restart.")
+    parser.add_argument("--queued", type=int, default=20, help="submissions still queued at the crash")
+    parser.add_argument("--in-flight", type=int, default=5, help="submissions that reached the API just before the crash")
+    parser.add_argument("--accepted", type=int, default=30, help="accepted requests still generating at the crash")
+    parser.add_argument("--delay", type=float, default=5.0, help="seconds the mock takes per design")
+    parser.add_argument("--timeout", type=float, default=120.0, help="give up waiting after this many seconds")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    server = start_mock_server(MockSettings(delay=args.delay, payload_bytes=16 * 1024), port=0)
+    client = PooledHTTPClient("benchmark", base_url=f"http://127.0.0.1:{server.server_port}")
+    with tempfile.TemporaryDirectory(prefix="bench-recovery-") as directory:
+        leave_crashed_state(directory, client, args.queued, args.in_flight, args.accepted)
+        submits_before = server.state.counts()["submits"]
+        unfinished = [f"bench-{index:05d}" for index in range(args.queued + args.in_flight)]
+        report = recover(directory, client, unfinished, args.timeout)
+    report["submits_after_restart"] = server.state.counts()["submits"] - submits_before
+    report["duplicates"] = report["submits_after_restart"] - args.queued
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+    print(
+        f"Replayed in {report['seconds'] * 1000:.1f} ms: {report['resubmitted']} resubmitted, "
+        f"{report['reattached']} reattached, {report['polls_resumed']} polls resumed"
+    )
+    print(
+        f"Resubmissions accepted after {report['resubmissions_accepted_seconds']:.2f}s, "
+        f"every recovered request finished after {report['all_finished_seconds']:.2f}s"
+    )
+    print(f"Submissions after the restart: {report['submits_after_restart']} ({report['duplicates']} duplicates)")
+    return 1 if report["duplicates"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""Startup and per-rerun timing benchmark for the Streamlit app.
+
+    python bench_startup.py --reruns 20
+
+Measures, in a fresh interpreter, how long the app's imports take, then runs
+app.py headless with Streamlit's AppTest: one cold run followed by repeated
+reruns of the main page and the progress page (the view that reruns while a
+design is generating). Status polls from the progress page go to an
+in-process mock API, so nothing leaves the machine.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, Any, List, Optional
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+IMPORT_PROBE = """
+import time
+started = time.perf_counter()
+import streamlit
+streamlit_done = time.perf_counter()
+import design_api, polling, result_store, submission_cache, metrics
+print(streamlit_done - started, time.perf_counter() - streamlit_done)
+"""
+
+def measure_imports() -> Dict[str, float]:
+    """Import times (seconds) in a fresh interpreter: Streamlit itself, then the app's own modules."""
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE],
+        cwd=os.path.dirname(APP_PATH),
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout.split()
+    return {"streamlit": float(output[0]), "app_modules": float(output[1])}
+
+def measure_reruns(query_params: Dict[str, str], reruns: int) -> Dict[str, Any]:
+    """Time the first script run and `reruns` further runs of one view."""
+    from streamlit.testing.v1 import AppTest
+
+    app_test = AppTest.from_file(APP_PATH, default_timeout=60)
+    for key, value in query_params.items():
+        app_test.query_params[key] = value
+    app_test.secrets["BEARER_TOKEN"] = os.getenv("BEARER_TOKEN", "benchmark")
+
+    started = time.perf_counter()
+    app_test.run()
+    first_run = time.perf_counter() - started
+    if app_test.exception:
+        raise RuntimeError(app_test.exception[0].value)
+
+    timings: List[float] = []
+    for _ in range(reruns):
+        started = time.perf_counter()
+        app_test.run()
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return {
+        "first_run_ms": round(first_run * 1000, 1),
+        "rerun_mean_ms": round(statistics.mean(timings) * 1000, 1),
+        "rerun_p95_ms": round(timings[max(0, int(len(timings) * 0.95) - 1)] * 1000, 1)
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark app startup and rerun time.")
+    parser.add_argument("--reruns", type=int, default=20, help="reruns per view")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    # Keep the benchmark's result store and job registry away from the real ones, and its polls off the real API
+    os.environ.setdefault("RESULT_STORE_PATH", os.path.join(".cache", "bench", "results.sqlite3"))
+    os.environ.setdefault("JOB_REGISTRY_PATH", os.path.join(".cache", "bench", "jobs.sqlite3"))
+    os.environ.setdefault("SUBMISSION_JOURNAL_PATH", os.path.join(".cache", "bench", "submissions.sqlite3"))
+    from mock_api import MockSettings, start_mock_server
+    server = start_mock_server(MockSettings(delay=3600), port=0)
+    os.environ["API_BASE_URL"] = f"http://127.0.0.1:{server.server_port}"
+    report = {
+        "imports_ms": {name: round(seconds * 1000, 1) for name, seconds in measure_imports().items()},
+        "main": measure_reruns({}, args.reruns),
+        "progress": measure_reruns({"progress": "true", "request_id": "benchmark"}, args.reruns)
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+    print(f"Imports: streamlit {report['imports_ms']['streamlit']} ms, app modules {report['imports_ms']['app_modules']} ms")
+    for view in ("main", "progress"):
+        timing = report[view]
+        print(
+            f"{view:<9} first run {timing['first_run_ms']} ms, "
+            f"rerun mean {timing['rerun_mean_ms']} ms, p95 {timing['rerun_p95_ms']} ms"
+        )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
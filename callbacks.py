@@ -0,0 +1,119 @@
+"""Local receiver for completion callbacks from the design API.
+
+When CALLBACK_SERVER_PORT is set, every submission carries the URL of this
+receiver (design_api.CALLBACK_HEADER) and the API POSTs the final status
+response there as soon as a design finishes. The receiver hands it to the
+shared poller. Once callbacks are seen to arrive, the poller only polls
+requests submitted from this process as a slow fallback in case one is lost.
+
+What the API is assumed to do: POST the final status response, as JSON, to
+the registered URL unchanged. Nothing else is relied on. The request_id only
+exists once the API has accepted a submission, so each submission registers
+its own URL with a nonce, and the HTTP client matches that nonce to the
+request_id from the 202 response. A request_id query parameter or body field
+is used only for nonces this process doesn't know, e.g. a submission from
+another replica behind the same CALLBACK_PUBLIC_URL.
+"""
+import hmac
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Optional
+from urllib.parse import parse_qs, urlencode, urlparse
+
+from design_api import CALLBACK_SUBMISSION_PARAM, PooledHTTPClient, parse_status_body
+from metrics import CALLBACKS_RECEIVED, log_event
+
+if TYPE_CHECKING:
+    from polling import StatusPoller
+
+# Completion callback settings
+CALLBACK_SERVER_PORT = int(os.getenv("CALLBACK_SERVER_PORT", "0"))  # 0 disables callbacks
+CALLBACK_SERVER_HOST = os.getenv("CALLBACK_SERVER_HOST", "127.0.0.1")
+CALLBACK_PUBLIC_URL = os.getenv("CALLBACK_PUBLIC_URL", f"http://localhost:{CALLBACK_SERVER_PORT}").rstrip("/")  # As the API reaches it
+CALLBACK_TOKEN = os.getenv("CALLBACK_TOKEN", "")  # Shared secret in the callback URL, required with CALLBACK_SERVER_PORT
+CALLBACK_FALLBACK_INTERVAL = float(os.getenv("CALLBACK_FALLBACK_INTERVAL", "120"))  # Seconds between fallback polls
+CALLBACK_MAX_BYTES = 256 * 1024 * 1024  # Largest callback body accepted
+CALLBACK_PATH = "/design-callback"
+
+def callback_url(public_url: str = CALLBACK_PUBLIC_URL, token: str = CALLBACK_TOKEN) -> str:
+    """URL the API should POST final statuses to."""
+    _check_token(token)
+    return f"{public_url}{CALLBACK_PATH}?{urlencode({'token': token})}"
+
+def _check_token(token: str) -> None:
+    # A token generated per process would be rejected by other replicas and after a restart,
+    # so callbacks for requests already submitted would all be lost
+    if not token:
+        raise RuntimeError("CALLBACK_SERVER_PORT needs CALLBACK_TOKEN set to the same secret on every replica")
+
+class _CallbackHandler(BaseHTTPRequestHandler):
+    poller: "StatusPoller" = None
+    http_client: Optional[PooledHTTPClient] = None
+    token: str = ""
+
+    def do_POST(self) -> None:
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path != CALLBACK_PATH:
+            self._reject(404, "Not found")
+            return
+        if not hmac.compare_digest(query.get("token", [""])[0], self.token):
+            self._reject(403, "Invalid token")
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > CALLBACK_MAX_BYTES:
+            self._reject(413, "Callback body too large")
+            return
+        try:
+            result = parse_status_body(self.rfile.read(length))
+        except ValueError as e:
+            self._reject(400, f"Invalid status response: {e}")
+            return
+        nonce = query.get(CALLBACK_SUBMISSION_PARAM, [None])[0]
+        request_id = (
+            (self.http_client.callback_request_id(nonce) if nonce and self.http_client is not None else None)
+            or query.get("request_id", [None])[0]
+            or result.get("request_id")
+        )
+        if not request_id:
+            # Not a submission this process knows of yet; polling picks the result up
+            self._reject(400, "Unknown submission")
+            return
+
+        # Answer before doing any work so the API isn't kept waiting
+        self.send_response(204)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+        code_major = result.get("codeMajor", "unknown")
+        if code_major == "processing":
+            CALLBACKS_RECEIVED.inc(outcome="ignored")
+            return
+        CALLBACKS_RECEIVED.inc(outcome="delivered")
+        log_event("callback", request_id, code_major=code_major)
+        self.poller.deliver(request_id, result)
+
+    def _reject(self, status: int, message: str) -> None:
+        CALLBACKS_RECEIVED.inc(outcome="rejected")
+        self.send_error(status, message)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+def start_callback_server(
+    poller: "StatusPoller",
+    host: str,
+    port: int,
+    token: str = CALLBACK_TOKEN,
+    http_client: Optional[PooledHTTPClient] = None
+) -> ThreadingHTTPServer:
+    """Receive POST /design-callback on a background thread. Use port 0 for a free port.
+
+    http_client is the client submissions are sent with, to match callbacks to request_ids.
+    """
+    _check_token(token)
+    handler = type("CallbackHandler", (_CallbackHandler,), {"poller": poller, "http_client": http_client, "token": token})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="callback-server", daemon=True).start()
+    return server
@@ -0,0 +1,643 @@
+"""Client for the AI Auto Design API.
+
+Shared by the Streamlit app and the batch command line tool, so nothing in here
+depends on Streamlit.
+"""
+import requests
+from requests.adapters import HTTPAdapter
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import lru_cache
+from types import MappingProxyType
+from typing import List, Dict, Any, Mapping, Tuple, Optional
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlencode
+
+from metrics import API_DEFERRED, CIRCUIT_OPENED, STATUS_POLL_SECONDS, SUBMIT_SECONDS, log_event
+from rate_limit import CircuitBreaker, TokenBucket
+
+try:
+    import orjson
+except ImportError:  # Optional: falls back to the standard library encoder
+    orjson = None
+
+# API endpoint (API_BASE_URL can point at a local mock_api.py server)
+API_BASE_URL = os.getenv("API_BASE_URL", "https://ai-auto-design-api-service.azurewebsites.net").rstrip("/")
+API_SUBMIT_PATH = "/api/v1/ai-auto-design"
+API_ENDPOINT = f"{API_BASE_URL}{API_SUBMIT_PATH}"
+
+# HTTP connection pool settings (can be overridden via environment variables)
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "4"))  # Number of hosts kept in the pool
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "32"))  # Keep-alive connections per host
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))  # seconds
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))  # seconds
+
+# Request budgets shared by every caller of one client
+API_SUBMIT_RATE = float(os.getenv("API_SUBMIT_RATE", "2"))  # Submissions per second
+API_SUBMIT_BURST = float(os.getenv("API_SUBMIT_BURST", "5"))
+API_POLL_RATE = float(os.getenv("API_POLL_RATE", "10"))  # Status polls per second
+API_POLL_BURST = float(os.getenv("API_POLL_BURST", "20"))
+
+# Why a call was held back on the client instead of being sent
+DEFERRAL_MESSAGES = {
+    "rate_limited": "Too many requests from this app right now",
+    "circuit_open": "The design API is failing; waiting for it to recover"
+}
+
+# Submissions carrying this header get their final status POSTed back to that URL
+CALLBACK_HEADER = "X-Callback-Url"
+CALLBACK_SUBMISSION_PARAM = "submission"  # Query parameter of the per-submission nonce in that URL
+CALLBACK_SUBMISSIONS_MAX = 100000  # Recent submissions whose callbacks can be matched to a request_id
+
+class PooledHTTPClient:
+    """Shared requests session with a bounded keep-alive connection pool."""
+
+    def __init__(
+        self,
+        bearer_token: str = "",
+        base_url: str = API_BASE_URL,
+        pool_connections: int = HTTP_POOL_CONNECTIONS,
+        pool_maxsize: int = HTTP_POOL_MAXSIZE,
+        connect_timeout: float = HTTP_CONNECT_TIMEOUT,
+        read_timeout: float = HTTP_READ_TIMEOUT,
+        submit_limiter: Optional[TokenBucket] = None,
+        poll_limiter: Optional[TokenBucket] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        callback_url: Optional[str] = None
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        # Optional: calls over budget or against an open circuit are deferred, not sent
+        self.submit_limiter = submit_limiter
+        self.poll_limiter = poll_limiter
+        self.breaker = breaker
+        # Optional: registered with every submission so completions are pushed instead of polled
+        self.callback_url = callback_url
+        self._callback_request_ids: "OrderedDict[str, str]" = OrderedDict()
+        self._callback_lock = threading.Lock()
+        # pool_block=True caps open connections per host at pool_maxsize;
+        # extra callers wait for a free connection instead of opening new ones
+        self.adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=True
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+        if bearer_token:
+            self.session.headers["Authorization"] = f"Bearer {bearer_token}"
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request through the shared pool using the default timeouts."""
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.request(method, url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def remember_callback(self, nonce: str, request_id: str) -> None:
+        """Match the nonce in a submission's callback URL to the request_id the API gave it."""
+        with self._callback_lock:
+            self._callback_request_ids[nonce] = request_id
+            if len(self._callback_request_ids) > CALLBACK_SUBMISSIONS_MAX:
+                self._callback_request_ids.popitem(last=False)
+
+    def callback_request_id(self, nonce: str) -> Optional[str]:
+        """request_id of the submission whose callback URL carried this nonce, if it was recent."""
+        with self._callback_lock:
+            return self._callback_request_ids.get(nonce)
+
+    def pool_stats(self) -> Dict[str, int]:
+        """Return pool hit/miss counts. A miss is a request that had to open a new connection."""
+        pools = self.adapter.poolmanager.pools
+        total_requests = 0
+        total_connections = 0
+        hosts = 0
+        for key in pools.keys():
+            try:
+                pool = pools[key]
+            except KeyError:
+                continue
+            hosts += 1
+            total_requests += pool.num_requests
+            total_connections += pool.num_connections
+        return {
+            "hosts": hosts,
+            "requests": total_requests,
+            "hits": max(0, total_requests - total_connections),
+            "misses": total_connections
+        }
+
+def _freeze(value: Any) -> Any:
+    """An immutable copy of a JSON value: dicts become read-only mappings, lists tuples.
+
+    build_request_body copies the frozen parts back into plain dicts and lists,
+    level by level (mappingproxy.copy() is a plain dict copy), so no two bodies
+    share a mutable object.
+    """
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+# Request body template. These parts never change between requests, so they are
+# built once, kept immutable, and copied into every body build_request_body returns.
+DESIGN_INFO = _freeze({
+    "name": "Sample Design v1.2",
+    "formatVersion": "1.2.0",
+    "source": {
+        "applicationId": "TestHub",
+        "applicationVersion": "1.5.17"
+    },
+    "coordinateConventions": {
+        "baseMeasurementUnit": "mm",
+        "axisOrientation": "rightHanded",
+        "axisElevation": "zAxisUp"
+    }
+})
+SPACE_ID = "1532d48e-73b8-4b79-8eea-6159db89350d"
+SPACE_FUNCTIONS = ("kitchen",)
+SPACE_FLOOR = _freeze({"id": "0f51b8fb-e147-4a80-91ba-0047d881c7cf"})
+SPACE_CEILING = _freeze({"id": "c58c9ce1-cb93-48da-9d1d-aae3efb0ec12"})
+WALL_THICKNESS = 150
+WALL_HEIGHT = 3200
+
+# (id, name, outdoorPerimeter, x multiplier of width, y multiplier of depth)
+PERIMETER_WALLS = (
+    ("south_wall", "South Wall", True, 0, 0),
+    ("east_wall", "East Wall", False, 1, 0),
+    ("north_wall", "North Wall", False, 1, 1),
+    ("west_wall", "West Wall", False, 0, 1)
+)
+
+APPLIANCE_CATALOG_IDS = (6958, 8347)
+PLUMBING_CATALOG_IDS = (6958,)
+CABINET_CATALOG_IDS = (8204,)
+WORKTOP_CATALOG_IDS = (8204,)
+
+@lru_cache(maxsize=1024)
+def _perimeter_walls(width: int, depth: int) -> Tuple[Mapping[str, Any], ...]:
+    """The four perimeter walls for a room size, built once per size."""
+    return _freeze([
+        {
+            "id": wall_id,
+            "type": "solidWall",
+            "name": name,
+            "startPosition": [width * x, depth * y],
+            "thickness": WALL_THICKNESS,
+            "outdoorPerimeter": outdoor,
+            "startHeight": WALL_HEIGHT,
+            "endHeight": WALL_HEIGHT
+        }
+        for wall_id, name, outdoor, x, y in PERIMETER_WALLS
+    ])
+
+@lru_cache(maxsize=1024)
+def _item_group(kind: str, values: Tuple[str, ...]) -> Mapping[str, Any]:
+    """A requiredItemTypes entry for one kind of item, built once per selection."""
+    if kind == "appliance":
+        catalog_ids = APPLIANCE_CATALOG_IDS
+        preferences = [{"baseItemType": f"appliance.{value}"} for value in values]
+    elif kind == "plumbing":
+        catalog_ids = PLUMBING_CATALOG_IDS
+        preferences = [{"baseItemType": f"plumbingFixture.{value}"} for value in values]
+    elif kind == "cabinet":
+        catalog_ids = CABINET_CATALOG_IDS
+        preferences = [{"baseItemType": "cabinetry.cabinet", "subType": value} for value in values]
+    else:
+        catalog_ids = WORKTOP_CATALOG_IDS
+        preferences = [{"baseItemType": "worktop.slab", "material": value.lower()} for value in values]
+    return _freeze({"catalogVersionIDs": list(catalog_ids), "preferences": preferences})
+
+def build_request_body(
+    appliances: List[str],
+    cabinet_types: List[str],
+    worktop_material: str,
+    plumbing_fixtures: List[str],
+    layout_type: str = "L-Shaped",
+    width: int = 4000,
+    depth: int = 4000
+) -> Dict[str, Any]:
+    """Build the request body with user selections.
+
+    The body is copied from cached, immutable template parts (walls per room
+    size, preference groups per selection), so callers may change it freely.
+    """
+    groups = []
+    if appliances:
+        groups.append(_item_group("appliance", tuple(appliances)))
+    if plumbing_fixtures:
+        groups.append(_item_group("plumbing", tuple(plumbing_fixtures)))
+    if cabinet_types:
+        groups.append(_item_group("cabinet", tuple(cabinet_types)))
+    if worktop_material:
+        groups.append(_item_group("worktop", (worktop_material,)))
+    
+    return {
+        "sourceDesign": {
+            "info": dict(
+                DESIGN_INFO.copy(),
+                source=DESIGN_INFO["source"].copy(),
+                coordinateConventions=DESIGN_INFO["coordinateConventions"].copy()
+            ),
+            "spaces": [
+                {
+                    "id": SPACE_ID,
+                    "name": "Kitchen Space",
+                    "functions": list(SPACE_FUNCTIONS),
+                    "walls": {
+                        "perimeterWalls": [
+                            dict(wall.copy(), startPosition=list(wall["startPosition"]))
+                            for wall in _perimeter_walls(width, depth)
+                        ]
+                    },
+                    "floor": SPACE_FLOOR.copy(),
+                    "ceiling": SPACE_CEILING.copy()
+                }
+            ]
+        },
+        "autoDesignInputs": {
+            "roomConfig": {
+                "functionLayoutType": layout_type,
+                "functionStyle": "modern"
+            },
+            "requiredItemTypes": [
+                {
+                    "catalogVersionIDs": list(group["catalogVersionIDs"]),
+                    "preferences": [preference.copy() for preference in group["preferences"]]
+                }
+                for group in groups
+            ]
+        }
+    }
+
+# Reused stdlib encoders for when orjson isn't installed
+_JSON_ENCODER = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False)
+_JSON_SORTED_ENCODER = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False, sort_keys=True)
+
+def dumps_json(obj: Any, sort_keys: bool = False) -> bytes:
+    """Serialise to compact UTF-8 JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+    encoder = _JSON_SORTED_ENCODER if sort_keys else _JSON_ENCODER
+    return encoder.encode(obj).encode("utf-8")
+
+def canonical_request_json(request_body: Dict[str, Any]) -> str:
+    """Serialise a request body deterministically.
+
+    Keys are sorted and the order-insensitive lists (item type groups, their
+    preferences and catalog IDs) are sorted too, so two bodies asking for the
+    same design produce the same string regardless of selection order.
+    """
+    item_types = []
+    for item_type in request_body.get("autoDesignInputs", {}).get("requiredItemTypes", []):
+        item_type = dict(item_type)
+        item_type["catalogVersionIDs"] = sorted(item_type.get("catalogVersionIDs", []))
+        item_type["preferences"] = sorted(
+            item_type.get("preferences", []),
+            key=lambda preference: json.dumps(preference, sort_keys=True)
+        )
+        item_types.append(item_type)
+    item_types.sort(key=lambda item_type: json.dumps(item_type, sort_keys=True))
+    
+    body = dict(request_body)
+    if "autoDesignInputs" in body:
+        body["autoDesignInputs"] = dict(body["autoDesignInputs"], requiredItemTypes=item_types)
+    return dumps_json(body, sort_keys=True).decode("utf-8")
+
+def request_body_hash(request_body: Dict[str, Any]) -> str:
+    """SHA-256 of the canonical request body."""
+    return hashlib.sha256(canonical_request_json(request_body).encode("utf-8")).hexdigest()
+
+class SubmitError(str):
+    """Error message of a failed submission, with what is needed to decide whether to retry it."""
+
+    status_code: Optional[int] = None
+    retry_after: Optional[float] = None
+    deferred: bool = False  # Held back on the client; nothing was sent
+
+    @property
+    def retryable(self) -> bool:
+        """Connection errors, timeouts, throttling and server errors are worth retrying."""
+        return is_retryable_status(self.status_code)
+
+def send_request(request_body: Dict[str, Any], client: PooledHTTPClient) -> Tuple[bool, Any, Optional[str]]:
+    """Send POST request to the API. Returns (success, result, location_header).
+
+    On failure result is a SubmitError (a str) carrying the HTTP status and any Retry-After.
+    """
+    deferral = admit(client, client.submit_limiter, "submit")
+    if deferral is not None:
+        reason, wait = deferral
+        error = SubmitError(DEFERRAL_MESSAGES[reason])
+        error.retry_after = wait
+        error.deferred = True
+        return False, error, None
+    
+    started = time.perf_counter()
+    try:
+        headers = {
+            "Content-Type": "application/json"
+        }
+        callback_nonce = None
+        if client.callback_url:
+            # The request_id only exists once the API answers, so the URL carries a nonce
+            # of our own, matched to it below; the API isn't relied on to add the request_id
+            callback_nonce = uuid.uuid4().hex
+            separator = "&" if "?" in client.callback_url else "?"
+            headers[CALLBACK_HEADER] = f"{client.callback_url}{separator}{urlencode({CALLBACK_SUBMISSION_PARAM: callback_nonce})}"
+        response = client.post(
+            f"{client.base_url}{API_SUBMIT_PATH}",
+            data=dumps_json(request_body),
+            headers=headers
+        )
+        
+        # Handle 202 Accepted status
+        if response.status_code == 202:
+            location = response.headers.get("location", "")
+            result = response.json() if response.content else {}
+            request_id = extract_request_id(location)
+            if callback_nonce and request_id:
+                client.remember_callback(callback_nonce, request_id)
+            _record_submit(started, "accepted", request_id, response.status_code)
+            record_outcome(client, response.status_code)
+            return True, result, location
+        
+        response.raise_for_status()
+        result = response.json() if response.content else {"message": "Success"}
+        _record_submit(started, "success", None, response.status_code)
+        record_outcome(client, response.status_code)
+        return True, result, None
+    except requests.exceptions.RequestException as e:
+        error = SubmitError(str(e))
+        if e.response is not None:
+            error.status_code = e.response.status_code
+            error.retry_after = parse_retry_after(e.response.headers.get("Retry-After"))
+        _record_submit(started, "error", None, error.status_code, error=str(e))
+        record_outcome(client, error.status_code)
+        return False, error, None
+
+def admit(client: PooledHTTPClient, limiter: Optional[TokenBucket], call: str) -> Optional[Tuple[str, float]]:
+    """Check a call against its budget and the circuit breaker.
+
+    Returns None if the call may be sent now, or (reason, seconds to wait) if it
+    must be deferred. reason is a key of DEFERRAL_MESSAGES.
+    """
+    reason, wait = None, 0.0
+    if limiter is not None:
+        wait = limiter.try_acquire()
+        if wait > 0:
+            reason = "rate_limited"
+    if reason is None and client.breaker is not None:
+        wait = client.breaker.allow()
+        if wait > 0:
+            reason = "circuit_open"
+    if reason is None:
+        return None
+    API_DEFERRED.inc(call=call, reason=reason)
+    return reason, wait
+
+def is_retryable_status(status_code: Optional[int]) -> bool:
+    """Connection errors and timeouts (no status), throttling and server errors."""
+    return status_code is None or status_code == 429 or status_code >= 500
+
+def record_outcome(client: PooledHTTPClient, status_code: Optional[int]) -> None:
+    """Tell the circuit breaker how a call went. Timeouts and 5xx count against the API; 429 doesn't."""
+    if client.breaker is None:
+        return
+    if status_code is None or status_code >= 500:
+        if client.breaker.record_failure():
+            CIRCUIT_OPENED.inc()
+            log_event("circuit_opened", None, status_code=status_code)
+    else:
+        client.breaker.record_success()
+
+def _record_submit(started: float, outcome: str, request_id: Optional[str], status_code: Optional[int], **fields: Any) -> None:
+    seconds = time.perf_counter() - started
+    SUBMIT_SECONDS.observe(seconds, outcome=outcome)
+    log_event("submit", request_id, outcome=outcome, status_code=status_code, seconds=round(seconds, 4), **fields)
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delay in seconds or HTTP date) into seconds from now."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+def get_poll_hints(response: Optional[requests.Response]) -> Dict[str, Any]:
+    """Extract server polling hints (Retry-After, Location) from a response."""
+    if response is None:
+        return {}
+    hints = {}
+    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+    if retry_after is not None:
+        hints["retry_after"] = retry_after
+    location = response.headers.get("location")
+    if location:
+        hints["location"] = location
+    return hints
+
+# Status responses are read in chunks of this size
+STATUS_CHUNK_SIZE = 64 * 1024
+# codeMajor is looked for in the first chunk; smaller bodies are parsed straight away
+_CODE_MAJOR_PATTERN = re.compile(rb'"codeMajor"\s*:\s*"([^"\\]*)"')
+_JSON_DECODER = json.JSONDecoder()
+
+class StatusResult(dict):
+    """A large final status response, decoded only when something reads past its codeMajor.
+
+    Polling, caching and storing a finished design only need codeMajor and the
+    body as received (see dumps_status_response), so the (possibly multi-MB)
+    rest is parsed on first access, once. raw_result is the raw JSON text of
+    the "result" value, for embedding the design without serialising it again.
+    """
+
+    def __init__(self, body: bytes, code_major: str):
+        super().__init__(codeMajor=code_major)
+        self.body = body
+        self._raw_result: Optional[str] = None
+        self._loaded = False
+
+    @property
+    def raw_result(self) -> Optional[str]:
+        self._load()
+        return self._raw_result
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        fields, raw_result = _parse_status_object(self.body.decode("utf-8"))
+        dict.update(self, fields)
+        self._raw_result = raw_result
+        self._loaded = True
+
+    def __getitem__(self, key: str) -> Any:
+        if key != "codeMajor":
+            self._load()
+        return super().__getitem__(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key != "codeMajor":
+            self._load()
+        return super().get(key, default)
+
+    def __contains__(self, key: object) -> bool:
+        if key != "codeMajor":
+            self._load()
+        return super().__contains__(key)
+
+    def __iter__(self):
+        self._load()
+        return super().__iter__()
+
+    def __len__(self) -> int:
+        self._load()
+        return super().__len__()
+
+    def __eq__(self, other: object) -> bool:
+        self._load()
+        return super().__eq__(other)
+
+    def __repr__(self) -> str:
+        self._load()
+        return super().__repr__()
+
+    def keys(self):
+        self._load()
+        return super().keys()
+
+    def values(self):
+        self._load()
+        return super().values()
+
+    def items(self):
+        self._load()
+        return super().items()
+
+    def copy(self) -> Dict[str, Any]:
+        self._load()
+        return dict(super().items())
+
+def _parse_status_object(text: str) -> Tuple[Dict[str, Any], Optional[str]]:
+    """Walk a top-level JSON object with the C decoder, returning it and the raw text of its "result" value."""
+    fields: Dict[str, Any] = {}
+    raw_result = None
+    pos = json.decoder.WHITESPACE.match(text, 0).end()
+    if text[pos:pos + 1] != "{":
+        raise ValueError("Status response is not a JSON object")
+    pos = json.decoder.WHITESPACE.match(text, pos + 1).end()
+    if text[pos:pos + 1] == "}":
+        return fields, raw_result
+    while True:
+        key, pos = _JSON_DECODER.raw_decode(text, pos)
+        pos = json.decoder.WHITESPACE.match(text, pos).end()
+        if text[pos:pos + 1] != ":":
+            raise ValueError(f"Expected ':' at position {pos}")
+        start = json.decoder.WHITESPACE.match(text, pos + 1).end()
+        value, pos = _JSON_DECODER.raw_decode(text, start)
+        fields[key] = value
+        if key == "result":
+            raw_result = text[start:pos]
+        pos = json.decoder.WHITESPACE.match(text, pos).end()
+        delimiter = text[pos:pos + 1]
+        if delimiter == "}":
+            return fields, raw_result
+        if delimiter != ",":
+            raise ValueError(f"Expected ',' or '}}' at position {pos}")
+        pos = json.decoder.WHITESPACE.match(text, pos + 1).end()
+
+def parse_status_body(body: bytes) -> Dict[str, Any]:
+    """Parse a status response body.
+
+    Bodies over STATUS_CHUNK_SIZE with a final codeMajor in their first chunk come
+    back as a StatusResult without being decoded; anything else is parsed now.
+    Raises ValueError if the body isn't a JSON object (for a StatusResult, the
+    rest of the body is only checked when it is read).
+    """
+    match = _CODE_MAJOR_PATTERN.search(body, 0, STATUS_CHUNK_SIZE)
+    if match is None or match.group(1) == b"processing" or len(body) <= STATUS_CHUNK_SIZE:
+        response = json.loads(body)
+        if not isinstance(response, dict):
+            raise ValueError("Status response is not a JSON object")
+        return response
+    if body[:64].lstrip()[:1] != b"{" or body[-64:].rstrip()[-1:] != b"}":
+        raise ValueError("Status response is not a JSON object")
+    return StatusResult(bytes(body), match.group(1).decode("utf-8"))
+
+def dumps_status_response(response: Dict[str, Any]) -> bytes:
+    """Serialise a status response; a StatusResult is written back as the body it came from."""
+    if isinstance(response, StatusResult):
+        return response.body
+    return dumps_json(response)
+
+def read_body(response: requests.Response) -> bytes:
+    """Read a streamed response body, joining its chunks once at the end."""
+    return b"".join(response.iter_content(chunk_size=STATUS_CHUNK_SIZE))
+
+def poll_status(location_path: str, client: PooledHTTPClient) -> Tuple[bool, Dict[str, Any], Dict[str, Any]]:
+    """Poll the status endpoint using the location path. Returns (success, result, hints).
+
+    hints holds any Retry-After delay (seconds) and Location the server sent back.
+    The body is streamed; large finished results come back as an undecoded StatusResult.
+    """
+    deferral = admit(client, client.poll_limiter, "poll")
+    if deferral is not None:
+        reason, wait = deferral
+        return False, {"error": DEFERRAL_MESSAGES[reason], "deferred": True, "retryable": True}, {"retry_after": wait}
+    
+    started = time.perf_counter()
+    try:
+        # Handle both relative paths (starting with /) and absolute URLs
+        if location_path.startswith("http://") or location_path.startswith("https://"):
+            url = location_path
+        else:
+            # Relative path - append to base URL
+            url = f"{client.base_url}{location_path}"
+        
+        with client.get(url, stream=True) as response:
+            response.raise_for_status()
+            body = read_body(response)
+            hints = get_poll_hints(response)
+        record_outcome(client, response.status_code)
+        result = parse_status_body(body) if body else {}
+        _record_poll(started, location_path, result.get("codeMajor", "unknown"), len(body))
+        return True, result, hints
+    except requests.exceptions.RequestException as e:
+        status_code = e.response.status_code if e.response is not None else None
+        _record_poll(started, location_path, "error", 0, error=str(e))
+        record_outcome(client, status_code)
+        return False, {"error": str(e), "retryable": is_retryable_status(status_code)}, get_poll_hints(e.response)
+    except ValueError as e:
+        _record_poll(started, location_path, "invalid", 0, error=str(e))
+        return False, {"error": f"Invalid status response: {e}", "retryable": False}, {}
+
+def _record_poll(started: float, location_path: str, outcome: str, body_bytes: int, **fields: Any) -> None:
+    seconds = time.perf_counter() - started
+    STATUS_POLL_SECONDS.observe(seconds, outcome=outcome)
+    log_event("poll", extract_request_id(location_path), outcome=outcome, bytes=body_bytes, seconds=round(seconds, 4), **fields)
+
+def extract_request_id(location: str) -> Optional[str]:
+    """Extract the request_id query parameter from a location path."""
+    if "request_id=" in location:
+        return location.split("request_id=")[1].split("&")[0]
+    return None
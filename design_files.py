@@ -0,0 +1,146 @@
+"""Compressed design files for loading results into the SFx Tool.
+
+Instead of inlining a multi-MB design into a console command, the result is
+written once per request_id as a gzip file. It can then be downloaded from the
+app, or fetched from a small local HTTP endpoint with a one-line command.
+"""
+import gzip
+import json
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+# Design file settings
+DESIGN_FILE_DIR = os.getenv("DESIGN_FILE_DIR", os.path.join(".cache", "designs"))
+DESIGN_FILE_MAX_BYTES = int(os.getenv("DESIGN_FILE_MAX_BYTES", str(256 * 1024 * 1024)))  # 256 MB
+DESIGN_FILE_COMPRESSION_LEVEL = 6
+
+_FILE_KEY_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,128}$")
+
+class DesignFileCache:
+    """Directory of gzip-compressed design JSON files, one per request_id.
+
+    Files are written once and evicted oldest-first when the directory grows
+    past max_bytes.
+    """
+
+    def __init__(self, directory: str = DESIGN_FILE_DIR, max_bytes: int = DESIGN_FILE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, key: str) -> str:
+        if not _FILE_KEY_PATTERN.match(key):
+            raise ValueError(f"Invalid design file key: {key!r}")
+        return os.path.join(self.directory, f"{key}.json.gz")
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the file path for a key if it has been written."""
+        path = self.path_for(key)
+        return path if os.path.exists(path) else None
+
+    def put(self, key: str, design_json: str) -> str:
+        """Write the design JSON text for a key (once) and return the file path."""
+        path = self.path_for(key)
+        if os.path.exists(path):
+            return path
+        with self._lock:
+            if os.path.exists(path):
+                return path
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(gzip.compress(design_json.encode("utf-8"), compresslevel=DESIGN_FILE_COMPRESSION_LEVEL))
+            os.replace(tmp_path, path)
+            self._evict(keep=path)
+        return path
+
+    def _evict(self, keep: str) -> None:
+        files = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json.gz"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+class _DesignFileHandler(BaseHTTPRequestHandler):
+    cache: DesignFileCache = None
+
+    def do_GET(self) -> None:
+        match = re.match(r"^/designs/([A-Za-z0-9_-]{1,128})\.json$", self.path.split("?")[0])
+        path = self.cache.get(match.group(1)) if match else None
+        if path is None:
+            self.send_error(404, "Design not found")
+            return
+        with open(path, "rb") as f:
+            body = f.read()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        # The browser decompresses the file transparently while fetching it
+        self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        # The SFx Tool runs on another origin
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Cache-Control", "public, max-age=86400, immutable")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+def start_design_file_server(cache: DesignFileCache, host: str, port: int) -> ThreadingHTTPServer:
+    """Serve /designs/<key>.json from the cache on a background thread."""
+    handler = type("DesignFileHandler", (_DesignFileHandler,), {"cache": cache})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="design-file-server", daemon=True).start()
+    return server
+
+def default_public_url(host: str, port: int) -> str:
+    """Base URL a browser can reach the endpoint at, when the bind address tells it, else "".
+
+    Bound to loopback, only a browser on this machine can reach it, at localhost.
+    Bound to every interface, the name others reach this machine by isn't known,
+    so there is no default and DESIGN_FILE_PUBLIC_URL has to be set.
+    """
+    if host in ("", "0.0.0.0", "::"):
+        return ""
+    if host in ("127.0.0.1", "::1", "localhost"):
+        host = "localhost"
+    elif ":" in host:
+        host = f"[{host}]"
+    return f"http://{host}:{port}"
+
+def fetch_command(url: str) -> str:
+    """Console command that fetches a hosted design file and loads it."""
+    return (
+        f"fetch({json.dumps(url)}).then(r => r.text())"
+        ".then(t => commands.environment.loadCDFModel(t))"
+    )
+
+def file_picker_command() -> str:
+    """Console command that asks for a downloaded .json.gz design file and loads it."""
+    return (
+        "(() => { const input = document.createElement('input'); input.type = 'file'; "
+        "input.accept = '.gz,.json'; input.onchange = async () => { const file = input.files[0]; "
+        "let stream = file.stream(); if (file.name.endsWith('.gz')) { "
+        "stream = stream.pipeThrough(new DecompressionStream('gzip')); } "
+        "commands.environment.loadCDFModel(await new Response(stream).text()); }; input.click(); })()"
+    )
@@ -0,0 +1,99 @@
+"""Per-session state machine for the main page.
+
+    form -> submitting -> submitted -> result -> form
+
+The main page renders whichever view matches the current phase. Each move
+goes through a method here, so a session can't end up half in one view and
+half in another, as it could with separate in-progress/pending/showing flags.
+"""
+from typing import Dict, Any, Optional
+
+# Phases of the main page
+FORM = "form"  # Editing selections
+SUBMITTING = "submitting"  # A request is being sent
+SUBMITTED = "submitted"  # The request was accepted; its Request ID is shown under the form
+RESULT = "result"  # A final response is being shown
+
+TRANSITIONS = {
+    FORM: (SUBMITTING, RESULT),
+    SUBMITTING: (SUBMITTED, FORM, RESULT),
+    SUBMITTED: (SUBMITTING, RESULT, FORM),
+    RESULT: (FORM, RESULT)
+}
+
+class InvalidTransition(ValueError):
+    """Raised when a session is asked to move to a phase it can't reach from its current one."""
+
+class DesignSession:
+    """Phase of the main page plus the data that phase shows."""
+
+    def __init__(self):
+        self.phase = FORM
+        self.pending: Optional[Dict[str, Any]] = None  # Selections being submitted
+        self.submission_id: Optional[str] = None  # Submission queue job sending the pending selections
+        self.notice: Optional[Dict[str, Any]] = None  # Outcome of the last submission, shown under the form
+        self.result: Optional[Dict[str, Any]] = None  # Final status response
+        self.request_id: Optional[str] = None
+        self.reused_request_id: Optional[str] = None
+
+    def _move(self, phase: str) -> None:
+        if phase not in TRANSITIONS[self.phase]:
+            raise InvalidTransition(f"Can't go from {self.phase} to {phase}")
+        self.phase = phase
+
+    def submit(self, job: Dict[str, Any]) -> None:
+        """Start submitting a set of selections."""
+        self._move(SUBMITTING)
+        self.pending = job
+        self.submission_id = None
+        self.notice = None
+        self.request_id = None
+        self.reused_request_id = None
+
+    def queued(self, submission_id: str) -> None:
+        """The pending selections were handed to the submission queue."""
+        if self.phase != SUBMITTING:
+            raise InvalidTransition(f"Can't queue a submission while in {self.phase}")
+        self.submission_id = submission_id
+
+    def accepted(self, request_id: Optional[str], location: str, attached: bool = False) -> None:
+        """The API accepted the request (or an identical one already generating was attached to)."""
+        self._move(SUBMITTED)
+        self.pending = None
+        self.submission_id = None
+        self.request_id = request_id
+        self.notice = {"type": "success", "request_id": request_id, "location": location, "attached": attached}
+
+    def completed_inline(self, result: Any) -> None:
+        """The API answered synchronously without a status location."""
+        self._move(SUBMITTED)
+        self.pending = None
+        self.submission_id = None
+        self.notice = {"type": "success", "result": result}
+
+    def failed(self, error: str) -> None:
+        """Submission failed; back to the form with the error shown."""
+        self._move(FORM)
+        self.pending = None
+        self.submission_id = None
+        self.notice = {"type": "error", "error": error}
+
+    def show_result(self, result: Dict[str, Any], request_id: Optional[str] = None, reused_request_id: Optional[str] = None) -> None:
+        """Show a final status response."""
+        self._move(RESULT)
+        self.pending = None
+        self.submission_id = None
+        self.notice = None
+        self.result = result
+        self.request_id = request_id
+        self.reused_request_id = reused_request_id
+
+    def reset(self) -> None:
+        """Back to an empty form."""
+        self._move(FORM)
+        self.pending = None
+        self.submission_id = None
+        self.notice = None
+        self.result = None
+        self.request_id = None
+        self.reused_request_id = None
@@ -0,0 +1,147 @@
+"""Local estimate of whether the requested items fit along the room's walls.
+
+The API only reports that a combination doesn't fit after generating it for
+minutes, so jobs are screened here first. The usable run length of a layout is
+measured along the longest chain of adjacent perimeter walls it uses, and
+compared with the nominal widths of the requested items at two heights:
+- base: everything standing on the floor under the worktop
+- wall: wall cabinets, plus the clear wall above tall units and cooktops
+
+The widths and clearances are rough estimates, not the API's catalog
+dimensions, so a combination near the limit may still be generated; both can
+be overridden through the settings below. Batches and sweeps drop what doesn't
+fit, while the main form only warns.
+
+Request bodies are encoded into arrays and checked all at once with NumPy, so
+sweeps of thousands of combinations are screened in milliseconds.
+"""
+import json
+import os
+from typing import Dict, Any, List, Sequence, Tuple
+
+import numpy as np
+
+# Feasibility settings
+FEASIBILITY_CHECK = os.getenv("FEASIBILITY_CHECK", "true").lower() in ("1", "true", "yes")  # Skip jobs that can't fit
+FEASIBILITY_END_CLEARANCE = float(os.getenv("FEASIBILITY_END_CLEARANCE", "900"))  # mm kept clear at each open run end (a doorway)
+FEASIBILITY_ITEM_WIDTHS = os.getenv("FEASIBILITY_ITEM_WIDTHS", "")  # JSON {item key: [base mm, wall mm]} overriding ITEM_WIDTHS
+CABINET_DEPTH = 600  # mm; the corner where two runs meet is only usable by one of them
+
+# Number of adjacent walls each layout runs along
+LAYOUT_RUNS = {
+    "I-Shaped": 1,
+    "L-Shaped": 2,
+    "U-Shaped": 3
+}
+
+# Estimated (base run, wall run) width in mm per baseItemType, or baseItemType/subType.
+# Typical European module sizes (600 mm units, 900 mm range, 800 mm sink base),
+# not catalog dimensions; 0 means the item takes no length of that run
+ITEM_WIDTHS = {
+    "appliance.cooktop": (600, 600),  # Extractor hood above
+    "appliance.refrigerator": (700, 700),  # Full height
+    "appliance.oven": (600, 0),
+    "appliance.range": (900, 900),  # Extractor hood above
+    "appliance.dishwasher": (600, 0),
+    "plumbingFixture.sink": (800, 0),
+    "cabinetry.cabinet/base": (600, 0),
+    "cabinetry.cabinet/tall": (600, 600),  # Full height
+    "cabinetry.cabinet/roof": (0, 600),
+    "worktop.slab": (0, 0)  # Covers the base run
+}
+ITEM_WIDTHS.update({key: tuple(widths) for key, widths in json.loads(FEASIBILITY_ITEM_WIDTHS or "{}").items()})
+ITEM_KEYS = tuple(ITEM_WIDTHS)
+_ITEM_INDEX = {key: index for index, key in enumerate(ITEM_KEYS)}
+_WIDTHS = np.array([ITEM_WIDTHS[key] for key in ITEM_KEYS], dtype=np.float64)  # (items, 2)
+
+def item_key(preference: Dict[str, Any]) -> str:
+    """ITEM_WIDTHS key of one requiredItemTypes preference."""
+    sub_type = preference.get("subType")
+    return f"{preference['baseItemType']}/{sub_type}" if sub_type else preference["baseItemType"]
+
+def encode_bodies(request_bodies: Sequence[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Arrays for check_feasibility: wall start points (n, 4, 2), wall thickness (n, 4),
+    runs per layout (n,) and item counts (n, len(ITEM_KEYS)).
+
+    Bodies are expected to have passed request_schema validation (four perimeter
+    walls); unknown item types are ignored.
+    """
+    # Only floats and ints are appended (nothing the garbage collector tracks), and
+    # each distinct preference is looked up once; the arrays are built in one step
+    columns: Dict[Tuple[Any, Any], int] = {}
+    wall_values = []
+    runs = []
+    item_cells = []
+    for index, request_body in enumerate(request_bodies):
+        for wall in request_body["sourceDesign"]["spaces"][0]["walls"]["perimeterWalls"]:
+            x, y = wall["startPosition"][:2]
+            wall_values += (x, y, wall["thickness"])
+        inputs = request_body["autoDesignInputs"]
+        runs.append(LAYOUT_RUNS.get(inputs["roomConfig"]["functionLayoutType"], 0))
+        offset = index * len(ITEM_KEYS)
+        for group in inputs["requiredItemTypes"]:
+            for preference in group["preferences"]:
+                preference_key = (preference["baseItemType"], preference.get("subType"))
+                column = columns.get(preference_key)
+                if column is None:
+                    column = columns[preference_key] = _ITEM_INDEX.get(item_key(preference), -1)
+                if column >= 0:
+                    item_cells.append(offset + column)
+
+    walls = np.array(wall_values, dtype=np.float64).reshape(-1, 4, 3)
+    items = np.bincount(np.array(item_cells, dtype=np.int64), minlength=len(request_bodies) * len(ITEM_KEYS))
+    items = items.reshape(-1, len(ITEM_KEYS)).astype(np.float64)
+    return walls[:, :, :2], walls[:, :, 2], np.array(runs, dtype=np.int64), items
+
+def check_feasibility(
+    starts: np.ndarray,
+    thickness: np.ndarray,
+    runs: np.ndarray,
+    items: np.ndarray,
+    end_clearance: float = FEASIBILITY_END_CLEARANCE
+) -> Dict[str, np.ndarray]:
+    """Run lengths and required widths for every encoded body at once.
+
+    Returns arrays of length n: "run_length", "base_needed", "wall_needed" and
+    "feasible". Layouts without a known run count are never feasible.
+    """
+    # Wall i runs from its start point to the next wall's; half of each wall's
+    # thickness is lost at both ends of the run along it
+    lengths = np.linalg.norm(np.roll(starts, -1, axis=1) - starts, axis=2) - thickness
+    # Best chain of k adjacent walls for every k, then pick each body's k
+    chains = np.zeros((len(starts), 4), dtype=np.float64)
+    total = np.zeros_like(lengths)
+    for k in range(1, 5):
+        total = total + np.roll(lengths, -(k - 1), axis=1)
+        chains[:, k - 1] = total.max(axis=1)
+    chain = chains[np.arange(len(starts)), np.clip(runs, 1, 4) - 1]
+    run_length = np.maximum(chain - (runs - 1) * CABINET_DEPTH - 2 * end_clearance, 0)
+    run_length[runs == 0] = 0
+
+    needed = items @ _WIDTHS
+    base_needed, wall_needed = needed[:, 0], needed[:, 1]
+    return {
+        "run_length": run_length,
+        "base_needed": base_needed,
+        "wall_needed": wall_needed,
+        "feasible": (runs > 0) & (base_needed <= run_length) & (wall_needed <= run_length)
+    }
+
+def feasibility_error(report: Dict[str, np.ndarray], index: int) -> str:
+    """Why body `index` of a check_feasibility report doesn't fit, or "" if it does."""
+    if report["feasible"][index]:
+        return ""
+    run_length = report["run_length"][index]
+    if run_length <= 0:
+        return "Items don't fit: the layout has no usable wall run in this room"
+    level, needed = max((("base", report["base_needed"][index]), ("wall", report["wall_needed"][index])), key=lambda level: level[1])
+    return f"Items don't fit: they need about {needed:.0f} mm of {level} run and the room has {run_length:.0f} mm"
+
+def screen_request_bodies(request_bodies: Sequence[Dict[str, Any]]) -> List[str]:
+    """feasibility_error for each body, checked in one vectorised pass."""
+    if not request_bodies:
+        return []
+    report = check_feasibility(*encode_bodies(request_bodies))
+    if report["feasible"].all():
+        return [""] * len(request_bodies)
+    return [feasibility_error(report, index) for index in range(len(request_bodies))]
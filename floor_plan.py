@@ -0,0 +1,365 @@
+"""Top-down floor plans of finished designs, rendered as SVG or PNG.
+
+The perimeter walls are taken from the request's sourceDesign (or from the
+result when the request isn't known) and every placed item is drawn as its
+rotated footprint. Footprints are transformed for all items at once with
+NumPy. Renders run in worker processes (floor_plan_worker.py), so a batch of
+hundreds doesn't hold up the app, and are written once per request_id and size
+to a directory cache.
+"""
+import io
+import json
+import os
+import pickle
+import re
+import subprocess
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from design_api import build_request_body
+
+# Floor plan settings
+FLOOR_PLAN_DIR = os.getenv("FLOOR_PLAN_DIR", os.path.join(".cache", "floor_plans"))
+FLOOR_PLAN_MAX_BYTES = int(os.getenv("FLOOR_PLAN_MAX_BYTES", str(128 * 1024 * 1024)))  # 128 MB
+FLOOR_PLAN_WORKERS = int(os.getenv("FLOOR_PLAN_WORKERS", "2"))  # Render processes; 0 renders on a thread instead
+FLOOR_PLAN_SIZE = 640  # Longest side in pixels on the result page
+FLOOR_PLAN_THUMBNAIL_SIZE = 240  # Longest side in pixels in batch galleries
+FLOOR_PLAN_PADDING = 0.04  # Margin around the plan, as a fraction of its longest side
+
+# Fill colours by the part of baseItemType before the first "."
+ITEM_COLORS = {
+    "cabinetry": "#a0aec0",
+    "appliance": "#667eea",
+    "plumbingFixture": "#4299e1",
+    "worktop": "#ed8936"
+}
+OTHER_ITEM_COLOR = "#cbd5e0"
+WALL_COLOR = "#2d3748"
+BACKGROUND_COLOR = "#ffffff"
+DEFAULT_WALL_THICKNESS = 150
+
+_KEY_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,128}$")
+_ITEM_TRANSFORM_KEYS = ("position", "dimensions", "rotation")
+_UNIT_SQUARE = np.array([[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 1.0]])
+_WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "floor_plan_worker.py")
+
+def source_design_for(job: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """The sourceDesign a set of selections (a job or registry parameters) was submitted with."""
+    try:
+        return build_request_body(
+            job["appliances"],
+            job["cabinets"],
+            job["worktop"],
+            job["plumbing"],
+            job["layout"],
+            job["width"],
+            job["depth"]
+        )["sourceDesign"]
+    except (KeyError, TypeError):
+        return None
+
+def collect_geometry(design: Any) -> Tuple[List[Tuple[np.ndarray, float]], np.ndarray, List[str]]:
+    """Walk a design once for perimeter walls and placed items.
+
+    Returns (walls, items, item_types): each wall loop is (points (n, 2), thickness);
+    items has one row per item of x, y, width, depth and rotation in degrees.
+    """
+    walls: List[Tuple[np.ndarray, float]] = []
+    items: List[Tuple[float, float, float, float, float]] = []
+    item_types: List[str] = []
+    stack = [design]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, list):
+            stack.extend(child for child in value if isinstance(child, (dict, list)))
+            continue
+        if not isinstance(value, dict):
+            continue
+        perimeter = value.get("perimeterWalls")
+        if isinstance(perimeter, list):
+            points = [
+                wall["startPosition"][:2]
+                for wall in perimeter
+                if isinstance(wall, dict) and isinstance(wall.get("startPosition"), list) and len(wall["startPosition"]) >= 2
+            ]
+            if len(points) >= 2:
+                thickness = perimeter[0].get("thickness", DEFAULT_WALL_THICKNESS) if isinstance(perimeter[0], dict) else DEFAULT_WALL_THICKNESS
+                walls.append((np.asarray(points, dtype=float), float(thickness)))
+        position, dimensions = value.get("position"), value.get("dimensions")
+        if isinstance(position, dict) and isinstance(dimensions, dict):
+            rotation = value.get("rotation")
+            try:
+                items.append((
+                    float(position.get("x", 0)),
+                    float(position.get("y", 0)),
+                    float(dimensions.get("width", 0)),
+                    float(dimensions.get("depth", 0)),
+                    float(rotation.get("z", 0)) if isinstance(rotation, dict) else 0.0
+                ))
+                item_types.append(str(value.get("baseItemType", "")))
+            except (TypeError, ValueError):
+                pass
+            # The item's own transform holds nothing else to draw
+            stack.extend(
+                child for key, child in value.items()
+                if isinstance(child, (dict, list)) and key not in _ITEM_TRANSFORM_KEYS
+            )
+            continue
+        stack.extend(child for child in value.values() if isinstance(child, (dict, list)))
+    return walls, np.asarray(items, dtype=float).reshape(-1, 5), item_types
+
+def item_footprints(items: np.ndarray) -> np.ndarray:
+    """Corners (n, 4, 2) of each item's footprint, rotated about its position."""
+    x, y, width, depth, rotation = items.T
+    local = _UNIT_SQUARE[None, :, :] * np.stack([width, depth], axis=1)[:, None, :]
+    theta = np.radians(rotation)
+    cos, sin = np.cos(theta)[:, None], np.sin(theta)[:, None]
+    return np.stack([
+        local[..., 0] * cos - local[..., 1] * sin + x[:, None],
+        local[..., 0] * sin + local[..., 1] * cos + y[:, None]
+    ], axis=-1)
+
+def _layout(design: Any, source_design: Optional[Dict[str, Any]], size: int) -> Dict[str, Any]:
+    """Everything in pixel coordinates (y pointing down), ready to draw."""
+    walls, items, item_types = collect_geometry(design)
+    if source_design is not None:
+        walls = collect_geometry(source_design)[0] or walls
+    footprints = item_footprints(items)
+    points = np.concatenate([wall for wall, _ in walls] + [footprints.reshape(-1, 2)])
+    if not len(points):
+        raise ValueError("The design has no walls or placed items to draw")
+
+    low, high = points.min(axis=0), points.max(axis=0)
+    extent = max(float((high - low).max()), 1.0)
+    padding = extent * FLOOR_PLAN_PADDING
+    scale = size / (extent + 2 * padding)
+    width = max(1, int(round((high[0] - low[0] + 2 * padding) * scale)))
+    height = max(1, int(round((high[1] - low[1] + 2 * padding) * scale)))
+
+    def to_pixels(coordinates: np.ndarray) -> np.ndarray:
+        pixels = (coordinates - low + padding) * scale
+        pixels[..., 1] = height - pixels[..., 1]
+        return pixels
+
+    categories = np.asarray([item_type.split(".", 1)[0] for item_type in item_types], dtype=object)
+    pixels = np.round(to_pixels(footprints), 1).reshape(-1, 8)
+    layers = []
+    for color, mask in [(color, categories == category) for category, color in ITEM_COLORS.items()] + [
+        (OTHER_ITEM_COLOR, ~np.isin(categories, list(ITEM_COLORS)))
+    ]:
+        # Stacked items (wall cabinets over base cabinets) look the same from above; draw each footprint once
+        corners = np.unique(pixels[mask], axis=0)
+        if len(corners):
+            layers.append((color, corners))
+    return {
+        "width": width,
+        "height": height,
+        "walls": [(to_pixels(wall), thickness * scale) for wall, thickness in walls],
+        "layers": layers  # (fill colour, footprint corners (n, 8)) per item category
+    }
+
+def _svg(plan: Dict[str, Any]) -> bytes:
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{plan["width"]}" height="{plan["height"]}" '
+        f'viewBox="0 0 {plan["width"]} {plan["height"]}">',
+        f'<rect width="100%" height="100%" fill="{BACKGROUND_COLOR}"/>'
+    ]
+    # One path per colour instead of one element per item keeps large plans small
+    for color, corners in plan["layers"]:
+        path = ("M{:.1f} {:.1f}L{:.1f} {:.1f}L{:.1f} {:.1f}L{:.1f} {:.1f}Z" * len(corners)).format(*corners.ravel().tolist())
+        parts.append(f'<path d="{path}" fill="{color}" stroke="{WALL_COLOR}" stroke-width="0.5"/>')
+    for wall, thickness in plan["walls"]:
+        points = " ".join(f"{x:.1f},{y:.1f}" for x, y in wall.tolist())
+        parts.append(
+            f'<polygon points="{points}" fill="none" stroke="{WALL_COLOR}" '
+            f'stroke-width="{max(thickness, 1):.1f}" stroke-linejoin="miter"/>'
+        )
+    parts.append("</svg>")
+    return "".join(parts).encode("utf-8")
+
+def _png(plan: Dict[str, Any]) -> bytes:
+    from PIL import Image, ImageDraw
+
+    image = Image.new("RGB", (plan["width"], plan["height"]), BACKGROUND_COLOR)
+    draw = ImageDraw.Draw(image)
+    for color, corners in plan["layers"]:
+        for polygon in corners.tolist():
+            draw.polygon(polygon, fill=color, outline=WALL_COLOR)
+    for wall, thickness in plan["walls"]:
+        points = [tuple(point) for point in wall.tolist()]
+        draw.line(points + points[:1], fill=WALL_COLOR, width=max(1, int(round(thickness))), joint="curve")
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
+
+def render_floor_plan(
+    design_json: str,
+    fmt: str = "svg",
+    size: int = FLOOR_PLAN_SIZE,
+    source_design: Optional[Dict[str, Any]] = None
+) -> bytes:
+    """Render the design (its JSON text) as an SVG or PNG whose longest side is size pixels.
+
+    Raises ValueError if there is nothing to draw.
+    """
+    if fmt not in ("svg", "png"):
+        raise ValueError(f"Unknown floor plan format: {fmt}")
+    plan = _layout(json.loads(design_json), source_design, size)
+    return _svg(plan) if fmt == "svg" else _png(plan)
+
+def render_to_file(path: str, design_json: str, fmt: str, size: int, source_design: Optional[Dict[str, Any]]) -> bytes:
+    """render_floor_plan, written to path through a temporary file so readers never see half a plan."""
+    image = render_floor_plan(design_json, fmt, size, source_design)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(image)
+    os.replace(tmp_path, path)
+    return image
+
+class _RenderProcess:
+    """One floor_plan_worker.py process, driven by one render thread."""
+
+    def __init__(self):
+        self._process = subprocess.Popen(
+            [sys.executable, _WORKER_SCRIPT],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            cwd=os.path.dirname(_WORKER_SCRIPT)
+        )
+
+    def render(self, *job: Any) -> bytes:
+        """Render one plan. Raises RuntimeError, and stops the process, if it died or garbled its reply."""
+        try:
+            pickle.dump(job, self._process.stdin)
+            self._process.stdin.flush()
+            status, value = pickle.load(self._process.stdout)
+        except (OSError, EOFError, pickle.UnpicklingError, ValueError) as e:
+            self.close()
+            raise RuntimeError(f"The floor plan render process stopped (exit code {self._process.returncode})") from e
+        if status == "error":
+            raise value
+        return value
+
+    @property
+    def alive(self) -> bool:
+        return self._process.poll() is None
+
+    def close(self) -> None:
+        self._process.kill()
+        self._process.wait()
+
+class FloorPlanCache:
+    """Directory of rendered floor plans, one file per request_id, size and format.
+
+    Missing plans are rendered by max_workers threads, each driving a worker process
+    of its own (or on one thread, with max_workers=0); concurrent requests for the same plan share one render. Files are evicted
+    oldest-first past max_bytes.
+    """
+
+    def __init__(
+        self,
+        directory: str = FLOOR_PLAN_DIR,
+        max_bytes: int = FLOOR_PLAN_MAX_BYTES,
+        max_workers: int = FLOOR_PLAN_WORKERS
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_workers = max_workers
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._workers = threading.local()
+        os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, key: str, fmt: str = "svg", size: int = FLOOR_PLAN_SIZE) -> str:
+        if not _KEY_PATTERN.match(key):
+            raise ValueError(f"Invalid floor plan key: {key!r}")
+        return os.path.join(self.directory, f"{key}-{size}.{fmt}")
+
+    def get(self, key: str, fmt: str = "svg", size: int = FLOOR_PLAN_SIZE) -> Optional[bytes]:
+        """Return a rendered plan if it is in the cache."""
+        try:
+            with open(self.path_for(key, fmt, size), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def submit(
+        self,
+        key: str,
+        design_json: str,
+        fmt: str = "svg",
+        size: int = FLOOR_PLAN_SIZE,
+        source_design: Optional[Dict[str, Any]] = None
+    ) -> "Future[bytes]":
+        """Start rendering a plan unless it is cached or already rendering. Returns immediately."""
+        path = self.path_for(key, fmt, size)
+        cached = self.get(key, fmt, size)
+        if cached is not None:
+            future: Future = Future()
+            future.set_result(cached)
+            return future
+        with self._lock:
+            future = self._pending.get(path)
+            if future is not None:
+                return future
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max(self.max_workers, 1), thread_name_prefix="floor-plan")
+            render = self._render_in_process if self.max_workers > 0 else render_to_file
+            future = self._executor.submit(render, path, design_json, fmt, size, source_design)
+            self._pending[path] = future
+        future.add_done_callback(lambda done: self._finished(path, done))
+        return future
+
+    def render(
+        self,
+        key: str,
+        design_json: str,
+        fmt: str = "svg",
+        size: int = FLOOR_PLAN_SIZE,
+        source_design: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None
+    ) -> bytes:
+        """Return a plan, rendering it first if needed. Raises ValueError if there is nothing to draw."""
+        return self.submit(key, design_json, fmt, size, source_design).result(timeout)
+
+    def _render_in_process(self, *job: Any) -> bytes:
+        # Runs on a render thread; its worker process is started on first use, and again
+        # after one dies (killed, out of memory), so only the job it was on fails
+        worker = getattr(self._workers, "process", None)
+        if worker is None or not worker.alive:
+            worker = self._workers.process = _RenderProcess()
+        return worker.render(*job)
+
+    def _finished(self, path: str, future: Future) -> None:
+        with self._lock:
+            self._pending.pop(path, None)
+            if future.exception() is None:
+                self._evict(keep=path)
+
+    def _evict(self, keep: str) -> None:
+        files = []
+        for name in os.listdir(self.directory):
+            if not name.endswith((".svg", ".png")):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
@@ -0,0 +1,36 @@
+"""Render process for floor_plan.FloorPlanCache.
+
+Started as a script of its own rather than through multiprocessing: a spawned
+multiprocessing child first re-runs its parent's __main__, and under Streamlit
+that is the whole app. Reads pickled render_to_file arguments from stdin and
+answers each with a pickled ("ok", image) or ("error", exception) on stdout,
+until stdin closes.
+"""
+import os
+import pickle
+import sys
+
+from floor_plan import render_to_file
+
+def main() -> int:
+    # Keep stdout for replies; anything printed while rendering goes to stderr
+    replies = os.fdopen(os.dup(sys.stdout.fileno()), "wb")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    jobs = sys.stdin.buffer
+    while True:
+        try:
+            job = pickle.load(jobs)
+        except EOFError:
+            return 0
+        try:
+            reply = pickle.dumps(("ok", render_to_file(*job)))
+        except Exception as e:
+            try:
+                reply = pickle.dumps(("error", e))
+            except Exception:
+                reply = pickle.dumps(("error", RuntimeError(f"{type(e).__name__}: {e}")))
+        replies.write(reply)
+        replies.flush()
+
+if __name__ == "__main__":
+    sys.exit(main())
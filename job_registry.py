@@ -0,0 +1,207 @@
+"""Persistent registry of every design request submitted from this process.
+
+A session only remembers the request it is showing, so a closed tab used to
+lose the job unless the user wrote the Request ID down. Every accepted
+submission (main page, batch and sweep) is recorded here with its parameters,
+submit time, status transitions and a pointer to its final result.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, Any, List, Optional
+
+if TYPE_CHECKING:
+    from polling import StatusPoller
+
+# Job registry settings
+JOB_REGISTRY_PATH = os.getenv("JOB_REGISTRY_PATH", os.path.join(".cache", "jobs.sqlite3"))
+JOB_REGISTRY_RETENTION = float(os.getenv("JOB_REGISTRY_RETENTION", str(30 * 24 * 3600)))  # Forget jobs older than 30 days
+JOB_REFRESH_MIN_INTERVAL = 2  # Minimum seconds between refresh passes, however many sessions ask
+
+# Statuses that still need polling; others are codeMajor values or "error"
+SUBMITTED = "submitted"
+OUTSTANDING_STATUSES = (SUBMITTED, "processing")
+
+class JobRegistry:
+    """SQLite-backed list of submitted requests and their status history, keyed by request_id."""
+
+    def __init__(self, path: str = JOB_REGISTRY_PATH, retention: float = JOB_REGISTRY_RETENTION):
+        self.retention = retention
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._last_refresh = 0.0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                request_id TEXT PRIMARY KEY,
+                location TEXT NOT NULL,
+                parameters TEXT NOT NULL,
+                body_hash TEXT,
+                source TEXT NOT NULL,
+                status TEXT NOT NULL,
+                error TEXT,
+                result_ref TEXT,
+                submitted_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS job_transitions (
+                request_id TEXT NOT NULL,
+                status TEXT NOT NULL,
+                at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_submitted_at ON jobs (submitted_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_job_transitions_request_id ON job_transitions (request_id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_body_hash ON jobs (body_hash)")
+        self._prune(time.time())
+        self._conn.commit()
+
+    def record_submission(
+        self,
+        request_id: str,
+        location: str,
+        parameters: Dict[str, Any],
+        body_hash: Optional[str] = None,
+        source: str = "app",
+        submitted_at: Optional[float] = None
+    ) -> None:
+        """Record an accepted submission. Re-recording a known request_id is a no-op."""
+        submitted_at = submitted_at or time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO jobs VALUES (?, ?, ?, ?, ?, ?, NULL, NULL, ?, ?)",
+                (request_id, location, json.dumps(parameters), body_hash, source, SUBMITTED, submitted_at, submitted_at)
+            )
+            if cursor.rowcount:
+                self._conn.execute(
+                    "INSERT INTO job_transitions VALUES (?, ?, ?)",
+                    (request_id, SUBMITTED, submitted_at)
+                )
+            self._conn.commit()
+
+    def record_status(
+        self,
+        request_id: str,
+        status: str,
+        error: Optional[str] = None,
+        result_ref: Optional[str] = None
+    ) -> bool:
+        """Move a job to a new status. Returns False if the job is unknown or already in that status."""
+        now = time.time()
+        # The connection context commits, or rolls back, the transaction the UPDATE opens
+        # even when nothing changed, so other processes aren't locked out of the file
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, result_ref = COALESCE(?, result_ref), updated_at = ? "
+                "WHERE request_id = ? AND status != ?",
+                (status, error, result_ref, now, request_id, status)
+            )
+            if not cursor.rowcount:
+                return False
+            self._conn.execute("INSERT INTO job_transitions VALUES (?, ?, ?)", (request_id, status, now))
+        return True
+
+    def get(self, request_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            cursor = self._conn.execute("SELECT * FROM jobs WHERE request_id = ?", (request_id,))
+            row = cursor.fetchone()
+            return self._to_job(cursor, row) if row is not None else None
+
+    def find_submission(self, body_hash: str, since: float) -> Optional[Dict[str, Any]]:
+        """The latest request with this body hash submitted at or after `since`, if any."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT * FROM jobs WHERE body_hash = ? AND submitted_at >= ? ORDER BY submitted_at DESC LIMIT 1",
+                (body_hash, since)
+            )
+            row = cursor.fetchone()
+            return self._to_job(cursor, row) if row is not None else None
+
+    def history(self, request_id: str) -> List[Dict[str, Any]]:
+        """Status transitions of one job, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, at FROM job_transitions WHERE request_id = ? ORDER BY at, rowid",
+                (request_id,)
+            ).fetchall()
+        return [{"status": status, "at": at} for status, at in rows]
+
+    def list_jobs(
+        self,
+        statuses: Optional[List[str]] = None,
+        source: Optional[str] = None,
+        search: Optional[str] = None,
+        limit: int = 500
+    ) -> List[Dict[str, Any]]:
+        """Most recent jobs first, optionally filtered by status, source and a request_id/parameter substring."""
+        query = "SELECT * FROM jobs WHERE 1 = 1"
+        args: List[Any] = []
+        if statuses:
+            query += f" AND status IN ({', '.join('?' * len(statuses))})"
+            args.extend(statuses)
+        if source:
+            query += " AND source = ?"
+            args.append(source)
+        if search:
+            query += " AND (request_id LIKE ? OR parameters LIKE ?)"
+            args.extend([f"%{search}%", f"%{search}%"])
+        query += " ORDER BY submitted_at DESC LIMIT ?"
+        args.append(limit)
+        with self._lock:
+            cursor = self._conn.execute(query, args)
+            return [self._to_job(cursor, row) for row in cursor.fetchall()]
+
+    def refresh(self, poller: "StatusPoller") -> int:
+        """Bring outstanding jobs up to date from the shared poller in one pass.
+
+        Every outstanding request is (re-)tracked on the poller, which merges polls
+        across sessions, and any status it already has is written back. Calls within
+        JOB_REFRESH_MIN_INTERVAL of the previous pass return 0 without doing anything.
+        """
+        now = time.time()
+        with self._lock:
+            if now - self._last_refresh < JOB_REFRESH_MIN_INTERVAL:
+                return 0
+            self._last_refresh = now
+            outstanding = self._conn.execute(
+                f"SELECT request_id, location FROM jobs WHERE status IN ({', '.join('?' * len(OUTSTANDING_STATUSES))})",
+                OUTSTANDING_STATUSES
+            ).fetchall()
+        for request_id, location in outstanding:
+            poller.track(request_id, location)
+            status = poller.get(request_id)
+            if status is None:
+                continue
+            if status["error"] is not None:
+                self.record_status(request_id, "error", status["error"])
+            elif status["result"] is not None:
+                code_major = status["result"].get("codeMajor", "unknown")
+                self.record_status(request_id, code_major, result_ref=request_id if code_major != "processing" else None)
+        return len(outstanding)
+
+    def stats(self) -> Dict[str, int]:
+        """Number of jobs per status."""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+    def _prune(self, now: float) -> None:
+        cutoff = now - self.retention
+        self._conn.execute(
+            "DELETE FROM job_transitions WHERE request_id IN (SELECT request_id FROM jobs WHERE submitted_at < ?)",
+            (cutoff,)
+        )
+        self._conn.execute("DELETE FROM jobs WHERE submitted_at < ?", (cutoff,))
+
+    @staticmethod
+    def _to_job(cursor: sqlite3.Cursor, row: tuple) -> Dict[str, Any]:
+        job = dict(zip([column[0] for column in cursor.description], row))
+        job["parameters"] = json.loads(job["parameters"])
+        return job
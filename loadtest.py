@@ -0,0 +1,302 @@
+"""Load test the submit/poll path against the local mock API.
+
+    python loadtest.py --sessions 50 --delay 10 --payload-kb 1024
+    python loadtest.py --sessions 20 --mode direct --base-url http://127.0.0.1:8765
+    python loadtest.py --sessions 50 --callbacks --callback-drop-rate 0.1
+    python loadtest.py --sessions 50 --replicas 3 --state-backend redis
+
+Each simulated session builds a request body, submits it with send_request and
+waits for the result the way the app does: in "shared" mode (default) through
+the StatusPoller/StatusCache every viewer shares, in "direct" mode by calling
+poll_status itself on a fixed interval. With --callbacks, shared mode also runs
+the completion callback receiver, so results are pushed by the mock and the
+poller only polls as a fallback. Reports throughput, p50/p95/p99 latencies,
+peak memory and (against the in-process mock) the API calls made. --replicas
+runs several pollers as separate app replicas behind a load balancer, sharing
+state through --state-backend (a redis backend without --state-url talks to an
+in-process mock_redis).
+"""
+import argparse
+import json
+import random
+import secrets
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Sequence
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+from callbacks import CALLBACK_FALLBACK_INTERVAL, CALLBACK_TOKEN, callback_url, start_callback_server
+from design_api import PooledHTTPClient, build_request_body, send_request, poll_status, extract_request_id
+from mock_api import add_mock_arguments, settings_from_args, start_mock_server
+from mock_redis import start_mock_redis
+from polling import PollingPolicy, StatusCache, StatusPoller
+from state_backend import StateBackend, create_state_backend
+
+# Load test defaults
+LOADTEST_SESSIONS = 20
+LOADTEST_RAMP_UP = 2.0  # Seconds over which sessions start
+LOADTEST_VIEW_INTERVAL = 0.5  # How often a session reads the shared poller (the fragment refresh)
+LOADTEST_POLL_INTERVAL = 2.0  # Fixed poll interval in direct mode
+LOADTEST_TIMEOUT = 600.0  # Give up on a session after this many seconds
+
+APPLIANCE_OPTIONS = ["cooktop", "refrigerator", "oven", "range", "dishwasher"]
+CABINET_OPTIONS = ["roof", "base", "tall"]
+
+def percentile(values: Sequence[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile (q between 0 and 100)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(q / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+def random_job(rng: random.Random) -> Dict[str, Any]:
+    return {
+        "appliances": rng.sample(APPLIANCE_OPTIONS, rng.randint(1, 3)),
+        "cabinets": rng.sample(CABINET_OPTIONS, rng.randint(1, 3)),
+        "plumbing": ["sink"],
+        "worktop": "Granite",
+        "layout": "L-Shaped",
+        "width": rng.randrange(3500, 6001, 100),
+        "depth": rng.randrange(3500, 6001, 100)
+    }
+
+class LoadTest:
+    """Runs simulated sessions and collects per-session timings."""
+
+    def __init__(
+        self,
+        client: PooledHTTPClient,
+        sessions: int = LOADTEST_SESSIONS,
+        mode: str = "shared",
+        ramp_up: float = LOADTEST_RAMP_UP,
+        poll_interval: float = LOADTEST_POLL_INTERVAL,
+        expected_duration: float = 20.0,
+        timeout: float = LOADTEST_TIMEOUT,
+        seed: int = 0,
+        fallback_interval: Optional[float] = None,
+        replicas: int = 1,
+        state: Optional[StateBackend] = None
+    ):
+        if mode not in ("shared", "direct"):
+            raise ValueError(f"Unknown mode: {mode}")
+        self.client = client
+        self.sessions = sessions
+        self.mode = mode
+        self.ramp_up = ramp_up
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.rng = random.Random(seed)
+        self.policy = PollingPolicy(expected_duration=expected_duration)
+        # One poller per replica; each view goes to a random replica, like a load balancer would send it
+        self.pollers = [
+            StatusPoller(StatusCache(client, state=state, owner=f"replica-{index}"), self.policy, fallback_interval=fallback_interval)
+            for index in range(replicas)
+        ] if mode == "shared" else []
+        self.results: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def run(self) -> Dict[str, Any]:
+        """Run every session to completion and return the report."""
+        jobs = [random_job(self.rng) for _ in range(self.sessions)]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.sessions, thread_name_prefix="loadtest-session") as executor:
+            for index, job in enumerate(jobs):
+                delay = self.ramp_up * index / self.sessions if self.sessions else 0
+                executor.submit(self._session, job, delay)
+        return self.report(time.perf_counter() - started)
+
+    def _session(self, job: Dict[str, Any], start_delay: float) -> None:
+        time.sleep(start_delay)
+        outcome = {"status": "error", "submit_seconds": None, "end_to_end_seconds": None, "polls": 0, "poll_seconds": []}
+        session_start = time.perf_counter()
+        try:
+            request_body = build_request_body(
+                job["appliances"],
+                job["cabinets"],
+                job["worktop"],
+                job["plumbing"],
+                job["layout"],
+                job["width"],
+                job["depth"]
+            )
+            success, result, location = send_request(request_body, self.client)
+            outcome["submit_seconds"] = time.perf_counter() - session_start
+            if success and location:
+                request_id = extract_request_id(location) or location
+                self.policy.note_submitted(request_id)
+                if self.mode == "shared":
+                    outcome["status"] = self._wait_shared(request_id, location, outcome)
+                else:
+                    outcome["status"] = self._wait_direct(location, outcome)
+            elif success:
+                outcome["status"] = "success"
+            outcome["end_to_end_seconds"] = time.perf_counter() - session_start
+        except Exception as e:
+            outcome["error"] = str(e)
+        with self._lock:
+            self.results.append(outcome)
+
+    def _wait_shared(self, request_id: str, location: str, outcome: Dict[str, Any]) -> str:
+        deadline = time.time() + self.timeout
+        while time.time() < deadline:
+            poller = random.choice(self.pollers)
+            poller.track(request_id, location)
+            status = poller.get(request_id)
+            if status is not None:
+                outcome["polls"] = status["poll_count"]
+                if status["error"] is not None:
+                    return "error"
+                if status["done"]:
+                    return status["result"].get("codeMajor", "unknown")
+            time.sleep(LOADTEST_VIEW_INTERVAL)
+        return "timeout"
+
+    def _wait_direct(self, location: str, outcome: Dict[str, Any]) -> str:
+        deadline = time.time() + self.timeout
+        while time.time() < deadline:
+            poll_start = time.perf_counter()
+            success, result, hints = poll_status(location, self.client)
+            outcome["poll_seconds"].append(time.perf_counter() - poll_start)
+            outcome["polls"] += 1
+            if success and result.get("codeMajor", "unknown") != "processing":
+                return result.get("codeMajor", "unknown")
+            time.sleep(hints.get("retry_after") or self.poll_interval)
+        return "timeout"
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        with self._lock:
+            results = list(self.results)
+        statuses: Dict[str, int] = {}
+        for outcome in results:
+            statuses[outcome["status"]] = statuses.get(outcome["status"], 0) + 1
+        submit_seconds = [outcome["submit_seconds"] for outcome in results if outcome["submit_seconds"] is not None]
+        end_to_end = [outcome["end_to_end_seconds"] for outcome in results if outcome["status"] == "success"]
+        poll_seconds = [seconds for outcome in results for seconds in outcome["poll_seconds"]]
+        polls = [outcome["polls"] for outcome in results]
+        report = {
+            "mode": self.mode,
+            "replicas": len(self.pollers) or 1,
+            "sessions": len(results),
+            "statuses": statuses,
+            "elapsed_seconds": round(elapsed, 3),
+            "completions_per_minute": round(statuses.get("success", 0) * 60 / elapsed, 2) if elapsed > 0 else 0.0,
+            "submissions_per_second": round(len(submit_seconds) / elapsed, 2) if elapsed > 0 else 0.0,
+            "total_polls": sum(polls),
+            "pool": self.client.pool_stats()
+        }
+        for name, values in (("submit", submit_seconds), ("poll", poll_seconds), ("end_to_end", end_to_end)):
+            if values:
+                report[f"{name}_seconds"] = {
+                    f"p{q}": round(percentile(values, q), 4) for q in (50, 95, 99)
+                }
+        return report
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the submit/poll path against the mock API.")
+    parser.add_argument("--sessions", type=int, default=LOADTEST_SESSIONS, help="simulated sessions")
+    parser.add_argument("--mode", choices=["shared", "direct"], default="shared", help="how sessions wait for results")
+    parser.add_argument("--ramp-up", type=float, default=LOADTEST_RAMP_UP, help="seconds over which sessions start")
+    parser.add_argument("--poll-interval", type=float, default=LOADTEST_POLL_INTERVAL, help="direct mode poll interval")
+    parser.add_argument("--callbacks", action="store_true", help="receive completion callbacks; poll only as a fallback (shared mode)")
+    parser.add_argument("--fallback-interval", type=float, default=CALLBACK_FALLBACK_INTERVAL, help="fallback poll interval with --callbacks")
+    parser.add_argument("--replicas", type=int, default=1, help="app replicas sharing the sessions (shared mode)")
+    parser.add_argument("--state-backend", choices=["memory", "sqlite", "redis"], help="state shared by the replicas (default: none)")
+    parser.add_argument("--state-url", help="SQLite file or Redis URL for --state-backend (default: a temporary one)")
+    parser.add_argument("--base-url", help="use a running API (e.g. mock_api.py) instead of an in-process mock")
+    parser.add_argument("--trace-memory", action="store_true", help="also report Python heap peak (slower)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    add_mock_arguments(parser)
+    args = parser.parse_args(argv)
+    if (args.callbacks or args.replicas > 1) and args.mode != "shared":
+        parser.error("--callbacks and --replicas need --mode shared")
+
+    server = None
+    if args.base_url:
+        base_url = args.base_url
+    else:
+        server = start_mock_server(settings_from_args(args), port=0)
+        base_url = f"http://127.0.0.1:{server.server_port}"
+
+    if args.trace_memory:
+        tracemalloc.start()
+    client = PooledHTTPClient(base_url=base_url)
+    state = None
+    if args.state_backend:
+        state_url = args.state_url
+        if not state_url and args.state_backend == "sqlite":
+            state_url = f"{tempfile.mkdtemp(prefix='loadtest-state-')}/state.sqlite3"
+        elif not state_url and args.state_backend == "redis":
+            state_url = f"redis://127.0.0.1:{start_mock_redis(port=0).server_address[1]}/0"
+        state = create_state_backend(args.state_backend, state_url or "")
+    load_test = LoadTest(
+        client,
+        args.sessions,
+        args.mode,
+        args.ramp_up,
+        args.poll_interval,
+        expected_duration=args.delay,
+        fallback_interval=args.fallback_interval if args.callbacks else None,
+        replicas=args.replicas,
+        state=state
+    )
+    if args.callbacks:
+        # Callbacks reach one replica; the state backend passes them on to the others
+        token = CALLBACK_TOKEN or secrets.token_urlsafe(24)
+        receiver = start_callback_server(load_test.pollers[0], "127.0.0.1", 0, token, client)
+        client.callback_url = callback_url(f"http://127.0.0.1:{receiver.server_port}", token)
+    report = load_test.run()
+    report["callbacks"] = args.callbacks
+    report["state_backend"] = args.state_backend
+    if server is not None:
+        report["api_calls"] = server.state.counts()
+    report["peak_rss_mb"] = peak_rss_mb()
+    if args.trace_memory:
+        report["peak_heap_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+        tracemalloc.stop()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+    mode = report["mode"] + (" + callbacks" if report["callbacks"] else "")
+    if report["replicas"] > 1:
+        mode += f", {report['replicas']} replicas sharing {report['state_backend'] or 'nothing'}"
+    print(f"{report['sessions']} sessions ({mode}) in {report['elapsed_seconds']:.1f}s: {report['statuses']}")
+    print(
+        f"Throughput: {report['submissions_per_second']:.2f} submissions/s, "
+        f"{report['completions_per_minute']:.2f} completions/min, {report['total_polls']} polls"
+    )
+    for name in ("submit", "poll", "end_to_end"):
+        latencies = report.get(f"{name}_seconds")
+        if latencies:
+            print(f"  {name:<11} p50 {latencies['p50']:.4f}s  p95 {latencies['p95']:.4f}s  p99 {latencies['p99']:.4f}s")
+    print(f"Pool: {report['pool']['hits']} hits, {report['pool']['misses']} misses")
+    if "api_calls" in report:
+        calls = report["api_calls"]
+        print(
+            f"API calls: {calls['submits']} submits, {calls['polls']} polls, "
+            f"{calls['callbacks']} callbacks ({calls['callbacks_failed']} failed)"
+        )
+    memory = f"Peak RSS: {report['peak_rss_mb']} MB"
+    if "peak_heap_mb" in report:
+        memory += f", Python heap peak: {report['peak_heap_mb']} MB"
+    print(memory)
+    return 1 if report["statuses"].get("timeout") else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
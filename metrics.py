@@ -0,0 +1,239 @@
+"""In-process latency and throughput metrics for the submit/poll lifecycle.
+
+Counters and histograms live in memory and are rendered in the Prometheus text
+format, either on the app's metrics page or on a small local endpoint. Each
+lifecycle event is also written as one JSON log line keyed by request_id.
+Nothing here talks to the network unless the endpoint is started.
+"""
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+# Metrics settings
+METRICS_LOG_PATH = os.getenv("METRICS_LOG_PATH", "")  # Append JSON event lines here (disabled when empty)
+METRICS_SERVER_PORT = int(os.getenv("METRICS_SERVER_PORT", "0"))  # Serve /metrics on this port (0 disables it)
+METRICS_SERVER_HOST = os.getenv("METRICS_SERVER_HOST", "127.0.0.1")
+
+# Bucket upper bounds (seconds)
+HTTP_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+GENERATION_BUCKETS = (30, 60, 120, 180, 240, 300, 450, 600, 900, 1800)
+DISPLAY_BUCKETS = (0.1, 0.5, 1, 2, 3, 5, 10, 30)
+POLL_COUNT_BUCKETS = (1, 2, 5, 10, 15, 20, 30, 50, 100)
+RECOVERY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+LabelValues = Tuple[str, ...]
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> Dict[LabelValues, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_number(value)}"
+            for key, value in sorted(self.samples().items())
+        ]
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float], label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self.label_names = tuple(label_names)
+        # label values -> [per-bucket counts (+Inf last), count, sum]
+        self._values: Dict[LabelValues, List[Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0, 0.0]
+            entry[0][index] += 1
+            entry[1] += 1
+            entry[2] += value
+
+    def samples(self) -> Dict[LabelValues, Dict[str, Any]]:
+        """Per label set: count, sum and cumulative bucket counts."""
+        with self._lock:
+            values = {key: (list(entry[0]), entry[1], entry[2]) for key, entry in self._values.items()}
+        samples = {}
+        for key, (bucket_counts, count, total) in values.items():
+            cumulative = []
+            running = 0
+            for bucket_count in bucket_counts:
+                running += bucket_count
+                cumulative.append(running)
+            samples[key] = {"count": count, "sum": total, "cumulative": cumulative}
+        return samples
+
+    def quantile(self, q: float, **labels: str) -> Optional[float]:
+        """Estimate a quantile by linear interpolation inside the matching bucket."""
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        sample = self.samples().get(key)
+        if not sample or not sample["count"]:
+            return None
+        rank = q * sample["count"]
+        lower_bound, lower_count = 0.0, 0
+        for bound, cumulative in zip(self.buckets + (float("inf"),), sample["cumulative"]):
+            if cumulative >= rank:
+                if bound == float("inf"):
+                    return self.buckets[-1] if self.buckets else None
+                fraction = (rank - lower_count) / (cumulative - lower_count) if cumulative > lower_count else 0
+                return lower_bound + (bound - lower_bound) * fraction
+            lower_bound, lower_count = bound, cumulative
+        return None
+
+    def render(self) -> List[str]:
+        lines = []
+        for key, sample in sorted(self.samples().items()):
+            for bound, cumulative in zip(self.buckets + (float("inf"),), sample["cumulative"]):
+                le = "+Inf" if bound == float("inf") else _format_number(bound)
+                bucket_labels = _format_labels(self.label_names, key, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_count{labels} {sample['count']}")
+            lines.append(f"{self.name}_sum{labels} {_format_number(sample['sum'])}")
+        return lines
+
+class MetricsRegistry:
+    """Named collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, label_names))
+
+    def histogram(self, name: str, documentation: str, buckets: Sequence[float], label_names: Sequence[str] = ()) -> Histogram:
+        return self._register(Histogram(name, documentation, buckets, label_names))
+
+    def _register(self, metric: Any) -> Any:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def metrics(self) -> List[Any]:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self.metrics():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = MetricsRegistry()
+
+# Lifecycle metrics
+SUBMIT_SECONDS = REGISTRY.histogram(
+    "design_submit_seconds", "Round trip of the design POST (time to 202 when accepted).", HTTP_BUCKETS, ("outcome",)
+)
+STATUS_POLL_SECONDS = REGISTRY.histogram(
+    "design_status_poll_seconds", "Round trip of one status poll, including the streamed body.", HTTP_BUCKETS, ("outcome",)
+)
+POLLS_PER_REQUEST = REGISTRY.histogram(
+    "design_polls_per_request", "Status polls needed before a request reached a final status.", POLL_COUNT_BUCKETS
+)
+GENERATION_SECONDS = REGISTRY.histogram(
+    "design_generation_seconds", "Time from submission until the poller saw a final status.", GENERATION_BUCKETS, ("code_major",)
+)
+DISPLAY_SECONDS = REGISTRY.histogram(
+    "design_result_display_seconds", "Time from the poller seeing a final status until a viewer showed it.", DISPLAY_BUCKETS
+)
+SCRIPT_RUNS = REGISTRY.counter("app_script_runs_total", "Full Streamlit script runs per view.", ("view",))
+STATUS_REFRESHES = REGISTRY.counter("app_status_refreshes_total", "Progress fragment reruns.")
+API_DEFERRED = REGISTRY.counter(
+    "design_api_deferred_total", "Calls held back by the client rate limit or circuit breaker.", ("call", "reason")
+)
+CIRCUIT_OPENED = REGISTRY.counter("design_api_circuit_opened_total", "Times the circuit breaker opened.")
+RECOVERY_SECONDS = REGISTRY.histogram(
+    "app_recovery_seconds", "Time to replay the submission journal and resume polling after a start.", RECOVERY_BUCKETS
+)
+RECOVERED_JOBS = REGISTRY.counter(
+    "app_recovered_submissions_total", "Unfinished submissions taken over from the journal.", ("outcome",)
+)
+CALLBACKS_RECEIVED = REGISTRY.counter(
+    "design_callbacks_received_total", "Completion callbacks received from the design API.", ("outcome",)
+)
+
+# One JSON line per lifecycle event
+logger = logging.getLogger("design_metrics")
+if METRICS_LOG_PATH:
+    _handler = logging.FileHandler(METRICS_LOG_PATH, encoding="utf-8")
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+def log_event(event: str, request_id: Optional[str], **fields: Any) -> None:
+    """Write a structured log line for a request lifecycle event."""
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    record = {"ts": round(time.time(), 3), "event": event, "request_id": request_id}
+    record.update(fields)
+    logger.info(json.dumps(record, default=str))
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry = None
+
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404, "Not found")
+            return
+        body = self.registry.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+def start_metrics_server(registry: MetricsRegistry, host: str, port: int) -> ThreadingHTTPServer:
+    """Serve /metrics on a background thread."""
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
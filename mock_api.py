@@ -0,0 +1,274 @@
+"""Offline stand-in for the AI Auto Design API, for local development and load tests.
+
+    python mock_api.py --port 8765 --delay 20 --payload-kb 2048 --failure-rate 0.05
+
+Then run the app (or batch.py / sweep.py) against it with
+API_BASE_URL=http://127.0.0.1:8765. Submissions answer 202 with a location;
+the result endpoint reports "processing" until the configured delay has passed
+and then returns a generated design of roughly the requested size. Submissions
+sent with a callback URL (design_api.CALLBACK_HEADER) also get the final
+status POSTed to it when they finish, like the real service.
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import urllib.request
+import uuid
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+# Paths of the real service
+API_SUBMIT_PATH = "/api/v1/ai-auto-design"
+API_RESULT_PATH = "/api/v1/ai-auto-design-result"
+
+# Mock defaults
+MOCK_PORT = 8765
+MOCK_DELAY = 20.0  # Seconds until a request finishes
+MOCK_DELAY_JITTER = 0.2  # +/- fraction of randomness in the delay
+MOCK_PAYLOAD_BYTES = 256 * 1024  # Approximate size of a finished design
+MOCK_CALLBACK_TIMEOUT = 10.0  # Seconds to wait for a callback receiver
+CALLBACK_HEADER = "X-Callback-Url"  # Same as design_api.CALLBACK_HEADER
+
+class MockSettings:
+    """Behaviour of the mock server. Rates are probabilities between 0 and 1."""
+
+    def __init__(
+        self,
+        delay: float = MOCK_DELAY,
+        delay_jitter: float = MOCK_DELAY_JITTER,
+        payload_bytes: int = MOCK_PAYLOAD_BYTES,
+        submit_error_rate: float = 0.0,
+        poll_error_rate: float = 0.0,
+        failure_rate: float = 0.0,
+        retry_after: Optional[float] = None,
+        callback_drop_rate: float = 0.0
+    ):
+        self.delay = delay
+        self.delay_jitter = delay_jitter
+        self.payload_bytes = payload_bytes
+        self.submit_error_rate = submit_error_rate
+        self.poll_error_rate = poll_error_rate
+        self.failure_rate = failure_rate
+        self.retry_after = retry_after
+        self.callback_drop_rate = callback_drop_rate
+
+@lru_cache(maxsize=8)
+def design_payload(payload_bytes: int) -> bytes:
+    """JSON text of a fake design of roughly payload_bytes, built once per size."""
+    item_template = {
+        "id": "",
+        "baseItemType": "",
+        "catalogItemId": 0,
+        "position": {"x": 0, "y": 0, "z": 0},
+        "rotation": {"z": 0},
+        "dimensions": {"width": 600, "depth": 600, "height": 900}
+    }
+    item_size = len(json.dumps(item_template)) + 40
+    item_types = [
+        "cabinetry.cabinet",
+        "cabinetry.cabinet",
+        "cabinetry.cabinet",
+        "appliance.cooktop",
+        "appliance.refrigerator",
+        "appliance.dishwasher",
+        "plumbingFixture.sink",
+        "worktop.slab"
+    ]
+    items: List[Dict[str, Any]] = []
+    for index in range(max(1, payload_bytes // item_size)):
+        item = dict(item_template)
+        item["id"] = f"item-{index:06d}"
+        item["baseItemType"] = item_types[index % len(item_types)]
+        item["catalogItemId"] = 8204 + index % 17
+        # A 10 x 10 grid of 600 mm cells filling the room, stacked once it is full
+        item["position"] = {"x": index % 10 * 600, "y": index // 10 % 10 * 600, "z": index // 100 * 900}
+        items.append(item)
+    design = {
+        "spaces": [{
+            "id": "mock-space",
+            "walls": {
+                "perimeterWalls": [
+                    {"id": f"wall-{index}", "startPosition": position, "thickness": 150, "startHeight": 3200, "endHeight": 3200}
+                    for index, position in enumerate([[0, 0], [6000, 0], [6000, 6000], [0, 6000]])
+                ]
+            },
+            "items": items
+        }]
+    }
+    return json.dumps(design, separators=(",", ":")).encode("utf-8")
+
+class MockState:
+    """Submitted requests, when each one finishes and how many calls were made."""
+
+    def __init__(self, settings: MockSettings):
+        self.settings = settings
+        self._requests: Dict[str, Dict[str, Any]] = {}
+        self._counts = {"submits": 0, "polls": 0, "callbacks": 0, "callbacks_failed": 0}
+        self._lock = threading.Lock()
+
+    def submit(self, callback_url: Optional[str] = None) -> str:
+        request_id = uuid.uuid4().hex
+        delay = self.settings.delay * (1 + random.uniform(-self.settings.delay_jitter, self.settings.delay_jitter))
+        with self._lock:
+            self._requests[request_id] = {
+                "ready_at": time.time() + delay,
+                "failed": random.random() < self.settings.failure_rate
+            }
+            self._counts["submits"] += 1
+        if callback_url and random.random() >= self.settings.callback_drop_rate:
+            timer = threading.Timer(delay, self._send_callback, (request_id, callback_url))
+            timer.daemon = True
+            timer.start()
+        return request_id
+
+    def status(self, request_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._counts["polls"] += 1
+            return self._requests.get(request_id)
+
+    def final_body(self, request: Dict[str, Any]) -> bytes:
+        """The status response of a finished request."""
+        if request["failed"]:
+            return b'{"codeMajor":"failure","codeMinor":"no_feasible_layout"}'
+        return b'{"codeMajor":"success","codeMinor":"ok","result":' + design_payload(self.settings.payload_bytes) + b"}"
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+    def _send_callback(self, request_id: str, callback_url: str) -> None:
+        with self._lock:
+            request = self._requests[request_id]
+        separator = "&" if "?" in callback_url else "?"
+        callback = urllib.request.Request(
+            f"{callback_url}{separator}request_id={request_id}",
+            data=self.final_body(request),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        try:
+            with urllib.request.urlopen(callback, timeout=MOCK_CALLBACK_TIMEOUT):
+                outcome = "callbacks"
+        except OSError:
+            # Like the real service, a failed callback isn't retried; the client's fallback poll picks it up
+            outcome = "callbacks_failed"
+        with self._lock:
+            self._counts[outcome] += 1
+
+class _MockHandler(BaseHTTPRequestHandler):
+    state: MockState = None
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real service
+
+    def do_POST(self) -> None:
+        # Drain the body so the connection can be reused
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if urlparse(self.path).path != API_SUBMIT_PATH:
+            self._send_json(404, {"error": "Not found"})
+            return
+        if random.random() < self.state.settings.submit_error_rate:
+            self._send_json(503, {"error": "Service unavailable"})
+            return
+        request_id = self.state.submit(self.headers.get(CALLBACK_HEADER))
+        location = f"{API_RESULT_PATH}?request_id={request_id}"
+        self._send_json(202, {"request_id": request_id, "codeMajor": "processing"}, {"Location": location})
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        if url.path != API_RESULT_PATH:
+            self._send_json(404, {"error": "Not found"})
+            return
+        request_id = parse_qs(url.query).get("request_id", [""])[0]
+        request = self.state.status(request_id)
+        if request is None:
+            self._send_json(404, {"error": f"Unknown request_id {request_id}"})
+            return
+        settings = self.state.settings
+        if random.random() < settings.poll_error_rate:
+            self._send_json(500, {"error": "Internal server error"})
+            return
+        if time.time() < request["ready_at"]:
+            headers = {"Retry-After": str(settings.retry_after)} if settings.retry_after else {}
+            self._send_json(200, {"codeMajor": "processing", "codeMinor": "generating"}, headers)
+            return
+        self._send(200, self.state.final_body(request))
+
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        self._send(status, json.dumps(payload).encode("utf-8"), headers)
+
+    def _send(self, status: int, body: bytes, headers: Optional[Dict[str, str]] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+class _MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address) -> None:
+        # Clients dropping keep-alive connections at exit are expected under load
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+def start_mock_server(settings: MockSettings, host: str = "127.0.0.1", port: int = MOCK_PORT) -> ThreadingHTTPServer:
+    """Serve the mock API on a background thread. Use port 0 for a free port.
+
+    The server's MockState is available as server.state.
+    """
+    handler = type("MockHandler", (_MockHandler,), {"state": MockState(settings)})
+    server = _MockServer((host, port), handler)
+    server.state = handler.state
+    threading.Thread(target=server.serve_forever, name="mock-api", daemon=True).start()
+    return server
+
+def add_mock_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--delay", type=float, default=MOCK_DELAY, help="seconds until a request finishes")
+    parser.add_argument("--delay-jitter", type=float, default=MOCK_DELAY_JITTER, help="+/- fraction of randomness")
+    parser.add_argument("--payload-kb", type=int, default=MOCK_PAYLOAD_BYTES // 1024, help="size of a finished design")
+    parser.add_argument("--submit-error-rate", type=float, default=0.0, help="fraction of submissions answered 503")
+    parser.add_argument("--poll-error-rate", type=float, default=0.0, help="fraction of polls answered 500")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of requests ending in failure")
+    parser.add_argument("--retry-after", type=float, help="send Retry-After (seconds) while processing")
+    parser.add_argument("--callback-drop-rate", type=float, default=0.0, help="fraction of completion callbacks never sent")
+
+def settings_from_args(args: argparse.Namespace) -> MockSettings:
+    return MockSettings(
+        args.delay,
+        args.delay_jitter,
+        args.payload_kb * 1024,
+        args.submit_error_rate,
+        args.poll_error_rate,
+        args.failure_rate,
+        args.retry_after,
+        args.callback_drop_rate
+    )
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run a local mock of the AI Auto Design API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=MOCK_PORT)
+    add_mock_arguments(parser)
+    args = parser.parse_args(argv)
+
+    server = start_mock_server(settings_from_args(args), args.host, args.port)
+    print(f"Mock API listening on http://{args.host}:{server.server_port} (API_BASE_URL for the app)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+"""Offline stand-in for a Redis server, for trying the redis state backend locally.
+
+    python mock_redis.py --port 6380
+
+Then run app replicas with STATE_BACKEND=redis STATE_BACKEND_URL=redis://127.0.0.1:6380/0.
+Only what state_backend.RedisStateBackend uses is implemented: PING, GET,
+SET (with NX, XX, EX and PX), DEL and EXISTS, transactions (WATCH, UNWATCH,
+MULTI, EXEC and DISCARD), plus the connection setup commands redis-py sends (HELLO answers for
+RESP2 only).
+Data lives in memory and is lost on exit.
+"""
+import argparse
+import socketserver
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Mock defaults
+MOCK_REDIS_PORT = 6380  # Not 6379, so it doesn't clash with a real server
+
+class MockRedisStore:
+    """Keys, values and expiry times, plus a version per key for WATCH."""
+
+    def __init__(self):
+        self._data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self._versions: Dict[bytes, int] = {}
+        # Re-entrant, so EXEC can run queued commands while holding it
+        self.lock = threading.RLock()
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        with self.lock:
+            return self._live(key)
+
+    def set(self, key: bytes, value: bytes, ttl: Optional[float], nx: bool, xx: bool) -> bool:
+        with self.lock:
+            exists = self._live(key) is not None
+            if (nx and exists) or (xx and not exists):
+                return False
+            self._data[key] = (value, time.time() + ttl if ttl is not None else None)
+            self._touch(key)
+            return True
+
+    def delete(self, keys: List[bytes]) -> int:
+        deleted = 0
+        with self.lock:
+            for key in keys:
+                if self._live(key) is not None:
+                    del self._data[key]
+                    self._touch(key)
+                    deleted += 1
+        return deleted
+
+    def exists(self, keys: List[bytes]) -> int:
+        with self.lock:
+            return sum(self._live(key) is not None for key in keys)
+
+    def version(self, key: bytes) -> int:
+        """Changes whenever the key is written, deleted or expires."""
+        with self.lock:
+            self._live(key)
+            return self._versions.get(key, 0)
+
+    def _live(self, key: bytes) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.time():
+            del self._data[key]
+            self._touch(key)
+            return None
+        return value
+
+    def _touch(self, key: bytes) -> None:
+        self._versions[key] = self._versions.get(key, 0) + 1
+
+class _CommandError(Exception):
+    pass
+
+class _MockRedisHandler(socketserver.StreamRequestHandler):
+    store: MockRedisStore = None
+
+    def handle(self) -> None:
+        # Per connection: versions of the WATCHed keys, and commands queued after MULTI
+        self.watched: Dict[bytes, int] = {}
+        self.queued: Optional[List[List[bytes]]] = None
+        while True:
+            try:
+                command = self._read_command()
+            except (ValueError, IndexError):
+                self._write(b"-ERR Protocol error\r\n")
+                return
+            if command is None:
+                return
+            try:
+                reply = self._transaction(command)
+            except _CommandError as e:
+                reply = f"-ERR {e}\r\n".encode("utf-8")
+            self._write(reply)
+
+    def _transaction(self, command: List[bytes]) -> bytes:
+        """Handle the transaction commands; anything else runs now or is queued after MULTI."""
+        name = command[0].upper()
+        if name == b"MULTI":
+            if self.queued is not None:
+                raise _CommandError("MULTI calls can not be nested")
+            self.queued = []
+            return b"+OK\r\n"
+        if name == b"WATCH":
+            if self.queued is not None:
+                raise _CommandError("WATCH inside MULTI is not allowed")
+            if len(command) < 2:
+                raise _CommandError("wrong number of arguments for 'watch' command")
+            for key in command[1:]:
+                self.watched.setdefault(key, self.store.version(key))
+            return b"+OK\r\n"
+        if name == b"UNWATCH":
+            self.watched = {}
+            return b"+OK\r\n"
+        if name == b"DISCARD":
+            if self.queued is None:
+                raise _CommandError("DISCARD without MULTI")
+            self.queued, self.watched = None, {}
+            return b"+OK\r\n"
+        if name == b"EXEC":
+            if self.queued is None:
+                raise _CommandError("EXEC without MULTI")
+            queued, watched = self.queued, self.watched
+            self.queued, self.watched = None, {}
+            with self.store.lock:
+                if any(self.store.version(key) != version for key, version in watched.items()):
+                    # A watched key changed since WATCH: nothing runs
+                    return b"*-1\r\n"
+                replies = []
+                for queued_command in queued:
+                    try:
+                        replies.append(self._execute(queued_command))
+                    except _CommandError as e:
+                        replies.append(f"-ERR {e}\r\n".encode("utf-8"))
+            return f"*{len(replies)}\r\n".encode("ascii") + b"".join(replies)
+        if self.queued is not None:
+            self.queued.append(command)
+            return b"+QUEUED\r\n"
+        return self._execute(command)
+
+    def _read_command(self) -> Optional[List[bytes]]:
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            # Inline command, as typed into telnet
+            return line.split() or [b"PING"]
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def _execute(self, command: List[bytes]) -> bytes:
+        name, args = command[0].upper(), command[1:]
+        if name == b"PING":
+            return _bulk(args[0]) if args else b"+PONG\r\n"
+        if name == b"HELLO":
+            # Only RESP2; a client asking for RESP3 gets the error real servers send
+            if args and args[0] != b"2":
+                return b"-NOPROTO unsupported protocol version\r\n"
+            fields = [b"server", b"redis", b"version", b"7.0.0", b"proto", 2, b"id", 1,
+                      b"mode", b"standalone", b"role", b"master", b"modules", []]
+            return b"*%d\r\n" % len(fields) + b"".join(
+                b":%d\r\n" % field if isinstance(field, int)
+                else b"*0\r\n" if isinstance(field, list)
+                else _bulk(field)
+                for field in fields
+            )
+        if name in (b"CLIENT", b"SELECT"):
+            return b"+OK\r\n"
+        if name == b"GET":
+            _arity(args, 1)
+            return _bulk(self.store.get(args[0]))
+        if name == b"SET":
+            if len(args) < 2:
+                raise _CommandError("wrong number of arguments for 'set' command")
+            ttl, nx, xx = None, False, False
+            options = [option.upper() for option in args[2:]]
+            index = 0
+            while index < len(options):
+                option = options[index]
+                if option in (b"EX", b"PX") and index + 1 < len(options):
+                    ttl = float(options[index + 1]) / (1000 if option == b"PX" else 1)
+                    index += 2
+                elif option == b"NX":
+                    nx = True
+                    index += 1
+                elif option == b"XX":
+                    xx = True
+                    index += 1
+                else:
+                    raise _CommandError("syntax error")
+            return b"+OK\r\n" if self.store.set(args[0], args[1], ttl, nx, xx) else b"$-1\r\n"
+        if name in (b"DEL", b"EXISTS"):
+            if not args:
+                raise _CommandError(f"wrong number of arguments for '{name.decode().lower()}' command")
+            count = self.store.delete(args) if name == b"DEL" else self.store.exists(args)
+            return f":{count}\r\n".encode("ascii")
+        raise _CommandError(f"unknown command '{name.decode(errors='replace')}'")
+
+    def _write(self, reply: bytes) -> None:
+        self.wfile.write(reply)
+        self.wfile.flush()
+
+def _arity(args: List[bytes], count: int) -> None:
+    if len(args) != count:
+        raise _CommandError("wrong number of arguments")
+
+def _bulk(value: Optional[bytes]) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    return b"$" + str(len(value)).encode("ascii") + b"\r\n" + value + b"\r\n"
+
+class _MockRedisServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+def start_mock_redis(host: str = "127.0.0.1", port: int = MOCK_REDIS_PORT) -> socketserver.ThreadingTCPServer:
+    """Serve the mock on a background thread. Use port 0 for a free port."""
+    handler = type("MockRedisHandler", (_MockRedisHandler,), {"store": MockRedisStore()})
+    server = _MockRedisServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, name="mock-redis", daemon=True).start()
+    return server
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run a local Redis-compatible stand-in for the state backend.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=MOCK_REDIS_PORT)
+    args = parser.parse_args(argv)
+
+    server = start_mock_redis(args.host, args.port)
+    print(f"Mock Redis listening on redis://{args.host}:{server.server_address[1]}/0 (STATE_BACKEND_URL for the app)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
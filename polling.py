@@ -0,0 +1,471 @@
+"""Shared status polling: request_id-level cache, adaptive policy and background poller."""
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Tuple, Optional
+
+from design_api import PooledHTTPClient, poll_status
+from job_registry import JobRegistry
+from metrics import GENERATION_SECONDS, POLLS_PER_REQUEST, log_event
+from result_store import ResultStore
+from state_backend import REPLICA_ID, STATE_LEASE_TTL, StateBackend
+
+# Shared status cache settings
+STATUS_CACHE_TTL = 5  # Seconds a "processing" result is shared between viewers
+STATUS_CACHE_TERMINAL_TTL = 3600  # Seconds a final result (success/failure) is kept
+STATUS_CACHE_MAX_ENTRIES = 1000
+LEASED_MESSAGE = "Another app replica is checking this request"
+
+class StatusCache:
+    """Shared, request_id-keyed cache in front of poll_status.
+
+    Concurrent fetches for the same request_id are merged into a single upstream
+    call and every waiter receives its result. Successful responses are kept for
+    STATUS_CACHE_TTL while still processing and STATUS_CACHE_TERMINAL_TTL once final.
+
+    With a state backend, replicas share responses through it and only the replica
+    holding a request's poll lease calls the API. The others answer from the
+    shared response, and take the lease over if its holder stops renewing it.
+    """
+
+    def __init__(
+        self,
+        client: PooledHTTPClient,
+        result_store: Optional[ResultStore] = None,
+        ttl: float = STATUS_CACHE_TTL,
+        terminal_ttl: float = STATUS_CACHE_TERMINAL_TTL,
+        max_entries: int = STATUS_CACHE_MAX_ENTRIES,
+        state: Optional[StateBackend] = None,
+        owner: str = REPLICA_ID,
+        lease_ttl: float = STATE_LEASE_TTL
+    ):
+        self.client = client
+        self.result_store = result_store
+        self.ttl = ttl
+        self.terminal_ttl = terminal_ttl
+        self.max_entries = max_entries
+        self.state = state
+        self.owner = owner
+        self.lease_ttl = lease_ttl
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._in_flight: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "merged": 0, "shared": 0}
+
+    def fetch(self, request_key: str, location_path: str) -> Tuple[bool, Dict[str, Any], Dict[str, Any]]:
+        """Return (success, result, hints) for a request, calling poll_status at most once at a time."""
+        with self._lock:
+            cached = self._entries.get(request_key)
+            if cached is not None:
+                expires_at, result = cached
+                if expires_at > time.time():
+                    self._entries.move_to_end(request_key)
+                    self._stats["hits"] += 1
+                    return True, result, {}
+                del self._entries[request_key]
+        
+        # Final results persisted by an earlier process answer without a network call
+        if self.result_store is not None:
+            stored = self.result_store.get(request_key)
+            if stored is not None:
+                with self._lock:
+                    self._entries[request_key] = (time.time() + self.terminal_ttl, stored)
+                    self._stats["hits"] += 1
+                return True, stored, {}
+        
+        with self._lock:
+            flight = self._in_flight.get(request_key)
+            if flight is None:
+                flight = {"event": threading.Event(), "outcome": None}
+                self._in_flight[request_key] = flight
+                leader = True
+                self._stats["misses"] += 1
+            else:
+                leader = False
+                self._stats["merged"] += 1
+        
+        if not leader:
+            flight["event"].wait()
+            return flight["outcome"]
+        
+        try:
+            outcome = self._fetch_upstream(request_key, location_path)
+        except Exception as e:
+            outcome = (False, {"error": str(e)}, {})
+        
+        with self._lock:
+            flight["outcome"] = outcome
+            del self._in_flight[request_key]
+        flight["event"].set()
+        return outcome
+
+    def _fetch_upstream(self, request_key: str, location_path: str) -> Tuple[bool, Dict[str, Any], Dict[str, Any]]:
+        if self.state is not None:
+            shared = self.state.get_status(request_key)
+            if shared is not None and shared.get("codeMajor", "unknown") != "processing":
+                self._count_shared()
+                self.store(request_key, shared, share=False)
+                return True, shared, {}
+            if not self.state.acquire_lease(request_key, self.owner, self.lease_ttl):
+                # Another replica polls this request; follow its latest response
+                self._count_shared()
+                if shared is None:
+                    return False, {"error": LEASED_MESSAGE, "deferred": True, "retryable": True}, {"retry_after": self.ttl}
+                self.store(request_key, shared, share=False)
+                return True, shared, {}
+        outcome = poll_status(location_path, self.client)
+        success, result, _ = outcome
+        if success:
+            self.store(request_key, result)
+        return outcome
+
+    def _count_shared(self) -> None:
+        with self._lock:
+            self._stats["shared"] += 1
+
+    def store(self, request_key: str, result: Dict[str, Any], share: bool = True) -> None:
+        """Cache a status response, persisting it if final. Used for polls and pushed callbacks alike.
+
+        share=False keeps a response that came from the state backend out of it.
+        """
+        is_terminal = result.get("codeMajor", "unknown") != "processing"
+        if is_terminal and self.result_store is not None:
+            try:
+                self.result_store.put(request_key, result)
+            except sqlite3.Error:
+                # The store is only an optimisation; never fail a poll because of it
+                pass
+        if share and self.state is not None:
+            try:
+                self.state.put_status(request_key, result, self.terminal_ttl if is_terminal else self.lease_ttl)
+            except Exception:
+                # Other replicas poll for themselves once the lease runs out
+                pass
+        with self._lock:
+            ttl = self.terminal_ttl if is_terminal else self.ttl
+            self._entries[request_key] = (time.time() + ttl, result)
+            self._entries.move_to_end(request_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def release(self, request_key: str) -> None:
+        """Give up this replica's poll lease on a request, so another replica can take it over."""
+        if self.state is None:
+            return
+        try:
+            self.state.release_lease(request_key, self.owner)
+        except Exception:
+            # The lease expires on its own
+            pass
+
+    def get(self, request_key: str) -> Optional[Dict[str, Any]]:
+        """The cached status of a request if there is an unexpired one, without calling the API."""
+        with self._lock:
+            cached = self._entries.get(request_key)
+            if cached is None or cached[0] <= time.time():
+                return None
+            return cached[1]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries))
+
+# Adaptive polling settings
+POLL_EXPECTED_DURATION = 180  # Initial guess for how long a generation takes (seconds)
+POLL_MIN_INTERVAL = 2  # Never poll the same request more often than this (seconds)
+POLL_MAX_INTERVAL = 30  # Never leave a request unpolled for longer than this (seconds)
+POLL_JITTER = 0.2  # +/- fraction of randomness so sessions don't poll in lockstep
+POLL_ESTIMATE_SMOOTHING = 0.2  # Weight of each new completion time in the running estimate
+
+class PollingPolicy:
+    """Decides when to poll a request next.
+
+    Polls sparsely while a request is far from its expected completion time, densely
+    as it gets close, and backs off exponentially once it runs late. The expected
+    duration is a running average of completion times observed in this process.
+    Retry-After hints from the server always take precedence.
+    """
+
+    def __init__(
+        self,
+        expected_duration: float = POLL_EXPECTED_DURATION,
+        min_interval: float = POLL_MIN_INTERVAL,
+        max_interval: float = POLL_MAX_INTERVAL,
+        jitter: float = POLL_JITTER,
+        smoothing: float = POLL_ESTIMATE_SMOOTHING
+    ):
+        self.expected_duration = expected_duration
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self.smoothing = smoothing
+        self._submitted: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def note_submitted(self, request_id: str, submitted_at: Optional[float] = None) -> None:
+        """Remember when a request was submitted so its completion time can be learned."""
+        with self._lock:
+            self._submitted[request_id] = submitted_at or time.time()
+            while len(self._submitted) > 1000:
+                self._submitted.popitem(last=False)
+
+    def submitted_at(self, request_id: str) -> Optional[float]:
+        with self._lock:
+            return self._submitted.get(request_id)
+
+    def record_completion(self, duration: float) -> None:
+        """Fold an observed submit-to-completion time into the running estimate."""
+        if duration <= 0:
+            return
+        with self._lock:
+            self.expected_duration += self.smoothing * (duration - self.expected_duration)
+
+    def estimated_remaining(self, elapsed: float) -> float:
+        return max(0.0, self.expected_duration - elapsed)
+
+    def next_delay(self, elapsed: float, late_polls: int, hints: Optional[Dict[str, Any]] = None) -> float:
+        """Return seconds until the next poll.
+
+        elapsed is the time since the request started; late_polls counts polls made
+        after the expected completion time and drives the exponential backoff.
+        """
+        if hints and hints.get("retry_after") is not None:
+            return max(self.min_interval, hints["retry_after"])
+        
+        remaining = self.expected_duration - elapsed
+        if remaining > 0:
+            # Halve the distance to the expected completion time on each poll
+            delay = remaining / 2
+        else:
+            delay = self.min_interval * (2 ** late_polls)
+        delay = min(self.max_interval, max(self.min_interval, delay))
+        delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        return max(self.min_interval, delay)
+
+# Background poller settings
+POLLER_MAX_WORKERS = int(os.getenv("POLLER_MAX_WORKERS", "4"))  # Concurrent status requests
+POLLER_IDLE_TIMEOUT = 60  # Stop tracking a request nobody has looked at for this many seconds
+POLLER_MAX_ERRORS = 5  # Consecutive timeouts/server errors before polling a request gives up
+
+class StatusPoller:
+    """Background scheduler that polls the result endpoint for outstanding requests.
+
+    Sessions register a request with track() and read the latest status with get();
+    the actual HTTP calls happen on a small worker pool, so no script thread sleeps.
+    With a fallback_interval, requests submitted from this process are expected to
+    complete through deliver() (a completion callback) and are only polled that often,
+    once a first callback has arrived; until then the API may be ignoring them.
+    """
+
+    def __init__(
+        self,
+        status_cache: StatusCache,
+        policy: PollingPolicy,
+        max_workers: int = POLLER_MAX_WORKERS,
+        idle_timeout: float = POLLER_IDLE_TIMEOUT,
+        job_registry: Optional[JobRegistry] = None,
+        fallback_interval: Optional[float] = None
+    ):
+        self.status_cache = status_cache
+        self.policy = policy
+        self.idle_timeout = idle_timeout
+        self.job_registry = job_registry
+        self.fallback_interval = fallback_interval
+        self._callback_received = False
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="status-poller")
+        self._thread = threading.Thread(target=self._run, name="status-poller-scheduler", daemon=True)
+        self._thread.start()
+
+    def track(self, request_key: str, location_path: str) -> None:
+        """Start (or keep) polling a request. Safe to call on every rerun."""
+        now = time.time()
+        with self._lock:
+            job = self._jobs.get(request_key)
+            # Errored requests are retried when a new viewer starts polling them
+            if job is None or (job["done"] and job["error"] is not None):
+                submitted_at = self.policy.submitted_at(request_key)
+                # Our own submissions registered a callback URL; a callback that already
+                # arrived is in the status cache, so only check it straight away then
+                callback = self.fallback_interval is not None and submitted_at is not None and self._callback_received
+                delay_first_poll = callback and self.status_cache.get(request_key) is None
+                job = {
+                    "location_path": location_path,
+                    "next_poll_at": now + self.fallback_interval if delay_first_poll else 0,
+                    "in_flight": False,
+                    "done": False,
+                    "result": None,
+                    "error": None,
+                    "poll_count": 0,
+                    "late_polls": 0,
+                    "errors": 0,  # Consecutive retryable poll errors
+                    "last_error": None,
+                    "deferred": None,  # Why the next poll is being held back on the client, if it is
+                    "last_poll_time": None,
+                    "completed_at": None,
+                    # Only requests submitted from this process have a known start time
+                    "started_at": submitted_at or now,
+                    "observed_submit": submitted_at is not None,
+                    "callback": callback  # Completion is expected to be pushed; polling is the fallback
+                }
+                self._jobs[request_key] = job
+                self._wakeup.set()
+            job["last_access"] = now
+
+    def get(self, request_key: str) -> Optional[Dict[str, Any]]:
+        """Return a snapshot of the latest known status for a request."""
+        with self._lock:
+            job = self._jobs.get(request_key)
+            if job is None:
+                return None
+            job["last_access"] = time.time()
+            return dict(job)
+
+    def untrack(self, request_key: str) -> None:
+        """Stop polling a request and forget its status."""
+        with self._lock:
+            self._jobs.pop(request_key, None)
+
+    def _run(self) -> None:
+        while True:
+            now = time.time()
+            next_wakeup = now + 1.0
+            dropped = []
+            with self._lock:
+                for request_key, job in list(self._jobs.items()):
+                    # Drop requests whose viewers have gone away (closed tab, navigated off)
+                    if now - job["last_access"] > self.idle_timeout:
+                        del self._jobs[request_key]
+                        if not job["done"]:
+                            dropped.append(request_key)
+                        continue
+                    if job["done"] or job["in_flight"]:
+                        continue
+                    if job["next_poll_at"] <= now:
+                        job["in_flight"] = True
+                        self._executor.submit(self._poll, request_key, job["location_path"])
+                    else:
+                        next_wakeup = min(next_wakeup, job["next_poll_at"])
+            for request_key in dropped:
+                self.status_cache.release(request_key)
+            self._wakeup.wait(max(0, next_wakeup - time.time()))
+            self._wakeup.clear()
+
+    def deliver(self, request_key: str, result: Dict[str, Any]) -> None:
+        """Record a final status pushed by a completion callback, as if a poll had returned it.
+
+        A request no session is tracking still updates the status cache and the job registry.
+        """
+        self._callback_received = True
+        self.status_cache.store(request_key, result)
+        self._apply(request_key, True, result, {}, polled=False)
+
+    def _poll(self, request_key: str, location_path: str) -> None:
+        success, result, hints = self.status_cache.fetch(request_key, location_path)
+        self._apply(request_key, success, result, hints, polled=True)
+
+    def _apply(self, request_key: str, success: bool, result: Dict[str, Any], hints: Dict[str, Any], polled: bool) -> None:
+        registry_status = None
+        with self._lock:
+            job = self._jobs.get(request_key)
+            if job is not None:
+                registry_status = self._update_job(request_key, job, success, result, hints, polled)
+            elif not polled:
+                # Pushed for a request nobody is viewing
+                registry_status = (result.get("codeMajor", "unknown"), None)
+        
+        if registry_status is not None and self.job_registry is not None:
+            status, error = registry_status
+            try:
+                self.job_registry.record_status(
+                    request_key,
+                    status,
+                    error,
+                    result_ref=request_key if status not in ("processing", "error") else None
+                )
+            except sqlite3.Error:
+                # The registry is bookkeeping only; never fail a poll because of it
+                pass
+
+    def _update_job(
+        self,
+        request_key: str,
+        job: Dict[str, Any],
+        success: bool,
+        result: Dict[str, Any],
+        hints: Dict[str, Any],
+        polled: bool
+    ) -> Optional[Tuple[str, Optional[str]]]:
+        """Fold one status response into a tracked job. Called with the lock held.
+
+        Returns the (status, error) to record in the job registry, if any.
+        """
+        now = time.time()
+        elapsed = now - job["started_at"]
+        if polled:
+            job["in_flight"] = False
+        if job["done"]:
+            # A callback and a fallback poll raced; the first one wins
+            return None
+        if polled:
+            if not success and result.get("deferred"):
+                # Held back by the client rate limit or circuit breaker; nothing reached the server
+                job["deferred"] = result["error"]
+                job["next_poll_at"] = now + hints["retry_after"]
+                return None
+            job["deferred"] = None
+            job["poll_count"] += 1
+            job["last_poll_time"] = now
+            if elapsed > self.policy.expected_duration:
+                job["late_polls"] += 1
+            job["next_poll_at"] = now + self.policy.next_delay(elapsed, job["late_polls"], hints)
+            if job["callback"]:
+                job["next_poll_at"] = max(job["next_poll_at"], now + self.fallback_interval)
+            # The server may move the status resource
+            if hints.get("location"):
+                job["location_path"] = hints["location"]
+        if success:
+            job["result"] = result
+            job["error"] = None
+            job["errors"] = 0
+            job["last_error"] = None
+            # Stop polling once codeMajor leaves "processing"
+            code_major = result.get("codeMajor", "unknown")
+            if code_major != "processing":
+                job["done"] = True
+                job["completed_at"] = now
+                if job["observed_submit"]:
+                    self.policy.record_completion(elapsed)
+                    GENERATION_SECONDS.observe(elapsed, code_major=code_major)
+                POLLS_PER_REQUEST.observe(job["poll_count"])
+                log_event(
+                    "completed",
+                    request_key,
+                    code_major=code_major,
+                    polls=job["poll_count"],
+                    pushed=not polled,
+                    generation_seconds=round(elapsed, 3) if job["observed_submit"] else None
+                )
+            return code_major, None
+        if hints.get("retry_after") is not None:
+            # Throttled (e.g. 429/503 with Retry-After): keep polling after the delay
+            job["last_error"] = result.get("error")
+        elif result.get("retryable") and job["errors"] < POLLER_MAX_ERRORS:
+            # Timeouts and server errors: back off and try again instead of giving up
+            job["errors"] += 1
+            job["last_error"] = result.get("error")
+            job["next_poll_at"] = now + min(self.policy.max_interval, self.policy.min_interval * 2 ** job["errors"])
+        else:
+            # Stop polling on error
+            job["error"] = result.get("error", "Unknown error")
+            job["done"] = True
+            job["completed_at"] = now
+            log_event("poll_failed", request_key, polls=job["poll_count"], error=job["error"])
+            return "error", job["error"]
+        return None
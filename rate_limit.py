@@ -0,0 +1,134 @@
+"""Client-side rate limiting and circuit breaking for calls to the design API."""
+import os
+import threading
+import time
+from typing import Dict, Any
+
+class TokenBucket:
+    """Thread-safe token bucket allowing `rate` calls per second with bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def try_acquire(self) -> float:
+        """Take a token if one is available. Returns 0, or the seconds to wait for the next token."""
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self) -> None:
+        """Block until a token is available and take it."""
+        while True:
+            wait = self.try_acquire()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+# Circuit breaker settings
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))  # Consecutive failures that open the circuit
+CIRCUIT_OPEN_SECONDS = float(os.getenv("CIRCUIT_OPEN_SECONDS", "15"))  # First wait before trial calls are let through
+CIRCUIT_MAX_OPEN_SECONDS = 120  # Upper bound on the wait after repeated failed recoveries
+CIRCUIT_RECOVERY_SUCCESSES = 4  # Trial calls that must succeed in a row before the circuit closes
+CIRCUIT_PROBE_WAIT = 0.5  # Seconds a caller waits while every trial slot is busy
+
+# Circuit states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    """Stops calls to a failing upstream and lets them back in gradually.
+
+    After failure_threshold consecutive failures the circuit opens and calls are
+    refused for open_seconds. It then half-opens: one trial call may be in flight,
+    and each success allows one more, until recovery_successes in a row close it.
+    A failed trial reopens it with the wait doubled, up to max_open_seconds.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        open_seconds: float = CIRCUIT_OPEN_SECONDS,
+        max_open_seconds: float = CIRCUIT_MAX_OPEN_SECONDS,
+        recovery_successes: int = CIRCUIT_RECOVERY_SUCCESSES
+    ):
+        self.failure_threshold = max(1, failure_threshold)
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.recovery_successes = max(1, recovery_successes)
+        self.state = CLOSED
+        self._failures = 0
+        self._successes = 0
+        self._trials_in_flight = 0
+        self._wait = open_seconds
+        self._retry_at = 0.0
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> float:
+        """Claim permission for one call. Returns 0, or the seconds to wait before asking again."""
+        with self._lock:
+            if self.state == OPEN:
+                wait = self._retry_at - time.monotonic()
+                if wait > 0:
+                    return wait
+                self.state = HALF_OPEN
+                self._successes = 0
+                self._trials_in_flight = 0
+            if self.state == HALF_OPEN:
+                if self._trials_in_flight > self._successes:
+                    return CIRCUIT_PROBE_WAIT
+                self._trials_in_flight += 1
+            return 0.0
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            if self.state != HALF_OPEN:
+                return
+            self._trials_in_flight = max(0, self._trials_in_flight - 1)
+            self._successes += 1
+            if self._successes >= self.recovery_successes:
+                self.state = CLOSED
+                self._wait = self.open_seconds
+
+    def record_failure(self) -> bool:
+        """Count a failed call. Returns True if this failure opened the circuit."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._wait = min(self.max_open_seconds, self._wait * 2)
+                self._open()
+                return True
+            if self.state == CLOSED:
+                self._failures += 1
+                if self._failures >= self.failure_threshold:
+                    self._open()
+                    return True
+            return False
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self._failures = 0
+        self._trials_in_flight = 0
+        self._retry_at = time.monotonic() + self._wait
+        self._opened += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self.state,
+                "opened": self._opened,
+                "retry_in": max(0.0, self._retry_at - time.monotonic()) if self.state == OPEN else 0.0
+            }
@@ -0,0 +1,345 @@
+"""Local validation of request bodies before they are sent.
+
+The schema below describes what build_request_body produces and what the API
+accepts: wall geometry, catalog IDs per item kind and the allowed item types,
+subtypes and materials. compile_schema generates one flat Python function from
+it at import, so validating a body is a run of inline comparisons (tens of
+microseconds) and whole batch files can be checked before anything uses
+upstream capacity.
+
+Supported keywords are a subset of JSON Schema: type, properties, required,
+additionalProperties (bool), items, minItems, maxItems, enum, minimum, maximum
+and minLength, plus "check": a function returning an error message or None,
+run once the value has passed every other keyword.
+"""
+from typing import Callable, Dict, Any, List, Optional
+
+from design_api import (
+    APPLIANCE_CATALOG_IDS,
+    CABINET_CATALOG_IDS,
+    PLUMBING_CATALOG_IDS,
+    WORKTOP_CATALOG_IDS,
+    build_request_body
+)
+from feasibility import FEASIBILITY_CHECK, screen_request_bodies
+
+# What the API accepts
+LAYOUT_TYPES = ("L-Shaped",)  # U- and I-Shaped are not generated yet
+APPLIANCE_TYPES = ("cooktop", "refrigerator", "oven", "range", "dishwasher")
+PLUMBING_TYPES = ("sink",)
+CABINET_TYPES = ("roof", "base", "tall")
+WORKTOP_MATERIALS = ("granite", "quartz", "marble", "wood", "stainless steel", "laminate")
+ROOM_MIN_SIZE = 3500  # mm, per side
+ROOM_MAX_SIZE = 6000
+
+# Catalog IDs and extra preference field for each kind of required item
+ITEM_KINDS = {
+    "appliance": (frozenset(APPLIANCE_CATALOG_IDS), None),
+    "plumbingFixture": (frozenset(PLUMBING_CATALOG_IDS), None),
+    "cabinetry": (frozenset(CABINET_CATALOG_IDS), "subType"),
+    "worktop": (frozenset(WORKTOP_CATALOG_IDS), "material")
+}
+BASE_ITEM_TYPES = (
+    [f"appliance.{value}" for value in APPLIANCE_TYPES]
+    + [f"plumbingFixture.{value}" for value in PLUMBING_TYPES]
+    + ["cabinetry.cabinet", "worktop.slab"]
+)
+_ITEM_KIND_OF = {item_type: item_type.split(".", 1)[0] for item_type in BASE_ITEM_TYPES}
+
+# Python types for each schema type; bool is excluded from the numeric ones separately
+_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool
+}
+
+def _format_path(path: Optional[tuple]) -> str:
+    parts = []
+    while path is not None:
+        path, key = path
+        parts.append(f"[{key}]" if isinstance(key, int) else f".{key}")
+    return "$" + "".join(reversed(parts))
+
+def _report(errors: List[str], path: Optional[tuple], template: str, *args: Any) -> None:
+    errors.append(f"{_format_path(path)}: {template.format(*args)}")
+
+class _SchemaCompiler:
+    """Generates the source of one validation function for a schema.
+
+    Every keyword becomes an inline comparison and every array a plain loop, so
+    a valid body is checked without any per-node function calls. Paths are
+    linked (parent, key) tuples, only built and formatted when reporting an error.
+    """
+
+    def __init__(self):
+        self.lines: List[str] = []
+        self.namespace: Dict[str, Any] = {"_report": _report}
+        self._counter = 0
+
+    def _name(self, prefix: str, value: Any = None) -> str:
+        self._counter += 1
+        name = f"{prefix}{self._counter}"
+        if value is not None:
+            self.namespace[name] = value
+        return name
+
+    def _emit(self, indent: int, line: str) -> None:
+        self.lines.append("    " * indent + line)
+
+    def node(self, schema: Dict[str, Any], var: str, path: str, indent: int) -> None:
+        check = schema.get("check")
+        if check is not None:
+            before = self._name("n")
+            self._emit(indent, f"{before} = len(errors)")
+        type_name = schema.get("type")
+        if type_name:
+            condition = f"not isinstance({var}, {self._name('T', _TYPES[type_name])})"
+            if type_name in ("integer", "number"):
+                condition += f" or isinstance({var}, bool)"
+            self._emit(indent, f"if {condition}:")
+            self._emit(indent + 1, f"_report(errors, {path}, 'expected {type_name}, got {{0}}', type({var}).__name__)")
+            self._emit(indent, "else:")
+            indent += 1
+        body_start = len(self.lines)
+
+        if "enum" in schema:
+            allowed = self._name("E", frozenset(schema["enum"]))
+            listed = ", ".join(repr(value) for value in schema["enum"])
+            self._emit(indent, f"if {var} not in {allowed}:")
+            self._emit(indent + 1, f"_report(errors, {path}, {'{0!r} is not one of ' + listed.replace('{', '{{').replace('}', '}}')!r}, {var})")
+        low, high = schema.get("minimum"), schema.get("maximum")
+        if low is not None or high is not None:
+            conditions = ([f"{var} < {low!r}"] if low is not None else []) + ([f"{var} > {high!r}"] if high is not None else [])
+            self._emit(indent, f"if {' or '.join(conditions)}:")
+            self._emit(indent + 1, f"_report(errors, {path}, {'{0} is outside ' + f'{low}..{high}'!r}, {var})")
+        if "minLength" in schema:
+            self._emit(indent, f"if len({var}) < {schema['minLength']!r}:")
+            self._emit(indent + 1, f"_report(errors, {path}, {'shorter than ' + str(schema['minLength']) + ' characters'!r})")
+
+        for key in schema.get("required", ()):
+            self._emit(indent, f"if {key!r} not in {var}:")
+            self._emit(indent + 1, f"_report(errors, {path}, {'missing ' + repr(key)!r})")
+        properties = schema.get("properties", {})
+        for key, child in properties.items():
+            child_var = self._name("v")
+            self._emit(indent, f"{child_var} = {var}.get({key!r}, _MISSING)")
+            self._emit(indent, f"if {child_var} is not _MISSING:")
+            self.node(child, child_var, f"({path}, {key!r})", indent + 1)
+        if schema.get("additionalProperties") is False:
+            known = self._name("K", frozenset(properties))
+            key_var = self._name("k")
+            self._emit(indent, f"for {key_var} in {var}:")
+            self._emit(indent + 1, f"if {key_var} not in {known}:")
+            self._emit(indent + 2, f"_report(errors, {path}, 'unexpected {{0!r}}', {key_var})")
+
+        min_items, max_items = schema.get("minItems"), schema.get("maxItems")
+        if min_items is not None or max_items is not None:
+            conditions = ([f"len({var}) < {min_items}"] if min_items is not None else []) + ([f"len({var}) > {max_items}"] if max_items is not None else [])
+            self._emit(indent, f"if {' or '.join(conditions)}:")
+            expected = f"{min_items or 0}..{max_items if max_items is not None else ''}"
+            self._emit(indent + 1, f"_report(errors, {path}, {'expected ' + expected + ' items, got {0}'!r}, len({var}))")
+        if "items" in schema:
+            index_var, item_var = self._name("i"), self._name("v")
+            self._emit(indent, f"for {index_var}, {item_var} in enumerate({var}):")
+            self.node(schema["items"], item_var, f"({path}, {index_var})", indent + 1)
+
+        # Checks can rely on the value (and everything in it) matching the rest of the schema
+        if check is not None:
+            function, message = self._name("C", check), self._name("m")
+            self._emit(indent, f"if len(errors) == {before}:")
+            self._emit(indent + 1, f"{message} = {function}({var})")
+            self._emit(indent + 1, f"if {message}:")
+            self._emit(indent + 2, f"_report(errors, {path}, '{{0}}', {message})")
+        if len(self.lines) == body_start:
+            self._emit(indent, "pass")
+
+def compile_schema(schema: Dict[str, Any]) -> Callable[[Any], List[str]]:
+    """Compile a schema into a function returning the list of errors for a value (empty if valid).
+
+    The generated source is kept on the function as .source for debugging.
+    """
+    compiler = _SchemaCompiler()
+    compiler.namespace["_MISSING"] = object()
+    compiler.node(schema, "value", "None", 1)
+    source = "\n".join(["def validate(value):", "    errors = []"] + compiler.lines + ["    return errors"])
+    exec(compile(source, "<request schema>", "exec"), compiler.namespace)
+    validate = compiler.namespace["validate"]
+    validate.source = source
+    return validate
+
+def _check_perimeter(walls: List[Dict[str, Any]]) -> Optional[str]:
+    """The perimeter walls must enclose an axis-aligned rectangle of an allowed size."""
+    points = [tuple(wall["startPosition"]) for wall in walls]
+    xs = sorted({x for x, _ in points})
+    ys = sorted({y for _, y in points})
+    if len(set(points)) != 4 or len(xs) != 2 or len(ys) != 2:
+        return "walls don't form a rectangle"
+    if len({wall["id"] for wall in walls}) != len(walls):
+        return "wall ids are not unique"
+    for size, name in ((xs[1] - xs[0], "width"), (ys[1] - ys[0], "depth")):
+        if not ROOM_MIN_SIZE <= size <= ROOM_MAX_SIZE:
+            return f"room {name} {size} mm is outside {ROOM_MIN_SIZE}-{ROOM_MAX_SIZE} mm"
+    return None
+
+def _check_item_group(group: Dict[str, Any]) -> Optional[str]:
+    """All preferences in a group are one kind of item, with that kind's catalogs and fields."""
+    preferences = group["preferences"]
+    kind = _ITEM_KIND_OF[preferences[0]["baseItemType"]]
+    catalog_ids, extra_field = ITEM_KINDS[kind]
+    for preference in preferences:
+        if _ITEM_KIND_OF[preference["baseItemType"]] != kind:
+            return f"mixes {kind} and {_ITEM_KIND_OF[preference['baseItemType']]} items"
+        if len(preference) != (2 if extra_field else 1) or (extra_field and extra_field not in preference):
+            expected = f"'{extra_field}'" if extra_field else "no other fields"
+            return f"{preference['baseItemType']} preferences take {expected}"
+    if not catalog_ids.issuperset(group["catalogVersionIDs"]):
+        unknown = sorted(set(group["catalogVersionIDs"]) - catalog_ids)
+        return f"catalog IDs {unknown} are not {kind} catalogs"
+    return None
+
+def _check_item_groups(groups: List[Dict[str, Any]]) -> Optional[str]:
+    kinds = {_ITEM_KIND_OF[group["preferences"][0]["baseItemType"]] for group in groups}
+    if len(kinds) != len(groups):
+        return "more than one group for the same item kind"
+    return None
+
+_ID = {"type": "string", "minLength": 1}
+_DIMENSION = {"type": "number", "minimum": 0, "maximum": ROOM_MAX_SIZE}
+
+WALL_SCHEMA = {
+    "type": "object",
+    "required": ["id", "type", "startPosition", "thickness", "startHeight", "endHeight"],
+    "properties": {
+        "id": _ID,
+        "type": {"enum": ["solidWall"]},
+        "name": {"type": "string"},
+        "startPosition": {"type": "array", "items": _DIMENSION, "minItems": 2, "maxItems": 2},
+        "thickness": {"type": "number", "minimum": 50, "maximum": 500},
+        "outdoorPerimeter": {"type": "boolean"},
+        "startHeight": {"type": "number", "minimum": 2000, "maximum": 5000},
+        "endHeight": {"type": "number", "minimum": 2000, "maximum": 5000}
+    }
+}
+
+ITEM_GROUP_SCHEMA = {
+    "type": "object",
+    "required": ["catalogVersionIDs", "preferences"],
+    "additionalProperties": False,
+    "properties": {
+        "catalogVersionIDs": {"type": "array", "items": {"type": "integer"}, "minItems": 1},
+        "preferences": {
+            "type": "array",
+            "minItems": 1,
+            "items": {
+                "type": "object",
+                "required": ["baseItemType"],
+                "additionalProperties": False,
+                "properties": {
+                    "baseItemType": {"enum": BASE_ITEM_TYPES},
+                    "subType": {"enum": list(CABINET_TYPES)},
+                    "material": {"enum": list(WORKTOP_MATERIALS)}
+                }
+            }
+        }
+    },
+    "check": _check_item_group
+}
+
+REQUEST_SCHEMA = {
+    "type": "object",
+    "required": ["sourceDesign", "autoDesignInputs"],
+    "additionalProperties": False,
+    "properties": {
+        "sourceDesign": {
+            "type": "object",
+            "required": ["info", "spaces"],
+            "properties": {
+                "info": {"type": "object", "required": ["formatVersion"]},
+                "spaces": {
+                    "type": "array",
+                    "minItems": 1,
+                    "maxItems": 1,
+                    "items": {
+                        "type": "object",
+                        "required": ["id", "functions", "walls", "floor", "ceiling"],
+                        "properties": {
+                            "id": _ID,
+                            "functions": {"type": "array", "items": {"enum": ["kitchen"]}, "minItems": 1},
+                            "walls": {
+                                "type": "object",
+                                "required": ["perimeterWalls"],
+                                "properties": {
+                                    "perimeterWalls": {
+                                        "type": "array",
+                                        "items": WALL_SCHEMA,
+                                        "minItems": 4,
+                                        "maxItems": 4,
+                                        "check": _check_perimeter
+                                    }
+                                }
+                            },
+                            "floor": {"type": "object", "required": ["id"], "properties": {"id": _ID}},
+                            "ceiling": {"type": "object", "required": ["id"], "properties": {"id": _ID}}
+                        }
+                    }
+                }
+            }
+        },
+        "autoDesignInputs": {
+            "type": "object",
+            "required": ["roomConfig", "requiredItemTypes"],
+            "properties": {
+                "roomConfig": {
+                    "type": "object",
+                    "required": ["functionLayoutType"],
+                    "properties": {
+                        "functionLayoutType": {"enum": list(LAYOUT_TYPES)},
+                        "functionStyle": {"enum": ["modern"]}
+                    }
+                },
+                "requiredItemTypes": {
+                    "type": "array",
+                    "items": ITEM_GROUP_SCHEMA,
+                    "minItems": 1,
+                    "check": _check_item_groups
+                }
+            }
+        }
+    }
+}
+
+validate_request_body = compile_schema(REQUEST_SCHEMA)
+
+def validate_job(job: Dict[str, Any], check_fit: bool = FEASIBILITY_CHECK) -> List[str]:
+    """Errors for one set of selections (a batch row's), checked on the body they build.
+
+    With check_fit, bodies that pass the schema are also checked for whether their
+    items fit the room. The main form checks fit separately with fit_warning, since
+    that estimate only warns there.
+    """
+    try:
+        request_body = _job_request_body(job)
+    except (KeyError, TypeError) as e:
+        return [f"Invalid selections: {e}"]
+    errors = validate_request_body(request_body)
+    if not errors and check_fit:
+        errors = [error for error in screen_request_bodies([request_body]) if error]
+    return errors
+
+def fit_warning(job: Dict[str, Any]) -> str:
+    """feasibility_error for the body one set of schema-valid selections builds, or "" if it fits."""
+    return screen_request_bodies([_job_request_body(job)])[0]
+
+def _job_request_body(job: Dict[str, Any]) -> Dict[str, Any]:
+    return build_request_body(
+        job["appliances"],
+        job["cabinets"],
+        job["worktop"],
+        job["plumbing"],
+        job["layout"],
+        job["width"],
+        job["depth"]
+    )
@@ -0,0 +1,96 @@
+"""Persistent on-disk store for completed design results."""
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Any, Optional
+
+from design_api import dumps_status_response, parse_status_body
+
+# Persistent result store settings
+RESULT_STORE_PATH = os.getenv("RESULT_STORE_PATH", os.path.join(".cache", "results.sqlite3"))
+RESULT_STORE_MAX_BYTES = int(os.getenv("RESULT_STORE_MAX_BYTES", str(512 * 1024 * 1024)))  # 512 MB
+RESULT_STORE_COMPRESS = os.getenv("RESULT_STORE_COMPRESS", "true").lower() in ("1", "true", "yes")
+
+class ResultStore:
+    """SQLite-backed store of final API responses, keyed by request_id.
+
+    Entries are evicted least-recently-used first once the stored payloads exceed
+    max_bytes. Payloads are zlib-compressed when compress is enabled.
+    """
+
+    def __init__(self, path: str = RESULT_STORE_PATH, max_bytes: int = RESULT_STORE_MAX_BYTES, compress: bool = RESULT_STORE_COMPRESS):
+        self.max_bytes = max_bytes
+        self.compress = compress
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                request_id TEXT PRIMARY KEY,
+                code_major TEXT NOT NULL,
+                payload BLOB NOT NULL,
+                compressed INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_results_last_access ON results (last_access)")
+        self._conn.commit()
+
+    def get(self, request_id: str) -> Optional[Dict[str, Any]]:
+        """Return the stored response for a request, or None if it isn't stored."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, compressed FROM results WHERE request_id = ?",
+                (request_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE results SET last_access = ? WHERE request_id = ?",
+                (time.time(), request_id)
+            )
+            self._conn.commit()
+        payload, compressed = row
+        if compressed:
+            payload = zlib.decompress(payload)
+        return parse_status_body(payload)
+
+    def put(self, request_id: str, response: Dict[str, Any]) -> None:
+        """Store a final response and evict old entries if the store is over budget."""
+        payload = dumps_status_response(response)
+        if self.compress:
+            payload = zlib.compress(payload)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (request_id, response.get("codeMajor", "unknown"), payload, int(self.compress), len(payload), now, now)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for request_id, size in self._conn.execute(
+            "SELECT request_id, size FROM results ORDER BY last_access ASC"
+        ).fetchall():
+            self._conn.execute("DELETE FROM results WHERE request_id = ?", (request_id,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results"
+            ).fetchone()
+        return {"entries": entries, "bytes": total}
@@ -0,0 +1,100 @@
+"""Helpers for browsing large design results without serialising them.
+
+The result viewer only ever renders one page of one node at a time; these
+functions resolve JSON paths, page through children and build summary counts
+by walking the parsed document directly.
+"""
+from collections import Counter
+from typing import Any, Dict, List, Sequence, Tuple, Union
+
+PathPart = Union[str, int]
+
+# Subtrees with fewer values than this are rendered inline with st.json
+INLINE_MAX_NODES = 200
+VIEWER_PAGE_SIZE = 50
+
+def resolve_path(document: Any, path: Sequence[PathPart]) -> Any:
+    """Return the value at path (a list of keys / indexes). Raises KeyError/IndexError if missing."""
+    value = document
+    for part in path:
+        value = value[part]
+    return value
+
+def format_path(path: Sequence[PathPart]) -> str:
+    """Format a path as $.spaces[0].walls."""
+    text = "$"
+    for part in path:
+        text += f"[{part}]" if isinstance(part, int) else f".{part}"
+    return text
+
+def child_count(value: Any) -> int:
+    if isinstance(value, (dict, list)):
+        return len(value)
+    return 0
+
+def is_small(value: Any, max_nodes: int = INLINE_MAX_NODES) -> bool:
+    """True if the subtree has fewer than max_nodes values. Stops counting at the limit."""
+    seen = 0
+    stack = [value]
+    while stack:
+        value = stack.pop()
+        seen += 1
+        if seen >= max_nodes or child_count(value) >= max_nodes:
+            return False
+        if isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, list):
+            stack.extend(value)
+    return True
+
+def describe_value(value: Any, preview_length: int = 60) -> str:
+    """One-line description of a value: type and size for containers, a preview for scalars."""
+    if isinstance(value, dict):
+        label = value.get("name") or value.get("id") or value.get("baseItemType")
+        suffix = f" · {label}" if isinstance(label, str) else ""
+        return f"object ({len(value)} keys){suffix}"
+    if isinstance(value, list):
+        return f"array ({len(value)} items)"
+    text = repr(value) if not isinstance(value, str) else f'"{value}"'
+    return text if len(text) <= preview_length else text[:preview_length - 1] + "…"
+
+def page_children(value: Any, page: int, page_size: int = VIEWER_PAGE_SIZE) -> List[Tuple[PathPart, Any]]:
+    """Return one page of (key or index, child) pairs of a container."""
+    start = page * page_size
+    if isinstance(value, dict):
+        keys = list(value.keys())[start:start + page_size]
+        return [(key, value[key]) for key in keys]
+    if isinstance(value, list):
+        return [(index, value[index]) for index in range(start, min(len(value), start + page_size))]
+    return []
+
+def summarize_design(result: Any) -> Dict[str, Any]:
+    """Count walls, spaces and items per baseItemType by walking the parsed design once."""
+    item_types: Counter = Counter()
+    walls = 0
+    spaces = 0
+    stack = [(None, result)]
+    while stack:
+        key, value = stack.pop()
+        if isinstance(value, dict):
+            base_item_type = value.get("baseItemType")
+            if isinstance(base_item_type, str):
+                item_types[base_item_type] += 1
+            for child_key, child in value.items():
+                if isinstance(child, (dict, list)):
+                    stack.append((child_key, child))
+        elif isinstance(value, list):
+            if isinstance(key, str):
+                if "wall" in key.lower():
+                    walls += sum(1 for child in value if isinstance(child, dict))
+                elif key == "spaces":
+                    spaces += len(value)
+            for child in value:
+                if isinstance(child, (dict, list)):
+                    stack.append((None, child))
+    return {
+        "spaces": spaces,
+        "walls": walls,
+        "items": sum(item_types.values()),
+        "item_types": dict(item_types.most_common())
+    }
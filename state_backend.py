@@ -0,0 +1,234 @@
+"""Shared state for running several app replicas behind a load balancer.
+
+Replicas share the latest status response of each request and a poll lease per
+request_id through a state backend, so any replica can serve a progress page
+while exactly one of them polls the API for it:
+- "memory" - this process only (a single replica; the default)
+- "sqlite" - a SQLite file, for replicas on one host or a shared volume
+- "redis" - any Redis-compatible server (needs the redis package)
+"""
+import os
+import socket
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Any, Optional, Tuple
+
+from design_api import dumps_status_response, parse_status_body
+
+try:
+    import redis
+except ImportError:  # Optional: only needed for STATE_BACKEND=redis
+    redis = None
+
+# State backend settings
+STATE_BACKEND = os.getenv("STATE_BACKEND", "memory")  # memory, sqlite or redis
+STATE_BACKEND_URL = os.getenv("STATE_BACKEND_URL", "")  # Database file for sqlite, server URL for redis
+STATE_SQLITE_PATH = os.path.join(".cache", "state.sqlite3")
+STATE_REDIS_URL = "redis://localhost:6379/0"
+STATE_KEY_PREFIX = os.getenv("STATE_KEY_PREFIX", "design:")  # Namespace for redis keys
+STATE_LEASE_TTL = float(os.getenv("STATE_LEASE_TTL", "60"))  # Seconds a replica keeps a request after its last poll
+REPLICA_ID = os.getenv("REPLICA_ID") or f"{socket.gethostname()}-{os.getpid()}"
+LEASE_ATTEMPTS = 3  # Redis: tries at taking a lease that keeps expiring under us
+
+class StateBackend(ABC):
+    """Status responses and poll leases shared between replicas, keyed by request_id.
+
+    A lease is held by one owner (a replica id) until it expires; acquiring a
+    lease the caller already holds renews it.
+    """
+
+    @abstractmethod
+    def get_status(self, request_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def put_status(self, request_id: str, response: Dict[str, Any], ttl: float) -> None:
+        ...
+
+    @abstractmethod
+    def acquire_lease(self, request_id: str, owner: str, ttl: float) -> bool:
+        """Take or renew the poll lease of a request. Returns False if another owner holds it."""
+
+    @abstractmethod
+    def release_lease(self, request_id: str, owner: str) -> None:
+        """Give up a lease early, if owner still holds it."""
+
+class MemoryStateBackend(StateBackend):
+    """State for a single replica, kept in this process."""
+
+    def __init__(self):
+        self._statuses: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._leases: Dict[str, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def get_status(self, request_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._statuses.get(request_id)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._statuses[request_id]
+                return None
+            return entry[1]
+
+    def put_status(self, request_id: str, response: Dict[str, Any], ttl: float) -> None:
+        now = time.time()
+        with self._lock:
+            self._statuses[request_id] = (now + ttl, response)
+            # Drop expired entries so the map doesn't grow without bound
+            if len(self._statuses) > 1000:
+                for key, (expires_at, _) in list(self._statuses.items()):
+                    if expires_at <= now:
+                        del self._statuses[key]
+
+    def acquire_lease(self, request_id: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        with self._lock:
+            lease = self._leases.get(request_id)
+            if lease is not None and lease[0] != owner and lease[1] > now:
+                return False
+            self._leases[request_id] = (owner, now + ttl)
+            # Leases of requests nobody polls any more are never released; drop the expired ones
+            if len(self._leases) > 1000:
+                for key, (_, expires_at) in list(self._leases.items()):
+                    if expires_at <= now:
+                        del self._leases[key]
+            return True
+
+    def release_lease(self, request_id: str, owner: str) -> None:
+        with self._lock:
+            lease = self._leases.get(request_id)
+            if lease is not None and lease[0] == owner:
+                del self._leases[request_id]
+
+class SQLiteStateBackend(StateBackend):
+    """State in a SQLite file; SQLite's file locking keeps leases exclusive across processes."""
+
+    def __init__(self, path: str = STATE_SQLITE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS statuses (
+                request_id TEXT PRIMARY KEY,
+                payload BLOB NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS leases (
+                request_id TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+        now = time.time()
+        self._conn.execute("DELETE FROM statuses WHERE expires_at <= ?", (now,))
+        self._conn.execute("DELETE FROM leases WHERE expires_at <= ?", (now,))
+        self._conn.commit()
+
+    def get_status(self, request_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM statuses WHERE request_id = ? AND expires_at > ?",
+                (request_id, time.time())
+            ).fetchone()
+        return parse_status_body(row[0]) if row is not None else None
+
+    def put_status(self, request_id: str, response: Dict[str, Any], ttl: float) -> None:
+        payload = dumps_status_response(response)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO statuses VALUES (?, ?, ?)",
+                (request_id, payload, time.time() + ttl)
+            )
+            self._conn.commit()
+
+    def acquire_lease(self, request_id: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        with self._lock:
+            # One statement, so taking, renewing and refusing are atomic across processes
+            cursor = self._conn.execute(
+                "INSERT INTO leases VALUES (?, ?, ?) ON CONFLICT (request_id) DO UPDATE "
+                "SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE leases.owner = excluded.owner OR leases.expires_at <= ?",
+                (request_id, owner, now + ttl, now)
+            )
+            self._conn.commit()
+        return cursor.rowcount > 0
+
+    def release_lease(self, request_id: str, owner: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM leases WHERE request_id = ? AND owner = ?", (request_id, owner))
+            self._conn.commit()
+
+class RedisStateBackend(StateBackend):
+    """State on a Redis-compatible server, using only GET, SET (NX/PX), DEL and WATCH/MULTI/EXEC."""
+
+    def __init__(self, url: str = STATE_REDIS_URL, prefix: str = STATE_KEY_PREFIX):
+        if redis is None:
+            raise RuntimeError("STATE_BACKEND=redis needs the redis package (pip install redis)")
+        # RESP2: redis-py 8 otherwise asks for RESP3, which older or compatible servers may not speak
+        self.client = redis.Redis.from_url(url, protocol=2)
+        self.prefix = prefix
+
+    def get_status(self, request_id: str) -> Optional[Dict[str, Any]]:
+        payload = self.client.get(f"{self.prefix}status:{request_id}")
+        return parse_status_body(payload) if payload is not None else None
+
+    def put_status(self, request_id: str, response: Dict[str, Any], ttl: float) -> None:
+        self.client.set(f"{self.prefix}status:{request_id}", dumps_status_response(response), px=int(ttl * 1000))
+
+    def acquire_lease(self, request_id: str, owner: str, ttl: float) -> bool:
+        key = f"{self.prefix}lease:{request_id}"
+        for _ in range(LEASE_ATTEMPTS):
+            if self.client.set(key, owner, nx=True, px=int(ttl * 1000)):
+                return True
+            # Renewed in a transaction on the lease key, so it only lands if the lease is
+            # still ours: one that expired and was taken over in between makes EXEC fail
+            with self.client.pipeline() as pipe:
+                try:
+                    pipe.watch(key)
+                    current = pipe.get(key)
+                    if current is None:
+                        # Expired since SET NX; try to take it again
+                        continue
+                    if current != owner.encode("utf-8"):
+                        return False
+                    pipe.multi()
+                    pipe.set(key, owner, px=int(ttl * 1000))
+                    pipe.execute()
+                    return True
+                except redis.WatchError:
+                    return False
+        return False
+
+    def release_lease(self, request_id: str, owner: str) -> None:
+        key = f"{self.prefix}lease:{request_id}"
+        # Deleted in a transaction on the lease key, so a lease another replica took over
+        # between the check and the delete is left alone
+        with self.client.pipeline() as pipe:
+            try:
+                pipe.watch(key)
+                if pipe.get(key) != owner.encode("utf-8"):
+                    return
+                pipe.multi()
+                pipe.delete(key)
+                pipe.execute()
+            except redis.WatchError:
+                pass
+
+def create_state_backend(kind: str = STATE_BACKEND, url: str = STATE_BACKEND_URL) -> StateBackend:
+    """Build the backend named by kind; url is the SQLite file or Redis server URL."""
+    if kind == "memory":
+        return MemoryStateBackend()
+    if kind == "sqlite":
+        return SQLiteStateBackend(url or STATE_SQLITE_PATH)
+    if kind == "redis":
+        return RedisStateBackend(url or STATE_REDIS_URL)
+    raise ValueError(f"Unknown state backend: {kind}")
@@ -0,0 +1,81 @@
+"""Content-hash cache of submitted request bodies, used to skip duplicate generations."""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+from result_store import ResultStore
+
+# Submission cache settings
+SUBMISSION_CACHE_TTL = 24 * 3600  # Seconds a completed design is offered for identical requests
+SUBMISSION_IN_FLIGHT_TTL = 15 * 60  # Give up attaching to a request that hasn't finished after this
+SUBMISSION_CACHE_MAX_ENTRIES = 1000
+
+class SubmissionCache:
+    """Maps canonical request body hashes to the request that generated them.
+
+    lookup() reports whether an identical request already completed successfully
+    (its stored response is returned) or is still being generated (new clicks
+    attach to it instead of submitting again).
+    """
+
+    def __init__(
+        self,
+        result_store: ResultStore,
+        ttl: float = SUBMISSION_CACHE_TTL,
+        in_flight_ttl: float = SUBMISSION_IN_FLIGHT_TTL,
+        max_entries: int = SUBMISSION_CACHE_MAX_ENTRIES
+    ):
+        self.result_store = result_store
+        self.ttl = ttl
+        self.in_flight_ttl = in_flight_ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, body_hash: str, request_id: str, location: str) -> None:
+        """Remember the request submitted for a body hash."""
+        with self._lock:
+            self._entries[body_hash] = {
+                "request_id": request_id,
+                "location": location,
+                "submitted_at": time.time()
+            }
+            self._entries.move_to_end(body_hash)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, body_hash: str) -> None:
+        with self._lock:
+            self._entries.pop(body_hash, None)
+
+    def lookup(self, body_hash: str) -> Tuple[Optional[str], Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """Return (state, entry, result) for a body hash.
+
+        state is "completed" (result holds the stored success response),
+        "in_flight" (the matching request is still generating) or None.
+        """
+        with self._lock:
+            entry = self._entries.get(body_hash)
+            if entry is not None:
+                entry = dict(entry)
+        if entry is None:
+            return None, None, None
+
+        age = time.time() - entry["submitted_at"]
+        if age > self.ttl:
+            self.discard(body_hash)
+            return None, None, None
+
+        stored = self.result_store.get(entry["request_id"])
+        if stored is not None:
+            if stored.get("codeMajor") == "success":
+                return "completed", entry, stored
+            # Failed generations are never reused
+            self.discard(body_hash)
+            return None, None, None
+
+        if age > self.in_flight_ttl:
+            self.discard(body_hash)
+            return None, None, None
+        return "in_flight", entry, None
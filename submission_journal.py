@@ -0,0 +1,220 @@
+"""Durable journal of the submission queue, so a restart doesn't lose queued requests.
+
+Every request body handed to the submission queue is written here before it is
+sent, and every status change after that. When the process restarts (a
+redeploy, a crash) the new one claims the unfinished entries and sends them
+again, while accepted requests come back through the job registry.
+
+Entries belong to the process that queued them. A process marks itself alive
+every SUBMISSION_JOURNAL_HEARTBEAT seconds; entries of a process that stopped
+doing so (or that is no longer running on this host) can be claimed by another,
+one claim per entry, so replicas sharing the file never send one twice.
+"""
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+from design_api import dumps_json
+from state_backend import REPLICA_ID
+
+# Submission journal settings
+SUBMISSION_JOURNAL_PATH = os.getenv("SUBMISSION_JOURNAL_PATH", os.path.join(".cache", "submissions.sqlite3"))
+SUBMISSION_JOURNAL_HEARTBEAT = float(os.getenv("SUBMISSION_JOURNAL_HEARTBEAT", "10"))  # Seconds between liveness marks
+SUBMISSION_JOURNAL_STALE_AFTER = 3 * SUBMISSION_JOURNAL_HEARTBEAT  # An owner silent this long is gone
+SUBMISSION_JOURNAL_RETENTION = 24 * 3600  # Keep finished entries this many seconds
+
+# Statuses of a submission that hasn't got an answer yet (see submission_queue)
+UNFINISHED_STATUSES = ("queued", "submitting", "retrying", "deferred")
+
+# Columns update() may change
+_UPDATABLE = ("status", "attempts", "next_attempt_at", "request_id", "location", "result", "error", "finished_at")
+
+def _process_running(pid: int) -> bool:
+    """True if a process with this pid exists on this host (POSIX only; elsewhere assumed running)."""
+    if os.name != "posix":
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+class SubmissionJournal:
+    """SQLite-backed record of queued submissions, keyed by submission queue job id."""
+
+    def __init__(
+        self,
+        path: str = SUBMISSION_JOURNAL_PATH,
+        owner: str = REPLICA_ID,
+        stale_after: float = SUBMISSION_JOURNAL_STALE_AFTER,
+        retention: float = SUBMISSION_JOURNAL_RETENTION
+    ):
+        self.owner = owner
+        self.stale_after = stale_after
+        self.retention = retention
+        self.host = socket.gethostname()
+        self._active = set()  # Unfinished job ids this process has queued or claimed
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Every change is committed before the queue acts on it
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS submissions (
+                job_id TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                request_body BLOB NOT NULL,
+                body_hash TEXT,
+                parameters TEXT,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL,
+                next_attempt_at REAL,
+                request_id TEXT,
+                location TEXT,
+                result TEXT,
+                error TEXT,
+                queued_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                finished_at REAL
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS owners (
+                owner TEXT PRIMARY KEY,
+                host TEXT NOT NULL,
+                pid INTEGER NOT NULL,
+                seen_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_submissions_status ON submissions (status)")
+        now = time.time()
+        self._conn.execute("DELETE FROM submissions WHERE finished_at < ?", (now - self.retention,))
+        self._conn.execute("DELETE FROM owners WHERE seen_at < ?", (now - self.retention,))
+        self._conn.commit()
+        self.heartbeat()
+
+    def add(
+        self,
+        job_id: str,
+        request_body: Dict[str, Any],
+        body_hash: Optional[str],
+        parameters: Optional[Dict[str, Any]],
+        queued_at: float
+    ) -> None:
+        """Record a newly queued submission."""
+        with self._lock:
+            self._active.add(job_id)
+            self._conn.execute(
+                "INSERT INTO submissions (job_id, owner, request_body, body_hash, parameters, status, attempts, "
+                "next_attempt_at, queued_at, updated_at) VALUES (?, ?, ?, ?, ?, 'queued', 0, ?, ?, ?)",
+                (
+                    job_id,
+                    self.owner,
+                    dumps_json(request_body),
+                    body_hash,
+                    json.dumps(parameters) if parameters is not None else None,
+                    queued_at,
+                    queued_at,
+                    queued_at
+                )
+            )
+            self._conn.commit()
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        """Record a status change; fields are columns of the submission queue's job."""
+        columns = [name for name in _UPDATABLE if name in fields]
+        if not columns:
+            return
+        values = [json.dumps(fields[name]) if name == "result" and fields[name] is not None else fields[name] for name in columns]
+        with self._lock:
+            if fields.get("status") not in (None,) + UNFINISHED_STATUSES:
+                self._active.discard(job_id)
+            self._conn.execute(
+                f"UPDATE submissions SET {', '.join(f'{name} = ?' for name in columns)}, updated_at = ? WHERE job_id = ?",
+                values + [time.time(), job_id]
+            )
+            self._conn.commit()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """A journalled submission without its request body, or None if unknown."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT job_id, body_hash, parameters, status, attempts, next_attempt_at, request_id, location, "
+                "result, error, queued_at, finished_at FROM submissions WHERE job_id = ?",
+                (job_id,)
+            )
+            row = cursor.fetchone()
+            return self._to_entry(cursor, row) if row is not None else None
+
+    def heartbeat(self) -> None:
+        """Mark this owner alive, so its unfinished entries aren't claimed by anyone else."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO owners VALUES (?, ?, ?, ?)",
+                (self.owner, self.host, os.getpid(), time.time())
+            )
+            self._conn.commit()
+
+    def claim_unfinished(self) -> List[Dict[str, Any]]:
+        """Take over unfinished entries of owners that are gone, plus this owner's own
+        from before a restart (same REPLICA_ID), and return them with their request bodies.
+
+        Each entry is claimed with one conditional UPDATE, so it goes to one process only.
+        """
+        now = time.time()
+        with self._lock:
+            owners = {
+                owner: (host, pid, seen_at)
+                for owner, host, pid, seen_at in self._conn.execute("SELECT owner, host, pid, seen_at FROM owners")
+            }
+            cursor = self._conn.execute(
+                f"SELECT * FROM submissions WHERE status IN ({', '.join('?' * len(UNFINISHED_STATUSES))}) ORDER BY queued_at",
+                UNFINISHED_STATUSES
+            )
+            rows = [self._to_entry(cursor, row) for row in cursor.fetchall()]
+        claimed = []
+        for entry in rows:
+            owner = entry["owner"]
+            if owner != self.owner and not self._gone(owners.get(owner), now):
+                continue
+            with self._lock:
+                # Our own entries are only claimed once: from before a restart with the same REPLICA_ID
+                if entry["job_id"] in self._active:
+                    continue
+                cursor = self._conn.execute(
+                    "UPDATE submissions SET owner = ?, updated_at = ? WHERE job_id = ? AND owner = ? AND updated_at = ?",
+                    (self.owner, now, entry["job_id"], owner, entry["updated_at"])
+                )
+                self._conn.commit()
+                if cursor.rowcount:
+                    self._active.add(entry["job_id"])
+            if cursor.rowcount:
+                entry["request_body"] = json.loads(entry["request_body"])
+                claimed.append(entry)
+        return claimed
+
+    def _gone(self, owner_row: Optional[tuple], now: float) -> bool:
+        if owner_row is None:
+            return True
+        host, pid, seen_at = owner_row
+        if now - seen_at > self.stale_after:
+            return True
+        # A replica restarted on this host shows up with a new pid before its old heartbeat goes stale
+        return host == self.host and pid != os.getpid() and not _process_running(pid)
+
+    @staticmethod
+    def _to_entry(cursor: sqlite3.Cursor, row: tuple) -> Dict[str, Any]:
+        entry = dict(zip([column[0] for column in cursor.description], row))
+        for name in ("parameters", "result"):
+            if entry.get(name) is not None:
+                entry[name] = json.loads(entry[name])
+        return entry
@@ -0,0 +1,290 @@
+"""Background submission of design requests with bounded concurrency and retries.
+
+The app enqueues a request body and gets a job id back straight away; a small
+worker pool sends it, retrying connection errors, timeouts, 429 and 5xx
+responses with exponential backoff. Submissions the client holds back (over
+its rate limit, or while its circuit breaker is open) are deferred without
+using up an attempt. Sessions read the job's progress with get().
+
+With a SubmissionJournal every job and status change is also written to disk,
+and recover() picks up the unfinished ones after a restart.
+"""
+import os
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, Any, Optional
+
+from design_api import PooledHTTPClient, SubmitError, extract_request_id, send_request
+from job_registry import JobRegistry
+from metrics import RECOVERED_JOBS, RECOVERY_SECONDS, log_event
+from polling import PollingPolicy
+from submission_cache import SubmissionCache
+from submission_journal import SUBMISSION_JOURNAL_HEARTBEAT, SubmissionJournal
+
+if TYPE_CHECKING:
+    from polling import StatusPoller
+
+# Submission queue settings
+SUBMIT_MAX_WORKERS = int(os.getenv("SUBMIT_MAX_WORKERS", "4"))  # Submissions in flight at once
+SUBMIT_MAX_ATTEMPTS = int(os.getenv("SUBMIT_MAX_ATTEMPTS", "3"))  # Including the first try
+SUBMIT_RETRY_BASE_DELAY = float(os.getenv("SUBMIT_RETRY_BASE_DELAY", "1"))  # Seconds before the first retry
+SUBMIT_RETRY_MAX_DELAY = float(os.getenv("SUBMIT_RETRY_MAX_DELAY", "30"))  # Upper bound on a single backoff
+SUBMIT_RETRY_JITTER = 0.2  # +/- fraction of randomness so retries don't line up
+SUBMIT_JOB_TTL = 3600  # Forget finished jobs after this many seconds
+SUBMIT_MAX_DEFERRAL = float(os.getenv("SUBMIT_MAX_DEFERRAL", "600"))  # Stop waiting for API capacity after this many seconds
+
+# Job statuses
+QUEUED = "queued"
+SUBMITTING = "submitting"
+RETRYING = "retrying"
+DEFERRED = "deferred"  # Held back by the client rate limit or circuit breaker; not an attempt
+ACCEPTED = "accepted"  # 202 with a status location
+COMPLETED = "completed"  # Synchronous success without a location
+FAILED = "failed"
+FINISHED_STATUSES = (ACCEPTED, COMPLETED, FAILED)
+
+class RetryPolicy:
+    """Exponential backoff for failed submissions."""
+
+    def __init__(
+        self,
+        max_attempts: int = SUBMIT_MAX_ATTEMPTS,
+        base_delay: float = SUBMIT_RETRY_BASE_DELAY,
+        max_delay: float = SUBMIT_RETRY_MAX_DELAY,
+        jitter: float = SUBMIT_RETRY_JITTER
+    ):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+
+    def should_retry(self, attempts: int, error: Any) -> bool:
+        """True if a submission that failed with error after `attempts` tries should be tried again."""
+        if attempts >= self.max_attempts:
+            return False
+        return not isinstance(error, SubmitError) or error.retryable
+
+    def delay(self, attempts: int, retry_after: Optional[float] = None) -> float:
+        """Seconds to wait before the next attempt. A server Retry-After takes precedence."""
+        if retry_after is not None:
+            return min(self.max_delay, retry_after)
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        return delay * (1 + random.uniform(-self.jitter, self.jitter))
+
+class SubmissionQueue:
+    """Sends request bodies on a worker pool and tracks each one by job id."""
+
+    def __init__(
+        self,
+        client: PooledHTTPClient,
+        max_workers: int = SUBMIT_MAX_WORKERS,
+        retry_policy: Optional[RetryPolicy] = None,
+        policy: Optional[PollingPolicy] = None,
+        submission_cache: Optional[SubmissionCache] = None,
+        job_registry: Optional[JobRegistry] = None,
+        job_ttl: float = SUBMIT_JOB_TTL,
+        max_deferral: float = SUBMIT_MAX_DEFERRAL,
+        journal: Optional[SubmissionJournal] = None
+    ):
+        self.client = client
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.policy = policy
+        self.submission_cache = submission_cache
+        self.job_registry = job_registry
+        self.job_ttl = job_ttl
+        self.max_deferral = max_deferral
+        # Optional: makes queued jobs survive a restart (see recover())
+        self.journal = journal
+        self.last_recovery: Optional[Dict[str, Any]] = None
+        self._poller: Optional["StatusPoller"] = None
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="submission-queue")
+        if journal is not None:
+            # Other replicas take over the journalled jobs of a queue that stops beating
+            threading.Thread(target=self._run_heartbeat, name="submission-journal", daemon=True).start()
+
+    def enqueue(self, request_body: Dict[str, Any], body_hash: Optional[str] = None, parameters: Optional[Dict[str, Any]] = None) -> str:
+        """Queue a request body for submission and return its job id immediately.
+
+        parameters (the form selections) are what the job registry records; the
+        request body is recorded when they aren't given.
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._forget_finished(now)
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "status": QUEUED,
+                "attempts": 0,
+                "max_attempts": self.retry_policy.max_attempts,
+                "next_attempt_at": now,
+                "request_id": None,
+                "location": None,
+                "result": None,
+                "error": None,
+                "parameters": parameters,
+                "queued_at": now,
+                "finished_at": None
+            }
+        if self.journal is not None:
+            # On disk before anything is sent
+            self.journal.add(job_id, request_body, body_hash, parameters, now)
+        self._executor.submit(self._submit, job_id, request_body, body_hash, parameters)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a snapshot of a job, or None if it is unknown (or was forgotten).
+
+        Jobs queued before a restart are read back from the journal.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return dict(job)
+        if self.journal is None:
+            return None
+        entry = self.journal.get(job_id)
+        if entry is not None:
+            entry["max_attempts"] = self.retry_policy.max_attempts
+        return entry
+
+    def recover(self, poller: Optional["StatusPoller"] = None) -> Dict[str, Any]:
+        """Pick up where a previous process left off, and keep doing so for replicas that stop.
+
+        Unfinished journal entries of this replica (or of one that is gone) are
+        claimed and queued again, unless the job registry has an accepted request
+        with the same body since it was queued: the entry is attached to that
+        request instead, so one that reached the API just before the process died
+        isn't sent twice. Outstanding requests in the job registry are
+        then tracked on the poller again. Afterwards a background thread repeats
+        this every SUBMISSION_JOURNAL_HEARTBEAT seconds, which also keeps those
+        requests polled until they finish, whether or not anyone is viewing them.
+
+        Returns {"resubmitted", "reattached", "polls_resumed", "seconds"}.
+        """
+        self._poller = poller
+        started = time.perf_counter()
+        report = self._recover_once(poller)
+        report["seconds"] = time.perf_counter() - started
+        RECOVERY_SECONDS.observe(report["seconds"])
+        log_event("recovered", None, **report)
+        self.last_recovery = report
+        return report
+
+    def _recover_once(self, poller: Optional["StatusPoller"]) -> Dict[str, Any]:
+        resubmitted = 0
+        reattached = 0
+        for entry in self.journal.claim_unfinished() if self.journal is not None else []:
+            job_id = entry["job_id"]
+            existing = None
+            if entry["body_hash"] and self.job_registry is not None:
+                existing = self.job_registry.find_submission(entry["body_hash"], entry["queued_at"])
+            now = time.time()
+            with self._lock:
+                self._jobs[job_id] = {
+                    "job_id": job_id,
+                    "status": QUEUED,
+                    # An attempt cut short by the restart isn't counted
+                    "attempts": entry["attempts"] - (entry["status"] == SUBMITTING),
+                    "max_attempts": self.retry_policy.max_attempts,
+                    "next_attempt_at": now,
+                    "request_id": None,
+                    "location": None,
+                    "result": None,
+                    "error": entry["error"],
+                    "parameters": entry["parameters"],
+                    "queued_at": entry["queued_at"],
+                    "finished_at": None
+                }
+            if existing is not None:
+                self._update(job_id, status=ACCEPTED, request_id=existing["request_id"], location=existing["location"], finished_at=now)
+                RECOVERED_JOBS.inc(outcome="reattached")
+                reattached += 1
+            else:
+                self._executor.submit(self._submit, job_id, entry["request_body"], entry["body_hash"], entry["parameters"])
+                RECOVERED_JOBS.inc(outcome="resubmitted")
+                resubmitted += 1
+        polls_resumed = 0
+        if poller is not None and self.job_registry is not None:
+            polls_resumed = self.job_registry.refresh(poller)
+        return {"resubmitted": resubmitted, "reattached": reattached, "polls_resumed": polls_resumed}
+
+    def _run_heartbeat(self) -> None:
+        while True:
+            time.sleep(SUBMISSION_JOURNAL_HEARTBEAT)
+            try:
+                self.journal.heartbeat()
+                if self.last_recovery is not None:
+                    self._recover_once(self._poller)
+            except Exception:
+                # Bookkeeping only; the next beat tries again
+                pass
+
+    def discard(self, job_id: str) -> None:
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def _forget_finished(self, now: float) -> None:
+        for job_id, job in list(self._jobs.items()):
+            if job["finished_at"] is not None and now - job["finished_at"] > self.job_ttl:
+                del self._jobs[job_id]
+
+    def _update(self, job_id: str, **fields: Any) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(fields)
+        if self.journal is not None:
+            self.journal.update(job_id, **fields)
+
+    def _submit(self, job_id: str, request_body: Dict[str, Any], body_hash: Optional[str], parameters: Optional[Dict[str, Any]]) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job["status"] = SUBMITTING
+            job["attempts"] += 1
+            attempts = job["attempts"]
+            queued_at = job["queued_at"]
+        if self.journal is not None:
+            self.journal.update(job_id, status=SUBMITTING, attempts=attempts)
+
+        submit_start = time.time()
+        try:
+            success, result, location = send_request(request_body, self.client)
+        except Exception as e:
+            success, result, location = False, str(e), None
+
+        if success and location:
+            request_id = extract_request_id(location)
+            if request_id and self.policy is not None:
+                self.policy.note_submitted(request_id, submit_start)
+            if request_id and body_hash and self.submission_cache is not None:
+                self.submission_cache.add(body_hash, request_id, location)
+            if request_id and self.job_registry is not None:
+                self.job_registry.record_submission(request_id, location, parameters or request_body, body_hash, "app", submit_start)
+            # After the registry, so a restart in between finds the request there instead of sending it again
+            self._update(job_id, status=ACCEPTED, request_id=request_id, location=location, result=result, finished_at=time.time())
+        elif success:
+            self._update(job_id, status=COMPLETED, result=result, finished_at=time.time())
+        elif getattr(result, "deferred", False) and time.time() - queued_at < self.max_deferral:
+            # Nothing was sent, so this doesn't use up an attempt
+            self._update(job_id, status=DEFERRED, attempts=attempts - 1, error=str(result), next_attempt_at=time.time() + result.retry_after)
+            self._schedule(result.retry_after, job_id, request_body, body_hash, parameters)
+        elif self.retry_policy.should_retry(attempts, result):
+            delay = self.retry_policy.delay(attempts, getattr(result, "retry_after", None))
+            self._update(job_id, status=RETRYING, error=str(result), next_attempt_at=time.time() + delay)
+            self._schedule(delay, job_id, request_body, body_hash, parameters)
+        else:
+            self._update(job_id, status=FAILED, error=str(result), finished_at=time.time())
+
+    def _schedule(self, delay: float, *args: Any) -> None:
+        # Wait on a timer instead of in the worker, so other submissions keep flowing
+        timer = threading.Timer(delay, self._executor.submit, (self._submit,) + args)
+        timer.daemon = True
+        timer.start()
@@ -0,0 +1,183 @@
+"""Parameter sweeps over room dimensions and item selections.
+
+Expands dimension ranges and item subsets into a job list, drops jobs whose
+request bodies are identical or whose items can't fit the room, and submits the rest through the batch pipeline
+with a submission rate limit. Completions are reported as they arrive:
+
+    python sweep.py --width 3500:6000:500 --depth 3500:4500:500 \\
+        --appliances cooktop,refrigerator,oven,dishwasher --min-appliances 2 \\
+        --cabinets roof,base,tall --rate 1 --concurrency 4
+"""
+import argparse
+import itertools
+import os
+import sys
+from typing import List, Dict, Any, Optional, Sequence
+
+from batch import BATCH_CONCURRENCY, BatchRun, describe_job
+from design_api import PooledHTTPClient, build_request_body, request_body_hash
+from feasibility import FEASIBILITY_CHECK, check_feasibility, encode_bodies
+from job_registry import JobRegistry
+from polling import PollingPolicy, StatusCache, StatusPoller
+from rate_limit import TokenBucket
+from result_store import ResultStore
+from submission_cache import SubmissionCache
+
+# Sweep settings
+SWEEP_SUBMIT_RATE = float(os.getenv("SWEEP_SUBMIT_RATE", "1"))  # Submissions per second
+SWEEP_MAX_JOBS = 1000  # Refuse sweeps larger than this
+
+def expand_range(start: int, stop: int, step: int) -> List[int]:
+    """Inclusive integer range, e.g. expand_range(3500, 4000, 250) -> [3500, 3750, 4000]."""
+    if step <= 0:
+        raise ValueError("step must be positive")
+    values = list(range(start, stop + 1, step))
+    return values or [start]
+
+def parse_range(text: str) -> List[int]:
+    """Parse "start:stop:step", "start:stop" (step 100) or a single value."""
+    parts = [int(part) for part in text.split(":")]
+    if len(parts) == 1:
+        return parts
+    if len(parts) == 2:
+        return expand_range(parts[0], parts[1], 100)
+    return expand_range(parts[0], parts[1], parts[2])
+
+def item_subsets(options: Sequence[str], min_size: int = 1, max_size: Optional[int] = None) -> List[List[str]]:
+    """All subsets of options with min_size..max_size items, in a stable order."""
+    options = sorted(set(options))
+    max_size = len(options) if max_size is None else min(max_size, len(options))
+    subsets = []
+    for size in range(min_size, max_size + 1):
+        subsets.extend(list(combination) for combination in itertools.combinations(options, size))
+    return subsets
+
+def generate_sweep(
+    widths: Sequence[int],
+    depths: Sequence[int],
+    appliance_sets: Sequence[List[str]],
+    cabinet_sets: Sequence[List[str]],
+    plumbing_sets: Sequence[List[str]] = (["sink"],),
+    worktops: Sequence[str] = ("Granite",),
+    layout: str = "L-Shaped"
+) -> Dict[str, Any]:
+    """Expand the sweep into jobs, removing duplicates by canonical request body
+    and, with FEASIBILITY_CHECK, combinations that can't fit the room.
+
+    Returns {"jobs": [...], "duplicates": count, "infeasible": count}.
+    """
+    jobs = []
+    request_bodies = []
+    seen = set()
+    duplicates = 0
+    for width, depth, appliances, cabinets, plumbing, worktop in itertools.product(
+        widths, depths, appliance_sets, cabinet_sets, plumbing_sets, worktops
+    ):
+        job = {
+            "appliances": list(appliances),
+            "cabinets": list(cabinets),
+            "plumbing": list(plumbing),
+            "worktop": worktop,
+            "layout": layout,
+            "width": width,
+            "depth": depth
+        }
+        request_body = build_request_body(
+            job["appliances"],
+            job["cabinets"],
+            job["worktop"],
+            job["plumbing"],
+            job["layout"],
+            job["width"],
+            job["depth"]
+        )
+        body_hash = request_body_hash(request_body)
+        if body_hash in seen:
+            duplicates += 1
+            continue
+        seen.add(body_hash)
+        jobs.append(job)
+        request_bodies.append(request_body)
+    
+    infeasible = 0
+    if FEASIBILITY_CHECK and jobs:
+        feasible = check_feasibility(*encode_bodies(request_bodies))["feasible"]
+        infeasible = int(len(jobs) - feasible.sum())
+        jobs = [job for job, fits in zip(jobs, feasible) if fits]
+    return {"jobs": jobs, "duplicates": duplicates, "infeasible": infeasible}
+
+def start_sweep(
+    jobs: List[Dict[str, Any]],
+    client: PooledHTTPClient,
+    concurrency: int = BATCH_CONCURRENCY,
+    rate: float = SWEEP_SUBMIT_RATE,
+    policy: Optional[PollingPolicy] = None,
+    submission_cache: Optional[SubmissionCache] = None,
+    job_registry: Optional[JobRegistry] = None
+) -> BatchRun:
+    """Submit sweep jobs concurrently, at most `rate` submissions per second."""
+    if len(jobs) > SWEEP_MAX_JOBS:
+        raise ValueError(f"Sweep has {len(jobs)} jobs; the limit is {SWEEP_MAX_JOBS}")
+    run = BatchRun(jobs, client, concurrency, policy, TokenBucket(rate), submission_cache, job_registry, "sweep")
+    run.start()
+    return run
+
+def split_list(text: Optional[str]) -> List[str]:
+    return [item.strip().lower() for item in (text or "").split(",") if item.strip()]
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run a parameter sweep of AI Auto Design requests.")
+    parser.add_argument("--width", default="4000", help="start:stop:step in mm (default 4000)")
+    parser.add_argument("--depth", default="4000", help="start:stop:step in mm (default 4000)")
+    parser.add_argument("--appliances", default="cooktop,refrigerator,dishwasher", help="comma separated candidates")
+    parser.add_argument("--min-appliances", type=int, default=1)
+    parser.add_argument("--max-appliances", type=int)
+    parser.add_argument("--cabinets", default="roof,base,tall", help="comma separated candidates")
+    parser.add_argument("--min-cabinets", type=int, default=1)
+    parser.add_argument("--max-cabinets", type=int)
+    parser.add_argument("--plumbing", default="sink", help="comma separated fixtures included in every job")
+    parser.add_argument("--worktop", default="Granite")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY, help="submissions in flight at once")
+    parser.add_argument("--rate", type=float, default=SWEEP_SUBMIT_RATE, help="submissions per second")
+    parser.add_argument("--dry-run", action="store_true", help="only print the job list")
+    args = parser.parse_args(argv)
+
+    sweep = generate_sweep(
+        parse_range(args.width),
+        parse_range(args.depth),
+        item_subsets(split_list(args.appliances), args.min_appliances, args.max_appliances),
+        item_subsets(split_list(args.cabinets), args.min_cabinets, args.max_cabinets),
+        [split_list(args.plumbing)],
+        [args.worktop]
+    )
+    jobs = sweep["jobs"]
+    print(f"{len(jobs)} jobs ({sweep['duplicates']} duplicates and {sweep['infeasible']} that don't fit removed)")
+    if args.dry_run:
+        for index, job in enumerate(jobs):
+            print(f"  #{index} {describe_job(job)}")
+        return 0
+
+    bearer_token = os.getenv("BEARER_TOKEN", "")
+    if not bearer_token:
+        print("BEARER_TOKEN environment variable is not set.", file=sys.stderr)
+        return 2
+
+    client = PooledHTTPClient(bearer_token)
+    policy = PollingPolicy()
+    result_store = ResultStore()
+    job_registry = JobRegistry()
+    run = start_sweep(jobs, client, args.concurrency, args.rate, policy, SubmissionCache(result_store), job_registry)
+    poller = StatusPoller(StatusCache(client, result_store), policy, job_registry=job_registry)
+    for row in run.iter_completed(poller):
+        outcome = row["error"] or row["request_id"] or ""
+        print(f"  #{row['index']} {row['status']} {describe_job(row['job'])} {outcome}")
+
+    summary = run.summary()
+    print(
+        f"Done in {summary['elapsed_seconds']:.1f}s: {summary['completed']} completed, "
+        f"{summary['failed']} failed ({summary['completions_per_minute']:.2f} completions/min)"
+    )
+    return 1 if summary["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+import time
+
+import pytest
+import requests
+
+from callbacks import callback_url, start_callback_server
+from design_api import PooledHTTPClient, build_request_body, extract_request_id, send_request
+from mock_api import MockSettings, start_mock_server
+from polling import PollingPolicy, StatusCache, StatusPoller
+
+class Receiver:
+    def __init__(self):
+        self.delivered = []
+
+    def deliver(self, request_id, result):
+        self.delivered.append((request_id, result["codeMajor"]))
+
+@pytest.fixture
+def servers():
+    started = []
+    def start(server):
+        started.append(server)
+        return server
+    yield start
+    for server in started:
+        server.shutdown()
+        server.server_close()
+
+def test_callbacks_need_a_shared_token():
+    # A per-process token would reject callbacks sent to another replica or after a restart
+    with pytest.raises(RuntimeError, match="CALLBACK_TOKEN"):
+        callback_url("http://localhost:8600", token="")
+    with pytest.raises(RuntimeError, match="CALLBACK_TOKEN"):
+        start_callback_server(None, "127.0.0.1", 0, token="")
+
+def test_callback_url_carries_the_token():
+    assert callback_url("http://localhost:8600", token="s3cret") == "http://localhost:8600/design-callback?token=s3cret"
+
+def test_callbacks_are_matched_by_the_submission_nonce_alone(servers):
+    client = PooledHTTPClient()
+    client.remember_callback("nonce-1", "req-1")
+    receiver = Receiver()
+    server = servers(start_callback_server(receiver, "127.0.0.1", 0, "s3cret", client))
+    url = callback_url(f"http://127.0.0.1:{server.server_port}", "s3cret")
+    final = b'{"codeMajor":"success","result":{}}'
+
+    # Neither the query nor the body names the request
+    assert requests.post(f"{url}&submission=nonce-1", data=final, timeout=5).status_code == 204
+    assert requests.post(f"{url}&submission=unknown", data=final, timeout=5).status_code == 400
+    assert requests.post(url.replace("s3cret", "wrong") + "&submission=nonce-1", data=final, timeout=5).status_code == 403
+    assert receiver.delivered == [("req-1", "success")]
+
+def test_each_submission_registers_its_own_callback_url(servers):
+    api = servers(start_mock_server(MockSettings(delay=0.2, delay_jitter=0, payload_bytes=1024), port=0))
+    client = PooledHTTPClient(base_url=f"http://127.0.0.1:{api.server_port}")
+    receiver = Receiver()
+    server = servers(start_callback_server(receiver, "127.0.0.1", 0, "s3cret", client))
+    client.callback_url = callback_url(f"http://127.0.0.1:{server.server_port}", "s3cret")
+
+    body = build_request_body(["cooktop"], ["base"], "Granite", ["sink"], "L-Shaped", 4000, 4000)
+    request_ids = []
+    for _ in range(2):
+        success, _, location = send_request(body, client)
+        assert success
+        request_ids.append(extract_request_id(location))
+    deadline = time.time() + 10
+    while len(receiver.delivered) < 2 and time.time() < deadline:
+        time.sleep(0.05)
+    assert sorted(request_id for request_id, _ in receiver.delivered) == sorted(request_ids)
+    assert sorted(client._callback_request_ids.values()) == sorted(request_ids)
+
+def test_fallback_polling_only_starts_once_a_callback_arrived():
+    policy = PollingPolicy()
+    poller = StatusPoller(StatusCache(PooledHTTPClient(base_url="http://127.0.0.1:9")), policy, fallback_interval=120)
+    policy.note_submitted("req-1")
+    policy.note_submitted("req-2")
+
+    # The API may be ignoring the callback URL; poll as usual
+    poller.track("req-1", "/api/v1/ai-auto-design-result?request_id=req-1")
+    assert not poller.get("req-1")["callback"]
+
+    poller.deliver("req-0", {"codeMajor": "success", "result": {}})
+    poller.track("req-2", "/api/v1/ai-auto-design-result?request_id=req-2")
+    assert poller.get("req-2")["callback"]
+    assert poller.get("req-2")["next_poll_at"] > time.time() + 60
@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from design_api import STATUS_CHUNK_SIZE, StatusResult, build_request_body, dumps_status_response, parse_status_body
+from mock_api import design_payload
+
+def test_large_result_is_passed_through_undecoded():
+    body = b'{"codeMajor":"success","codeMinor":"done","result":' + design_payload(4 * STATUS_CHUNK_SIZE) + b'}'
+    response = parse_status_body(body)
+
+    assert isinstance(response, StatusResult)
+    assert response.get("codeMajor") == "success"
+    assert not response._loaded
+    assert dumps_status_response(response) is response.body
+    assert not response._loaded
+
+    expected = json.loads(body)
+    assert response["result"] == expected["result"]
+    assert response == expected
+    assert json.loads(response.raw_result) == expected["result"]
+
+def test_small_and_processing_bodies_are_parsed_straight_away():
+    assert parse_status_body(b'{"codeMajor":"processing","codeMinor":"generating"}') == {
+        "codeMajor": "processing",
+        "codeMinor": "generating"
+    }
+    failure = parse_status_body(b'{"codeMajor":"failure","codeMinor":"no_fit"}')
+    assert type(failure) is dict
+    assert dumps_status_response(failure) == b'{"codeMajor":"failure","codeMinor":"no_fit"}'
+
+def test_non_object_bodies_are_rejected():
+    with pytest.raises(ValueError):
+        parse_status_body(b'[1, 2, 3]')
+    with pytest.raises(ValueError):
+        parse_status_body(b'"codeMajor":"success",' + b' ' * STATUS_CHUNK_SIZE)
+
+def test_changing_a_built_body_leaves_later_bodies_unchanged():
+    selections = (["cooktop", "refrigerator"], ["base"], "Granite", ["sink"], "L-Shaped", 4000, 3500)
+    expected = json.loads(json.dumps(build_request_body(*selections)))
+
+    body = build_request_body(*selections)
+    space = body["sourceDesign"]["spaces"][0]
+    space["walls"]["perimeterWalls"][1]["startPosition"][0] = 9999
+    space["walls"]["perimeterWalls"].pop()
+    space["functions"].append("dining")
+    space["floor"]["id"] = "changed"
+    body["sourceDesign"]["info"]["source"]["applicationId"] = "changed"
+    groups = body["autoDesignInputs"]["requiredItemTypes"]
+    groups[0]["preferences"][0]["baseItemType"] = "appliance.oven"
+    groups[0]["catalogVersionIDs"].append(1)
+    groups.pop()
+
+    assert build_request_body(*selections) == expected
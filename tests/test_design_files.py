@@ -0,0 +1,10 @@
+from design_files import default_public_url
+
+def test_public_url_defaults_only_when_the_bind_address_tells_it():
+    assert default_public_url("127.0.0.1", 8502) == "http://localhost:8502"
+    assert default_public_url("::1", 8502) == "http://localhost:8502"
+    assert default_public_url("10.0.0.5", 8502) == "http://10.0.0.5:8502"
+    assert default_public_url("fd00::5", 8502) == "http://[fd00::5]:8502"
+    # Every interface: the name users reach this machine by isn't known
+    assert default_public_url("0.0.0.0", 8502) == ""
+    assert default_public_url("", 8502) == ""
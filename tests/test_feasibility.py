@@ -0,0 +1,76 @@
+from design_api import build_request_body
+from feasibility import check_feasibility, encode_bodies, screen_request_bodies
+from request_schema import fit_warning, validate_job
+
+ALL_APPLIANCES = ["cooktop", "refrigerator", "oven", "range", "dishwasher"]
+ALL_CABINETS = ["roof", "base", "tall"]
+
+def body(appliances, cabinets, layout="L-Shaped", width=4000, depth=4000):
+    return build_request_body(appliances, cabinets, "Granite", ["sink"], layout, width, depth)
+
+def test_run_length_follows_the_layout_and_room():
+    report = check_feasibility(*encode_bodies([
+        body(["cooktop"], ["base"], "I-Shaped"),
+        body(["cooktop"], ["base"], "L-Shaped"),
+        body(["cooktop"], ["base"], "U-Shaped"),
+        body(["cooktop"], ["base"], "L-Shaped", 6000, 5000)
+    ]))
+    wall = 4000 - 150  # Wall thickness is lost along each run
+    assert report["run_length"].tolist() == [
+        wall - 2 * 900,
+        2 * wall - 600 - 2 * 900,
+        3 * wall - 2 * 600 - 2 * 900,
+        (6000 - 150) + (5000 - 150) - 600 - 2 * 900
+    ]
+    # cooktop, sink and base cabinet at the base; the hood above the cooktop on the wall
+    assert report["base_needed"].tolist() == [2000] * 4
+    assert report["wall_needed"].tolist() == [600] * 4
+    assert report["feasible"].all()
+
+def test_screen_explains_what_does_not_fit():
+    errors = screen_request_bodies([
+        body(["cooktop"], ["base"]),
+        body(ALL_APPLIANCES, ALL_CABINETS),
+        body(ALL_APPLIANCES, ALL_CABINETS, width=5000)
+    ])
+    assert errors == [
+        "",
+        "Items don't fit: they need about 5400 mm of base run and the room has 5300 mm",
+        ""
+    ]
+    assert screen_request_bodies([]) == []
+
+def test_screening_many_bodies_matches_screening_each():
+    bodies = [
+        body(ALL_APPLIANCES[:count], ALL_CABINETS[:cabinets], layout, width, 4000)
+        for count in range(1, 6)
+        for cabinets in range(1, 4)
+        for layout in ("I-Shaped", "L-Shaped", "U-Shaped")
+        for width in (3500, 4500, 6000)
+    ]
+    assert screen_request_bodies(bodies) == [screen_request_bodies([one])[0] for one in bodies]
+
+def test_unknown_items_and_layouts():
+    unknown_item = body(["cooktop"], ["base"])
+    unknown_item["autoDesignInputs"]["requiredItemTypes"][0]["preferences"].append({"baseItemType": "appliance.toaster"})
+    unknown_layout = body(["cooktop"], ["base"], "Galley")
+    assert screen_request_bodies([unknown_item, unknown_layout]) == [
+        "",
+        "Items don't fit: the layout has no usable wall run in this room"
+    ]
+
+def test_fit_is_a_hard_error_for_batches_and_a_warning_for_the_form():
+    job = {
+        "appliances": ALL_APPLIANCES,
+        "cabinets": ALL_CABINETS,
+        "worktop": "Granite",
+        "plumbing": ["sink"],
+        "layout": "L-Shaped",
+        "width": 4000,
+        "depth": 4000
+    }
+    message = "Items don't fit: they need about 5400 mm of base run and the room has 5300 mm"
+    assert validate_job(job, check_fit=True) == [message]
+    assert validate_job(job, check_fit=False) == []
+    assert fit_warning(job) == message
+    assert fit_warning(dict(job, width=5000)) == ""
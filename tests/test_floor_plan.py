@@ -0,0 +1,26 @@
+import pytest
+
+from floor_plan import FloorPlanCache, _RenderProcess
+from mock_api import design_payload
+
+def test_a_dead_render_process_only_fails_the_job_it_was_on(tmp_path):
+    cache = FloorPlanCache(str(tmp_path), max_workers=1)
+    design_json = design_payload(16 * 1024).decode("utf-8")
+    assert cache.render("first", design_json, "svg", 120, timeout=60).startswith(b"<svg")
+
+    # Nothing to draw: the worker's ValueError reaches the caller and the worker lives on
+    with pytest.raises(ValueError):
+        cache.render("empty", "{}", "svg", 120, timeout=60)
+
+    worker = cache._executor.submit(lambda: cache._workers.process).result()
+    worker._process.kill()
+    worker._process.wait()
+    assert cache.render("second", design_json, "svg", 120, timeout=60).startswith(b"<svg")
+
+def test_a_render_process_that_dies_mid_job_raises_runtime_error(tmp_path):
+    worker = _RenderProcess()
+    worker._process.kill()
+    worker._process.wait()
+    with pytest.raises(RuntimeError, match="render process stopped"):
+        worker.render(str(tmp_path / "plan.svg"), "{}", "svg", 120, None)
+    assert not worker.alive
@@ -0,0 +1,21 @@
+import sqlite3
+
+from job_registry import JobRegistry
+
+def test_unchanged_status_leaves_no_write_transaction_open(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    registry = JobRegistry(path)
+    registry.record_submission("req-1", "/x?request_id=req-1", {"layout": "L-Shaped"})
+    assert registry.record_status("req-1", "processing")
+
+    # Already processing: nothing changes
+    assert not registry.record_status("req-1", "processing")
+    assert not registry.record_status("unknown", "processing")
+    assert not registry._conn.in_transaction
+
+    # Another process (a CLI, another replica) can still write
+    other = sqlite3.connect(path, timeout=0)
+    other.execute("UPDATE jobs SET status = 'success' WHERE request_id = 'req-1'")
+    other.commit()
+    other.close()
+    assert registry.get("req-1")["status"] == "success"
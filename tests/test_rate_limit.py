@@ -0,0 +1,85 @@
+import pytest
+
+import rate_limit
+from rate_limit import CLOSED, HALF_OPEN, OPEN, CIRCUIT_PROBE_WAIT, CircuitBreaker, TokenBucket
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock)
+    return clock
+
+def test_token_bucket_allows_a_burst_then_refills_at_its_rate(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+    assert [bucket.try_acquire() for _ in range(3)] == [0, 0, 0]
+    assert bucket.try_acquire() == pytest.approx(0.5)
+
+    clock.now += 0.25
+    assert bucket.try_acquire() == pytest.approx(0.25)
+    clock.now += 0.25
+    assert bucket.try_acquire() == 0
+
+    # Idle time never banks more than the burst
+    clock.now += 60
+    assert [bucket.try_acquire() for _ in range(3)] == [0, 0, 0]
+    assert bucket.try_acquire() > 0
+
+def test_circuit_opens_after_consecutive_failures_only(clock):
+    breaker = CircuitBreaker(failure_threshold=3, open_seconds=10, recovery_successes=2)
+    assert not breaker.record_failure()
+    assert not breaker.record_failure()
+    breaker.record_success()
+    assert not breaker.record_failure()
+    assert not breaker.record_failure()
+    assert breaker.state == CLOSED
+
+    assert breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.allow() == pytest.approx(10)
+    assert breaker.stats() == {"state": OPEN, "opened": 1, "retry_in": pytest.approx(10)}
+
+def test_half_open_circuit_lets_trials_in_one_more_per_success(clock):
+    breaker = CircuitBreaker(failure_threshold=1, open_seconds=10, recovery_successes=3)
+    breaker.record_failure()
+    clock.now += 10
+
+    assert breaker.allow() == 0
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow() == CIRCUIT_PROBE_WAIT
+
+    breaker.record_success()
+    assert breaker.allow() == 0
+    assert breaker.allow() == 0
+    assert breaker.allow() == CIRCUIT_PROBE_WAIT
+
+    breaker.record_success()
+    assert breaker.state == HALF_OPEN
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow() == 0
+
+def test_failed_trial_reopens_with_the_wait_doubled_up_to_the_cap(clock):
+    breaker = CircuitBreaker(failure_threshold=1, open_seconds=10, max_open_seconds=30, recovery_successes=1)
+    breaker.record_failure()
+    for expected_wait in (20, 30, 30):
+        clock.now += 100
+        assert breaker.allow() == 0
+        assert breaker.record_failure()
+        assert breaker.state == OPEN
+        assert breaker.allow() == pytest.approx(expected_wait)
+
+    # Recovering resets the wait
+    clock.now += 100
+    assert breaker.allow() == 0
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.allow() == pytest.approx(10)
+    assert breaker.stats()["opened"] == 5
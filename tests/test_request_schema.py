@@ -0,0 +1,87 @@
+from design_api import build_request_body
+from request_schema import compile_schema, validate_job, validate_request_body
+
+SCHEMA = {
+    "type": "object",
+    "required": ["name", "count"],
+    "additionalProperties": False,
+    "properties": {
+        "name": {"type": "string", "minLength": 2},
+        "count": {"type": "integer", "minimum": 1, "maximum": 3},
+        "kind": {"enum": ["a", "{b}"]},
+        "tags": {
+            "type": "array",
+            "minItems": 1,
+            "maxItems": 2,
+            "items": {"type": "object", "required": ["id"], "properties": {"id": {"type": "number"}}}
+        },
+        "pair": {
+            "type": "array",
+            "items": {"type": "integer"},
+            "check": lambda pair: "not ascending" if pair != sorted(pair) else None
+        }
+    }
+}
+
+validate = compile_schema(SCHEMA)
+
+def job(**changes):
+    return dict({
+        "appliances": ["cooktop", "refrigerator"],
+        "cabinets": ["base"],
+        "worktop": "Granite",
+        "plumbing": ["sink"],
+        "layout": "L-Shaped",
+        "width": 4000,
+        "depth": 4000
+    }, **changes)
+
+def test_compiled_validator_accepts_a_matching_value():
+    assert validate({"name": "ok", "count": 2, "kind": "{b}", "tags": [{"id": 1.5}], "pair": [1, 2]}) == []
+    assert "def validate(value):" in validate.source
+
+def test_compiled_validator_reports_every_keyword_with_its_path():
+    errors = validate({"name": "x", "count": 4, "kind": "c", "tags": [{"id": "1"}, {}, {"id": 2}], "extra": 1})
+    assert errors == [
+        "$.name: shorter than 2 characters",
+        "$.count: 4 is outside 1..3",
+        "$.kind: 'c' is not one of 'a', '{b}'",
+        "$.tags: expected 1..2 items, got 3",
+        "$.tags[0].id: expected number, got str",
+        "$.tags[1]: missing 'id'",
+        "$: unexpected 'extra'"
+    ]
+    assert validate([]) == ["$: expected object, got list"]
+    assert validate({"name": "ok"}) == ["$: missing 'count'"]
+
+def test_compiled_validator_rejects_bools_as_numbers():
+    assert validate({"name": "ok", "count": True}) == ["$.count: expected integer, got bool"]
+
+def test_checks_only_run_on_values_that_match_the_rest_of_the_schema():
+    assert validate({"name": "ok", "count": 1, "pair": [2, 1]}) == ["$.pair: not ascending"]
+    # The check would fail on a str item; the type error is reported instead
+    assert validate({"name": "ok", "count": 1, "pair": [2, "1"]}) == ["$.pair[1]: expected integer, got str"]
+
+def test_request_schema_accepts_built_bodies_and_rejects_what_the_api_would():
+    body = build_request_body(["cooktop"], ["base", "roof"], "Quartz", ["sink"], "L-Shaped", 4000, 5000)
+    assert validate_request_body(body) == []
+
+    walls = body["sourceDesign"]["spaces"][0]["walls"]["perimeterWalls"]
+    walls[1]["startPosition"] = [4000, 4500]
+    assert validate_request_body(body) == ["$.sourceDesign.spaces[0].walls.perimeterWalls: walls don't form a rectangle"]
+
+    walls[1]["startPosition"] = [4000, 0]
+    groups = body["autoDesignInputs"]["requiredItemTypes"]
+    groups[0]["catalogVersionIDs"].append(8204)
+    groups[0]["preferences"][0]["subType"] = "base"
+    assert validate_request_body(body) == [
+        "$.autoDesignInputs.requiredItemTypes[0]: appliance.cooktop preferences take no other fields"
+    ]
+
+def test_validate_job_reports_schema_errors_for_selections():
+    assert validate_job(job(), check_fit=False) == []
+    assert validate_job(job(layout="U-Shaped", width=3000), check_fit=False) == [
+        "$.sourceDesign.spaces[0].walls.perimeterWalls: room width 3000 mm is outside 3500-6000 mm",
+        "$.autoDesignInputs.roomConfig.functionLayoutType: 'U-Shaped' is not one of 'L-Shaped'"
+    ]
+    assert validate_job({"appliances": ["cooktop"]}) == ["Invalid selections: 'cabinets'"]
@@ -0,0 +1,84 @@
+import time
+
+import pytest
+
+from mock_redis import start_mock_redis
+from state_backend import MemoryStateBackend, RedisStateBackend, StateBackend
+
+@pytest.fixture
+def server():
+    pytest.importorskip("redis")
+    server = start_mock_redis(port=0)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def connect(server):
+    return RedisStateBackend(f"redis://127.0.0.1:{server.server_address[1]}/0", prefix="test:")
+
+def take_over_after_check(backend, other):
+    """Make another replica take the lease over right after backend's transaction reads it."""
+    pipeline = backend.client.pipeline
+
+    def racing_pipeline(*args, **kwargs):
+        pipe = pipeline(*args, **kwargs)
+        get = pipe.get
+
+        def get_then_take_over(key):
+            value = get(key)
+            # The lease expired just now and the other replica took it
+            other.client.set(key, "replica-b", px=60000)
+            return value
+
+        pipe.get = get_then_take_over
+        return pipe
+
+    backend.client.pipeline = racing_pipeline
+
+def test_leases_are_taken_renewed_and_released_by_their_owner(server):
+    a, b = connect(server), connect(server)
+    assert a.acquire_lease("req", "replica-a", 60)
+    assert not b.acquire_lease("req", "replica-b", 60)
+    assert a.acquire_lease("req", "replica-a", 60)
+
+    b.release_lease("req", "replica-b")
+    assert not b.acquire_lease("req", "replica-b", 60)
+    a.release_lease("req", "replica-a")
+    assert b.acquire_lease("req", "replica-b", 60)
+
+def test_release_leaves_a_lease_taken_over_in_between(server):
+    a, b = connect(server), connect(server)
+    assert a.acquire_lease("req", "replica-a", 60)
+    take_over_after_check(a, b)
+
+    a.release_lease("req", "replica-a")
+    assert b.client.get("test:lease:req") == b"replica-b"
+
+def test_renewal_fails_for_a_lease_taken_over_in_between(server):
+    a, b = connect(server), connect(server)
+    assert a.acquire_lease("req", "replica-a", 60)
+    take_over_after_check(a, b)
+
+    assert not a.acquire_lease("req", "replica-a", 60)
+    assert b.client.get("test:lease:req") == b"replica-b"
+
+def test_a_backend_missing_a_method_fails_at_construction():
+    class StatusOnly(StateBackend):
+        def get_status(self, request_id):
+            return None
+
+        def put_status(self, request_id, response, ttl):
+            pass
+
+    with pytest.raises(TypeError, match="acquire_lease"):
+        StatusOnly()
+
+def test_memory_backend_drops_expired_leases():
+    backend = MemoryStateBackend()
+    for index in range(1000):
+        assert backend.acquire_lease(f"old-{index}", "replica-a", 0.01)
+    time.sleep(0.02)
+    assert backend.acquire_lease("live", "replica-a", 60)
+    assert backend.acquire_lease("newest", "replica-a", 60)
+    assert sorted(backend._leases) == ["live", "newest"]
+    assert not backend.acquire_lease("live", "replica-b", 60)
@@ -0,0 +1,83 @@
+import subprocess
+import sys
+import threading
+import time
+
+from submission_journal import SubmissionJournal
+
+BODY = {"autoDesignInputs": {"roomConfig": {"functionLayoutType": "L-Shaped"}}}
+
+def journal(tmp_path, owner, **kwargs):
+    return SubmissionJournal(str(tmp_path / "submissions.sqlite3"), owner=owner, **kwargs)
+
+def queue(journal, *job_ids):
+    for job_id in job_ids:
+        journal.add(job_id, BODY, f"hash-{job_id}", {"layout": "L-Shaped"}, time.time())
+
+def set_owner(journal, owner, host=None, pid=None, seen_at=None):
+    journal._conn.execute(
+        "UPDATE owners SET host = COALESCE(?, host), pid = COALESCE(?, pid), seen_at = COALESCE(?, seen_at) WHERE owner = ?",
+        (host, pid, seen_at, owner)
+    )
+    journal._conn.commit()
+
+def test_entries_of_a_live_owner_are_left_alone(tmp_path):
+    a = journal(tmp_path, "replica-a")
+    queue(a, "job-1")
+    b = journal(tmp_path, "replica-b")
+    # On another host, with a fresh heartbeat
+    set_owner(b, "replica-a", host="elsewhere")
+    assert b.claim_unfinished() == []
+
+def test_entries_of_an_owner_whose_heartbeat_went_stale_are_claimed_once(tmp_path):
+    a = journal(tmp_path, "replica-a")
+    queue(a, "job-1", "job-2")
+    a.update("job-2", status="accepted", request_id="req-2", finished_at=time.time())
+    b = journal(tmp_path, "replica-b", stale_after=30)
+    c = journal(tmp_path, "replica-c", stale_after=30)
+    set_owner(b, "replica-a", host="elsewhere", seen_at=time.time() - 31)
+
+    claimed = b.claim_unfinished()
+    assert [entry["job_id"] for entry in claimed] == ["job-1"]
+    assert claimed[0]["request_body"] == BODY
+    assert claimed[0]["parameters"] == {"layout": "L-Shaped"}
+    # Now b's, and b is alive
+    assert c.claim_unfinished() == []
+    assert b.claim_unfinished() == []
+
+def test_entries_of_a_process_that_exited_on_this_host_are_claimed_without_waiting(tmp_path):
+    exited = subprocess.Popen([sys.executable, "-c", "pass"])
+    exited.wait()
+    a = journal(tmp_path, "replica-a")
+    queue(a, "job-1")
+    set_owner(a, "replica-a", pid=exited.pid)
+    b = journal(tmp_path, "replica-b")
+    assert [entry["job_id"] for entry in b.claim_unfinished()] == ["job-1"]
+
+def test_own_entries_are_only_claimed_back_after_a_restart(tmp_path):
+    before = journal(tmp_path, "replica-a")
+    queue(before, "job-1")
+    assert before.claim_unfinished() == []
+
+    # Same REPLICA_ID, new process state
+    after = journal(tmp_path, "replica-a")
+    assert [entry["job_id"] for entry in after.claim_unfinished()] == ["job-1"]
+    assert after.claim_unfinished() == []
+
+def test_concurrent_claims_never_hand_out_an_entry_twice(tmp_path):
+    a = journal(tmp_path, "replica-a")
+    queue(a, *[f"job-{index}" for index in range(50)])
+    claimers = [journal(tmp_path, f"replica-{index}", stale_after=30) for index in range(4)]
+    set_owner(a, "replica-a", host="elsewhere", seen_at=time.time() - 31)
+
+    results = [None] * len(claimers)
+    def claim(index):
+        results[index] = [entry["job_id"] for entry in claimers[index].claim_unfinished()]
+    threads = [threading.Thread(target=claim, args=(index,)) for index in range(len(claimers))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    claimed = [job_id for result in results for job_id in result]
+    assert sorted(claimed) == sorted(f"job-{index}" for index in range(50))